@@ -6,9 +6,9 @@ import os
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage
 from langgraph.graph import StateGraph, END
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_google_genai import ChatGoogleGenerativeAI, HarmBlockThreshold, HarmCategory
 
 from .tools import all_tools
+from ..utils.llm_pool import RELAXED_SAFETY_SETTINGS, get_chat_model
 
 # --- 1. Define the State for our Graph ---
 class AgentState(TypedDict):
@@ -29,17 +29,7 @@ def tool_router(state: AgentState):
     if not llm_api_key:
         raise ValueError("LLM API Key not provided in state or environment variables.")
 
-    llm = ChatGoogleGenerativeAI(
-        model=llm_model_id,
-        google_api_key=llm_api_key,
-        temperature=0,
-        safety_settings={
-            HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
-            HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
-            HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
-            HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
-        },
-    )
+    llm = get_chat_model(llm_model_id, llm_api_key, temperature=0, safety_settings=RELAXED_SAFETY_SETTINGS)
     
     llm_with_tools = llm.bind_tools(all_tools)
     
@@ -0,0 +1,70 @@
+# backend/app/ai_core/answer_cache_nodes.py
+from flask import current_app
+from langchain_core.messages import AIMessage
+from .graph import AgentState
+from .progress import emit_progress
+from .tools import NO_GRAPH_CONTEXT
+from ..utils.answer_cache import answer_cache, normalize_query
+from ..utils.index_revision import get_index_revision
+
+
+def _cacheable_query(state: AgentState) -> str | None:
+    """
+    The question the answer cache keys this run by: the user's own query, which is known before the
+    planner runs. Only the first question of a conversation is cached; a follow-up such as "and
+    what calls it?" depends on the earlier turns and means something else in another conversation.
+    """
+    query = state.get("original_query", "")
+    if not current_app.config.get('ANSWER_CACHE_ENABLED', True) or not normalize_query(query):
+        return None
+    if any(message.type == "ai" for message in state.get("chat_history", [])):
+        return None
+    return query
+
+
+def answer_cache_lookup_node(state: AgentState) -> dict:
+    """
+    Runs first, before the planner. On a hit, the cached answer becomes the final answer and the graph
+    ends without any LLM call. An exact match of the normalized query is tried first; the query is
+    only embedded for a similarity match when answers with embeddings are cached for this revision.
+    """
+    print("---EXECUTING ANSWER CACHE LOOKUP NODE---")
+    query = _cacheable_query(state)
+    if query is None:
+        return {"answer_cache_hit": False}
+
+    revision = get_index_revision(state["repo_id"])
+    if revision is None:
+        return {"answer_cache_hit": False}
+
+    embedding = None
+    answer = answer_cache.get(state["repo_id"], revision, query)
+    if answer is None and answer_cache.has_similarity_candidates(state["repo_id"], revision):
+        embedding = answer_cache.embed(query)
+        answer = answer_cache.get_similar(state["repo_id"], revision, embedding)
+    if answer is None:
+        print("Answer cache: miss.")
+        return {"answer_cache_hit": False, "index_revision": revision, "query_embedding": embedding}
+
+    print("Answer cache: hit.")
+    emit_progress("answer_cache", "Found an answer to this question already...")
+    return {"answer_cache_hit": True, "final_answer": [AIMessage(content=answer)]}
+
+
+def route_after_answer_cache(state: AgentState) -> str:
+    return "CACHE_HIT" if state.get("answer_cache_hit") else "CACHE_MISS"
+
+
+def answer_cache_store_node(state: AgentState) -> dict:
+    """Runs last. Caches the final answer, unless it wasn't grounded in any retrieved context."""
+    print("---EXECUTING ANSWER CACHE STORE NODE---")
+    revision = state.get("index_revision")
+    final_answer = state.get("final_answer", [])
+    steps = state.get("intermediate_steps", [])
+    grounded = any(result and result != NO_GRAPH_CONTEXT for _, result in steps)
+    query = _cacheable_query(state)
+    if query and revision and final_answer and grounded:
+        # A lookup that found nothing to compare with skipped the embedding; later near-duplicates need it.
+        embedding = state.get("query_embedding") or answer_cache.embed(query)
+        answer_cache.set(state["repo_id"], revision, query, final_answer[-1].content, embedding)
+    return {}
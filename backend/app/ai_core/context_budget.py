@@ -0,0 +1,100 @@
+# backend/app/ai_core/context_budget.py
+from flask import current_app
+
+# No offline tokenizer is available for the Gemini models; about four characters per token is
+# a close enough estimate for English text and code.
+CHARS_PER_TOKEN = 4
+TRUNCATION_MARKER = "\n... [truncated to fit the context budget]"
+
+
+def estimate_tokens(text: str) -> int:
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cuts `text` down to about `max_tokens`, marking the cut."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    return text[:max(0, max_tokens * CHARS_PER_TOKEN - len(TRUNCATION_MARKER))] + TRUNCATION_MARKER
+
+
+def get_token_budget(context_window: int | None) -> dict:
+    """
+    The prompt budget for a model with the given context window (ConfiguredModel.context_window,
+    CHAT_DEFAULT_CONTEXT_WINDOW when unset): CHAT_CONTEXT_WINDOW_FRACTION of the window, capped at
+    CHAT_MAX_PROMPT_TOKENS so that large-window models don't get ever longer (and costlier)
+    prompts. It's split into the share for the conversation history (planner) and for the tool
+    results (synthesizer); the rest is left to the prompt templates and the query.
+    """
+    config = current_app.config
+    window = context_window or config.get('CHAT_DEFAULT_CONTEXT_WINDOW', 32768)
+    prompt_tokens = min(int(window * config.get('CHAT_CONTEXT_WINDOW_FRACTION', 0.5)), config.get('CHAT_MAX_PROMPT_TOKENS', 16000))
+    return {
+        "context_window": window,
+        "prompt": prompt_tokens,
+        "history": int(prompt_tokens * config.get('CHAT_HISTORY_BUDGET_FRACTION', 0.3)),
+        "tool_context": int(prompt_tokens * config.get('CHAT_TOOL_CONTEXT_BUDGET_FRACTION', 0.5)),
+    }
+
+
+def state_token_budget(state: dict) -> dict:
+    """The budget chat_handler put in the agent state, or the default model's."""
+    return state.get("token_budget") or get_token_budget(None)
+
+
+def split_recent_turns(rows: list, max_turns: int) -> tuple[list, list]:
+    """
+    Splits chronologically ordered ChatHistory rows into (older, recent), where `recent` holds
+    the last `max_turns` turns. A turn starts at each user message.
+    """
+    turn_starts = [index for index, row in enumerate(rows) if row.sender == 'user']
+    if len(turn_starts) <= max_turns:
+        return [], rows
+    cut = turn_starts[-max_turns] if max_turns > 0 else len(rows)
+    return rows[:cut], rows[cut:]
+
+
+def fold_into_summary(summary_text: str, rows: list) -> str:
+    """
+    Appends older turns the repo summary task hasn't covered yet to the summary text, each
+    message cut to CHAT_FOLDED_MESSAGE_TOKENS, so that nothing drops out of the context between
+    leaving the verbatim window and being summarized.
+    """
+    if not rows:
+        return summary_text
+    max_tokens = current_app.config.get('CHAT_FOLDED_MESSAGE_TOKENS', 100)
+    lines = [
+        f"- {'user' if row.sender == 'user' else 'assistant'}: {truncate_to_tokens(row.message_content, max_tokens)}"
+        for row in rows if row.message_content and row.message_content.strip()
+    ]
+    return f"{summary_text}\nEarlier turns of this session, not summarized yet:\n" + "\n".join(lines)
+
+
+def fit_history(messages: list, max_tokens: int) -> list:
+    """
+    Trims the agent's chat history to about `max_tokens`. System messages (user facts, the
+    conversation summary) are kept but share at most half the budget; the remaining budget is
+    filled with conversation messages, newest first. The latest message, the user's query, is
+    always kept, truncated if need be.
+    """
+    system_budget = max_tokens // 2
+    fitted_system = []
+    for message in messages:
+        if message.type != "system" or system_budget <= 0:
+            continue
+        content = truncate_to_tokens(str(message.content), system_budget)
+        system_budget -= estimate_tokens(content)
+        fitted_system.append(type(message)(content=content))
+
+    remaining = max_tokens - sum(estimate_tokens(message.content) for message in fitted_system)
+    kept = []
+    for message in reversed([message for message in messages if message.type != "system"]):
+        cost = estimate_tokens(str(message.content))
+        if cost > remaining:
+            if kept:
+                break
+            message = type(message)(content=truncate_to_tokens(str(message.content), max(remaining, 0)))
+            cost = estimate_tokens(message.content)
+        kept.append(message)
+        remaining -= cost
+    return fitted_system + kept[::-1]
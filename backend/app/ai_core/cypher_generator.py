@@ -7,11 +7,8 @@ from ..utils.llm_utils import get_llm_for_graph
 from langchain_core.prompts import PromptTemplate
 from .graph import AgentState # Assuming AgentState is defined in graph.py
 
-# This is the final, most robust prompt. It has an unambiguous schema and is designed
-# to avoid repeating queries, forcing it to dig deeper on subsequent calls.
-CYPHER_GENERATION_TEMPLATE = """
-You are a Cypher query expert. Your task is to generate a single, precise Cypher query to answer a question about a codebase.
-
+# The schema reference shared by both generation prompts.
+CYPHER_SCHEMA_REFERENCE = """
 **Graph Schema:**
 - **Node Reference:**
   - `Directory` properties: {{path: str, dataSourceId: str}}
@@ -24,22 +21,31 @@ You are a Cypher query expert. Your task is to generate a single, precise Cypher
   - `(:File)-[:DEFINES_FUNCTION]->(:Function)`
   - `(:Class)-[:HAS_METHOD]->(:Function)`
   - `(:Function)-[:CALLS]->(:Function)`
+"""
 
-**Instructions:**
-1.  Analyze the "User's Query" to understand the user's ultimate goal.
-2.  Use the "Query Examples" as a guide for the type of query to generate.
-3.  Review the "Previously Attempted Queries" to avoid repetition. Generate a NEW query that finds different, deeper information. For example, if you already have the summary, try finding the function's calls next.
-4.  You MUST filter every repository node by `dataSourceId: '{repo_id}'`.
-5.  Return ONLY the Cypher query. If you cannot generate a new, useful query, return an empty string.
-
+CYPHER_QUERY_EXAMPLES = """
 **Query Examples:**
 # Goal: Get a function's documentation.
 MATCH (f:Function {{name: 'command_loop', file_path: 'ui_handler.py', dataSourceId: '{repo_id}'}}) RETURN f.summary AS summary
 # Goal: List the methods in a class.
-MATCH (c:Class {{name: 'Peer', dataSourceId: '{repo_id}'}})-[:HAS_METHOD]->(m:Function) RETURN m.name as method_name
+MATCH (c:Class {{name: 'Peer', dataSourceId: '{repo_id}'}})-[:HAS_METHOD]->(m:Function {{dataSourceId: '{repo_id}'}}) RETURN m.name as method_name
 # Goal: Trace what a function calls.
-MATCH (start:Function {{name: 'command_loop', dataSourceId: '{repo_id}'}})-[:CALLS]->(callee:Function) RETURN callee.name AS called_function
+MATCH (start:Function {{name: 'command_loop', dataSourceId: '{repo_id}'}})-[:CALLS]->(callee:Function {{dataSourceId: '{repo_id}'}}) RETURN callee.name AS called_function
+"""
 
+# This is the final, most robust prompt. It has an unambiguous schema and is designed
+# to avoid repeating queries, forcing it to dig deeper on subsequent calls.
+CYPHER_GENERATION_TEMPLATE = """
+You are a Cypher query expert. Your task is to generate a single, precise Cypher query to answer a question about a codebase.
+""" + CYPHER_SCHEMA_REFERENCE + """
+**Instructions:**
+1.  Analyze the "User's Query" to understand the user's ultimate goal.
+2.  Use the "Query Examples" as a guide for the type of query to generate.
+3.  Review the "Previously Attempted Queries" to avoid repetition. Generate a NEW query that finds different, deeper information. For example, if you already have the summary, try finding the function's calls next.
+4.  You MUST filter every repository node by `dataSourceId: '{repo_id}'`.
+5.  Only read (MATCH ... RETURN), and give variable-length paths an upper bound such as `*1..3`. A previous query followed by `// REJECTED:` was refused for the stated reason; fix that mistake instead of repeating it.
+6.  Return ONLY the Cypher query. If you cannot generate a new, useful query, return an empty string.
+""" + CYPHER_QUERY_EXAMPLES + """
 **Your Task:**
 
 User's Query: {question}
@@ -55,16 +61,56 @@ CYPHER_PROMPT = PromptTemplate(
     template=CYPHER_GENERATION_TEMPLATE
 )
 
-def generate_cypher_query(state: AgentState, attempted_queries: list[str]) -> str | None:
+# Asks for several complementary queries at once, so they can all run concurrently.
+QUERY_SEPARATOR = "-----"
+MULTI_CYPHER_GENERATION_TEMPLATE = """
+You are a Cypher query expert. Your task is to generate up to {count} different, precise Cypher queries that together answer a question about a codebase.
+""" + CYPHER_SCHEMA_REFERENCE + """
+**Instructions:**
+1.  Analyze the "User's Query" to understand the user's ultimate goal.
+2.  Use the "Query Examples" as a guide for the type of queries to generate.
+3.  Make every query look for DIFFERENT information, e.g. one for the summary, one for what it calls, one for who calls it, one for the class or file it belongs to.
+4.  Do not repeat any of the "Previously Attempted Queries".
+5.  You MUST filter every repository node by `dataSourceId: '{repo_id}'`.
+6.  Only read (MATCH ... RETURN), and give variable-length paths an upper bound such as `*1..3`. A previous query followed by `// REJECTED:` was refused for the stated reason; fix that mistake instead of repeating it.
+7.  Return ONLY the Cypher queries, separated by a line containing only `""" + QUERY_SEPARATOR + """`. If you cannot generate a useful query, return an empty string.
+""" + CYPHER_QUERY_EXAMPLES + """
+**Your Task:**
+
+User's Query: {question}
+Repository ID: {repo_id}
+Previously Attempted Queries:
+{attempted_queries}
+
+Up to {count} Different Cypher Queries:
+"""
+
+MULTI_CYPHER_PROMPT = PromptTemplate(
+    input_variables=["schema", "question", "repo_id", "attempted_queries", "count"],
+    template=MULTI_CYPHER_GENERATION_TEMPLATE
+)
+
+
+def _clean_query(text: str) -> str:
+    return text.strip().replace("```cypher", "").replace("```", "").strip()
+
+def _format_attempted_queries(attempted_queries: list[str], rejections: dict[str, str] | None) -> str:
+    """The previous queries for the prompt, each one the guard refused followed by its `// REJECTED:` reason."""
+    rejections = rejections or {}
+    return "\n".join(
+        f"{query}\n// REJECTED: {rejections[query]}" if query in rejections else query
+        for query in attempted_queries
+    )
+
+
+def generate_cypher_query(state: AgentState, attempted_queries: list[str], rejections: dict[str, str] | None = None) -> str | None:
     """
     Generates a new, unique Cypher query based on the decomposed query, avoiding
-    previously attempted queries.
+    previously attempted queries (and the mistakes `rejections` names for them).
     """
-    from ..knowledge_graph.kg_manager import KnowledgeGraphManager
-    
-    kg_manager = KnowledgeGraphManager()
-    graph_schema = kg_manager.graph.schema # You might want to cache this
-    kg_manager.close()
+    from ..knowledge_graph.schema_cache import get_graph_schema
+
+    graph_schema = get_graph_schema()
 
     llm = get_llm_for_graph(state)
     cypher_chain = CYPHER_PROMPT | llm
@@ -73,13 +119,40 @@ def generate_cypher_query(state: AgentState, attempted_queries: list[str]) -> st
         "schema": graph_schema,
         "question": state['decomposed_query'],
         "repo_id": state['repo_id'],
-        "attempted_queries": "\n".join(attempted_queries)
+        "attempted_queries": _format_attempted_queries(attempted_queries, rejections)
     }).content
 
     # Clean the response
-    generated_query = response_content.strip().replace("```cypher", "").replace("```", "").strip()
+    generated_query = _clean_query(response_content)
 
     if not generated_query or "no new query" in generated_query.lower():
         return None
 
-    return generated_query
\ No newline at end of file
+    return generated_query
+
+
+def generate_cypher_queries(state: AgentState, count: int, attempted_queries: list[str], rejections: dict[str, str] | None = None) -> list[str]:
+    """
+    Generates up to `count` distinct Cypher queries for the decomposed query with a single LLM
+    call, each meant to gather a different piece of the answer. Duplicates and queries already
+    in `attempted_queries` are dropped.
+    """
+    from ..knowledge_graph.schema_cache import get_graph_schema
+
+    llm = get_llm_for_graph(state)
+    cypher_chain = MULTI_CYPHER_PROMPT | llm
+
+    response_content = cypher_chain.invoke({
+        "schema": get_graph_schema(),
+        "question": state['decomposed_query'],
+        "repo_id": state['repo_id'],
+        "attempted_queries": _format_attempted_queries(attempted_queries, rejections),
+        "count": count
+    }).content
+
+    queries = []
+    for part in _clean_query(response_content).split(QUERY_SEPARATOR):
+        query = part.strip()
+        if query and "no new query" not in query.lower() and query not in queries and query not in attempted_queries:
+            queries.append(query)
+    return queries[:count]
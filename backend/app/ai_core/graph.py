@@ -13,11 +13,17 @@ class AgentState(TypedDict):
     chat_history: Annotated[Sequence[BaseMessage], operator.add]
     api_key: str
     model_id: str
+    token_budget: Dict[str, int] # See context_budget.get_token_budget().
 
     # -- Planner Outputs --
     decomposed_query: str
     plan: List[str] # The plan is a simple list of string instructions.
 
+    # -- Answer Cache (see answer_cache_nodes.py) --
+    answer_cache_hit: bool
+    index_revision: str
+    query_embedding: List[float]
+
     # -- Tool Execution & Loop Management --
     # This list will grow with each tool call, allowing us to track our progress.
     intermediate_steps: Annotated[list, operator.add]
@@ -36,6 +42,7 @@ from .retrieval_grader import retrieval_grader_node
 from .synthesizer import synthesizer_node
 from .critic import critic_node
 from .tools import tool_executor
+from .answer_cache_nodes import answer_cache_lookup_node, answer_cache_store_node, route_after_answer_cache
 
 # --- 3. Define the Conditional Logic for the Loop ---
 def check_if_plan_is_complete(state: AgentState) -> str:
@@ -62,16 +69,26 @@ graph_builder = StateGraph(AgentState)
 # --- 4a. Define the Nodes ---
 # Each node represents a function that our agent will perform.
 graph_builder.add_node("planner", planner_node)
+graph_builder.add_node("answer_cache_lookup", answer_cache_lookup_node)
 graph_builder.add_node("tool_executor", tool_executor)
 graph_builder.add_node("retrieval_grader", retrieval_grader_node)
 graph_builder.add_node("synthesizer", synthesizer_node)
 graph_builder.add_node("critic", critic_node)
+graph_builder.add_node("answer_cache_store", answer_cache_store_node)
 
 # --- 4b. Define the Edges (The Agent's "Brain Wiring") ---
-# The entry point is always the planner.
-graph_builder.set_entry_point("planner")
+# The entry point is the answer cache, so a hit ends the run before any LLM call; a miss goes on to the planner.
+graph_builder.set_entry_point("answer_cache_lookup")
+graph_builder.add_conditional_edges(
+    "answer_cache_lookup",
+    route_after_answer_cache,
+    path_map={
+        "CACHE_HIT": END,
+        "CACHE_MISS": "planner"
+    }
+)
 
-# From the planner, we always go to the tool executor for the first time.
+# From the planner, we go to the tool executor for the first time.
 graph_builder.add_edge("planner", "tool_executor")
 
 # After the tool executor runs, we hit our conditional decision point.
@@ -88,7 +105,8 @@ graph_builder.add_conditional_edges(
 # Once the loop is exited, the flow is linear again.
 graph_builder.add_edge("retrieval_grader", "synthesizer")
 graph_builder.add_edge("synthesizer", "critic")
-graph_builder.add_edge("critic", END) # The critic is the final step in the process.
+graph_builder.add_edge("critic", "answer_cache_store")
+graph_builder.add_edge("answer_cache_store", END) # Caching the critic's answer is the final step in the process.
 
 # --- 5. Compile the Graph ---
 # This creates the final, runnable agent.
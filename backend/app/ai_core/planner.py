@@ -2,6 +2,8 @@ from .graph import AgentState
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.messages import SystemMessage
 from ..utils.llm_utils import get_llm_for_graph # We will create this helper function
+from .progress import emit_progress
+from .context_budget import fit_history, state_token_budget
 
 # --- 1. Define the Planner's Prompt (Corrected Version) ---
 PLANNER_PROMPT = """
@@ -50,8 +52,11 @@ def planner_node(state: AgentState) -> dict:
         dict: A dictionary with the `decomposed_query` and `plan`.
     """
     print("---EXECUTING PLANNER NODE---")
+    emit_progress("planner", "Planning how to answer your question...")
     
-    history = "\n".join([f"{msg.type}: {msg.content}" for msg in state['chat_history']])
+    # Only as much history as the model's budget allows; long sessions don't grow the prompt.
+    chat_history = fit_history(state['chat_history'], state_token_budget(state)["history"])
+    history = "\n".join([f"{msg.type}: {msg.content}" for msg in chat_history])
     
     prompt = ChatPromptTemplate.from_messages([
         ("system", PLANNER_PROMPT),
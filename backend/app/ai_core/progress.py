@@ -0,0 +1,51 @@
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langgraph.config import get_stream_writer
+
+NO_ANSWER = "I was unable to produce a final answer based on the information I found."
+
+def emit_progress(node: str, message: str):
+    """
+    Publishes a progress event on the graph's "custom" stream while a node is still running.
+    chat_routes forwards these to the browser as SSE progress events. Outside of a streaming
+    graph run (e.g. `agent_graph.invoke` or a direct node call) this is a no-op.
+    """
+    try:
+        writer = get_stream_writer()
+    except RuntimeError:
+        return
+    writer({"node": node, "message": message})
+
+
+def stream_answer_events(graph, agent_input_state: dict, config: dict | None = None):
+    """
+    Runs the agent graph and yields the events chat_routes sends to the browser: progress events
+    ({"status": "progress", "node", "message"}) and pieces of the answer ({"chunk": text}).
+
+    Only the synthesizer's token chunks are forwarded. The "messages" stream also emits the node's
+    finished AIMessage once it returns, which would repeat the whole answer after its tokens.
+    When the synthesizer answered without calling the LLM (e.g. no context was found), nothing was
+    streamed, so the graph's final answer is sent as one chunk at the end.
+    """
+    streamed = False
+    final_answer_content = ""
+    for stream_mode, payload in graph.stream(agent_input_state, config, stream_mode=["custom", "messages", "updates"]):
+        if stream_mode == "custom":
+            # Progress events published by the nodes via emit_progress().
+            yield {"status": "progress", **payload}
+        elif stream_mode == "messages":
+            message_chunk, metadata = payload
+            if (metadata.get("langgraph_node") == "synthesizer" and isinstance(message_chunk, AIMessageChunk)
+                    and isinstance(message_chunk.content, str) and message_chunk.content):
+                streamed = True
+                yield {"chunk": message_chunk.content}
+        elif stream_mode == "updates":
+            for node_update in payload.values():
+                if node_update and node_update.get("final_answer"):
+                    last_message = node_update["final_answer"][-1]
+                    if isinstance(last_message, AIMessage):
+                        final_answer_content = last_message.content
+
+    if not streamed:
+        if not final_answer_content:
+            print("Graph execution finished, but no 'final_answer' was ever produced.")
+        yield {"chunk": final_answer_content or NO_ANSWER}
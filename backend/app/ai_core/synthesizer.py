@@ -2,6 +2,8 @@ from .graph import AgentState
 from ..utils.llm_utils import get_llm_for_graph
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.messages import AIMessage
+from .progress import emit_progress
+from .context_budget import state_token_budget, truncate_to_tokens
 
 SYNTHESIZER_TEMPLATE = """
 You are an expert software architect and documentation writer. Your task is to provide a comprehensive, clear, and structured answer to a user's question by synthesizing the provided JSON context from a knowledge graph.
@@ -39,9 +41,14 @@ def synthesizer_node(state: AgentState) -> dict:
             "final_answer": [AIMessage(content="I apologize, but I was unable to retrieve any context to answer your question.")]
         }
 
+    context = truncate_to_tokens(context, state_token_budget(state)["tool_context"])
+
+    emit_progress("synthesizer", "Writing the answer...")
     llm = get_llm_for_graph(state)
     synthesis_chain = SYNTHESIZER_PROMPT | llm
 
+    # When the graph runs with stream_mode "messages" (see chat_routes), LangGraph attaches a
+    # streaming callback, so this invoke streams tokens to the client as they are generated.
     response = synthesis_chain.invoke({
         "query": state["decomposed_query"],
         "context": context
@@ -49,6 +56,7 @@ def synthesizer_node(state: AgentState) -> dict:
 
     print(f"Synthesizer Output:\n---\n{response.content}\n---")
 
+    # Same id as the streamed response, so LangGraph knows this message was already streamed.
     return {
-        "final_answer": [AIMessage(content=response.content)]
+        "final_answer": [AIMessage(content=response.content, id=response.id)]
     }
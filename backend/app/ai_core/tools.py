@@ -1,11 +1,20 @@
 
+from concurrent.futures import ThreadPoolExecutor, wait
+from flask import current_app
 from langchain.tools import tool
 from ..knowledge_graph.kg_manager import KnowledgeGraphManager
+from ..knowledge_graph.cypher_guard import CypherRejected, execute_guarded_cypher
 from ..vector_db.vector_store_manager import VectorStoreManager
 from ..utils.file_reader import read_file_from_repo
-from .cypher_generator import generate_cypher_query
+from ..utils.index_revision import get_index_revision
+from .cypher_generator import generate_cypher_query, generate_cypher_queries
 from .graph import AgentState # Assuming this is where your state is defined
+from .progress import emit_progress
 import json
+import time
+
+# The knowledge_graph_search result when gathering found nothing.
+NO_GRAPH_CONTEXT = "No information was found in the knowledge graph after multiple attempts."
 
 @tool
 def semantic_code_search(query: str, data_source_id: str) -> str:
@@ -29,31 +38,51 @@ def file_reader_tool(file_path: str, data_source_id: str) -> str:
 # --- The NEW "Top Notch" Tool Executor ---
 # This function REPLACES your old tool_executor. It is the heart of the agent.
 
-def tool_executor(state: AgentState) -> dict:
+def _record_key(record: dict) -> str:
+    return json.dumps(record, sort_keys=True, default=str)
+
+
+def _merge_records(gathered_context: list, seen: set, records: list) -> int:
+    """Appends the records not gathered yet and returns how many were new."""
+    added = 0
+    for record in records:
+        key = _record_key(record)
+        if key not in seen:
+            seen.add(key)
+            gathered_context.append(record)
+            added += 1
+    return added
+
+
+def _run_query(kg_manager, state: AgentState, index_revision, cypher_query: str) -> tuple[list, str | None]:
     """
-    The intelligent "Agent Kernel". It replaces the simple tool executor
-    with an Information Gathering Loop. It calls the Cypher generator multiple times
-    to build a rich context before handing off to the synthesizer.
+    Executes against the Knowledge Graph (over the shared, pooled driver) once the Cypher guard
+    accepts the query, or reuses the cached result. Returns the records and, if the guard
+    rejected the query, the reason.
     """
-    print("---EXECUTING INTELLIGENT TOOL EXECUTOR (INFORMATION GATHERING LOOP)---")
-    
-    plan = state.get("plan", [])
-    # The loop should only run if the plan involves KG search.
-    if not plan or "knowledge_graph_search" not in plan[0].lower():
-        print("Plan does not involve knowledge graph search. Passing.")
-        # Handle other tools or return empty if no other logic is needed
-        return {"intermediate_steps": []}
+    try:
+        return execute_guarded_cypher(kg_manager, state["repo_id"], index_revision, cypher_query), None
+    except CypherRejected as e:
+        print(f"Query rejected by the Cypher guard: {e}")
+        return [], str(e)
+    except Exception as e:
+        print(f"Error executing query: {e}")
+        return [], None
 
-    gathered_context = []
-    attempted_queries = []
+
+def _gather_sequentially(state: AgentState, kg_manager, index_revision, deadline: float, gathered_context: list, seen: set, attempted_queries: list, rejections: dict):
     MAX_ATTEMPTS = 3 # A safeguard to prevent runaway loops
 
     for i in range(MAX_ATTEMPTS):
+        if time.monotonic() >= deadline:
+            print("Gathering time budget exhausted. Ending gathering process.")
+            break
         print(f"--- GATHERING ATTEMPT {i + 1}/{MAX_ATTEMPTS} ---")
+        emit_progress("tool_executor", f"Searching the knowledge graph (attempt {i + 1}/{MAX_ATTEMPTS})...")
 
         # 1. Generate a NEW, UNIQUE query.
         # This now passes the list of previous attempts to the generator.
-        cypher_query = generate_cypher_query(state, attempted_queries)
+        cypher_query = generate_cypher_query(state, attempted_queries, rejections)
 
         if not cypher_query or cypher_query in attempted_queries:
             print("Could not generate a new query. Ending gathering process.")
@@ -62,28 +91,104 @@ def tool_executor(state: AgentState) -> dict:
         print(f"Generated Query: {cypher_query}")
         attempted_queries.append(cypher_query)
 
-        # 2. Execute the query against the Knowledge Graph.
-        kg_manager = None
-        try:
-            kg_manager = KnowledgeGraphManager()
-            query_result = kg_manager.execute_cypher_query(cypher_query)
-            kg_manager.close()
-        except Exception as e:
-            print(f"Error executing query: {e}")
-            query_result = []
+        # 2. Execute the query.
+        query_result, rejection = _run_query(kg_manager, state, index_revision, cypher_query)
 
         # 3. Accumulate results and decide whether to continue.
-        if query_result:
-            print(f"Query returned {len(query_result)} results.")
-            gathered_context.extend(query_result)
+        if rejection:
+            # A rejected query says nothing about what's left to find; retry with the feedback.
+            # The generator sees the reason next to the query, so its next attempt can avoid the mistake.
+            rejections[cypher_query] = rejection
+        elif query_result:
+            print(f"Query returned {len(query_result)} results ({_merge_records(gathered_context, seen, query_result)} new).")
         else:
             print("Query returned no new results. Ending gathering process.")
             # Stop if a query returns nothing, as there's likely no more info to find.
             break
+
+
+def _gather_in_parallel(state: AgentState, kg_manager, index_revision, deadline: float, gathered_context: list, seen: set, attempted_queries: list, rejections: dict) -> bool:
+    """
+    Asks the LLM once for several complementary queries and runs them concurrently, so gathering
+    costs about one LLM round trip plus the slowest query instead of one of each per attempt.
+    Returns False when no query could be generated or the guard rejected all of them, leaving
+    the caller to fall back to the sequential loop (which sees the rejections).
+    """
+    count = max(1, current_app.config.get('CYPHER_PARALLEL_QUERIES', 3))
+    emit_progress("tool_executor", f"Searching the knowledge graph ({count} queries in parallel)...")
+    cypher_queries = generate_cypher_queries(state, count, attempted_queries, rejections)
+    if not cypher_queries:
+        print("Could not generate parallel queries.")
+        return False
+
+    for cypher_query in cypher_queries:
+        print(f"Generated Query: {cypher_query}")
+    attempted_queries.extend(cypher_queries)
+
+    app = current_app._get_current_object()
+
+    def run_in_app_context(cypher_query):
+        with app.app_context():
+            return _run_query(kg_manager, state, index_revision, cypher_query)
+
+    executor = ThreadPoolExecutor(max_workers=len(cypher_queries), thread_name_prefix="cypher-gather")
+    try:
+        futures = [executor.submit(run_in_app_context, cypher_query) for cypher_query in cypher_queries]
+        done, not_done = wait(futures, timeout=max(0.0, deadline - time.monotonic()))
+        if not_done:
+            print(f"Gathering time budget exhausted. Dropping {len(not_done)} unfinished queries.")
+        rejected = 0
+        # Merged in generation order, so the context doesn't depend on which query finished first.
+        for cypher_query, future in zip(cypher_queries, futures):
+            if future in done:
+                query_result, rejection = future.result()
+                if rejection:
+                    rejections[cypher_query] = rejection
+                    rejected += 1
+                else:
+                    print(f"Query returned {len(query_result)} results ({_merge_records(gathered_context, seen, query_result)} new).")
+    finally:
+        # Doesn't wait: a query still running in Neo4j is abandoned, its result discarded.
+        executor.shutdown(wait=False, cancel_futures=True)
+    return rejected < len(cypher_queries)
+
+
+def tool_executor(state: AgentState) -> dict:
+    """
+    The intelligent "Agent Kernel". It replaces the simple tool executor
+    with an Information Gathering Loop. It calls the Cypher generator multiple times
+    to build a rich context before handing off to the synthesizer.
+
+    With CYPHER_PARALLEL_GATHERING the queries are generated in one go and run concurrently
+    instead; either way gathering stops at CYPHER_GATHERING_TIME_BUDGET_SECONDS.
+    """
+    print("---EXECUTING INTELLIGENT TOOL EXECUTOR (INFORMATION GATHERING LOOP)---")
+    
+    plan = state.get("plan", [])
+    # The loop should only run if the plan involves KG search.
+    if not plan or "knowledge_graph_search" not in plan[0].lower():
+        print("Plan does not involve knowledge graph search. Passing.")
+        # Handle other tools or return empty if no other logic is needed
+        return {"intermediate_steps": []}
+
+    gathered_context = []
+    seen_records = set()
+    attempted_queries = []
+    rejections = {} # The guard's reason per rejected query; attempted_queries keeps the raw queries for the duplicate checks.
+    deadline = time.monotonic() + current_app.config.get('CYPHER_GATHERING_TIME_BUDGET_SECONDS', 20)
+    kg_manager = KnowledgeGraphManager()
+    # Results are cached per index revision, so repeated lookups skip the database until the next reindex.
+    index_revision = state.get("index_revision") or get_index_revision(state["repo_id"])
+
+    gathered = False
+    if current_app.config.get('CYPHER_PARALLEL_GATHERING', True):
+        gathered = _gather_in_parallel(state, kg_manager, index_revision, deadline, gathered_context, seen_records, attempted_queries, rejections)
+    if not gathered:
+        _gather_sequentially(state, kg_manager, index_revision, deadline, gathered_context, seen_records, attempted_queries, rejections)
     
     # 4. Serialize the final, rich context for the Synthesizer.
     if not gathered_context:
-        final_context_str = "No information was found in the knowledge graph after multiple attempts."
+        final_context_str = NO_GRAPH_CONTEXT
     else:
         final_context_str = json.dumps(gathered_context, indent=2)
 
@@ -0,0 +1,164 @@
+# backend/app/code_parser/models.py
+import sys
+from dataclasses import dataclass, field
+
+
+def _intern_all(names) -> tuple[str, ...]:
+    return tuple(sys.intern(name) for name in names)
+
+
+@dataclass(slots=True)
+class ParsedImport:
+    module: str | None
+    name: str | None = None # Set for `from module import name`
+    asname: str | None = None
+
+    def to_dict(self) -> dict:
+        return {"module": self.module, "name": self.name, "asname": self.asname}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ParsedImport":
+        return cls(
+            module=sys.intern(data["module"]) if data.get("module") else None,
+            name=sys.intern(data["name"]) if data.get("name") else None,
+            asname=sys.intern(data["asname"]) if data.get("asname") else None,
+        )
+
+
+@dataclass(slots=True)
+class ParsedFunction:
+    """
+    A function or method. Its source is not copied: `span` holds (start, end) byte offsets into
+    the file, and ParsedFile.source_of() slices it out on demand.
+    """
+    name: str
+    qualname: str
+    args: tuple[str, ...]
+    docstring: str
+    calls: tuple[str, ...]
+    decorators: tuple[str, ...]
+    is_async: bool
+    start_line: int
+    end_line: int
+    span: tuple[int, int]
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name, "qualname": self.qualname, "args": list(self.args), "docstring": self.docstring,
+            "calls": list(self.calls), "decorators": list(self.decorators), "is_async": self.is_async,
+            "start_line": self.start_line, "end_line": self.end_line, "span": list(self.span),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ParsedFunction":
+        return cls(
+            name=sys.intern(data["name"]),
+            qualname=sys.intern(data["qualname"]),
+            args=_intern_all(data["args"]),
+            docstring=data["docstring"],
+            calls=_intern_all(data["calls"]),
+            decorators=_intern_all(data["decorators"]),
+            is_async=data["is_async"],
+            start_line=data["start_line"],
+            end_line=data["end_line"],
+            span=tuple(data["span"]),
+        )
+
+
+@dataclass(slots=True)
+class ParsedClass:
+    name: str
+    qualname: str
+    docstring: str
+    base_classes: tuple[str, ...]
+    decorators: tuple[str, ...]
+    start_line: int
+    end_line: int
+    methods: list[ParsedFunction] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name, "qualname": self.qualname, "docstring": self.docstring,
+            "base_classes": list(self.base_classes), "decorators": list(self.decorators),
+            "start_line": self.start_line, "end_line": self.end_line,
+            "methods": [method.to_dict() for method in self.methods],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ParsedClass":
+        return cls(
+            name=sys.intern(data["name"]),
+            qualname=sys.intern(data["qualname"]),
+            docstring=data["docstring"],
+            base_classes=_intern_all(data["base_classes"]),
+            decorators=_intern_all(data["decorators"]),
+            start_line=data["start_line"],
+            end_line=data["end_line"],
+            methods=[ParsedFunction.from_dict(method) for method in data["methods"]],
+        )
+
+
+@dataclass(slots=True)
+class ParsedFile:
+    """
+    Everything CodeAnalyzer extracts from one Python file.
+
+    `source` is the file's UTF-8 buffer, shared by every entity's span rather than copied per
+    function. It's optional: ingestion never needs function bodies, so parse workers leave it
+    unset and a caller that does need them can attach the blob's bytes later.
+    """
+    imports: list[ParsedImport] = field(default_factory=list)
+    classes: list[ParsedClass] = field(default_factory=list)
+    functions: list[ParsedFunction] = field(default_factory=list)
+    source: bytes | None = None
+
+    def all_functions(self):
+        """Yields (class or None, function) for every standalone function and method."""
+        for function in self.functions:
+            yield None, function
+        for parsed_class in self.classes:
+            for method in parsed_class.methods:
+                yield parsed_class, method
+
+    def source_of(self, function: ParsedFunction) -> str | None:
+        """The function's source code, or None when no source buffer is attached."""
+        if self.source is None:
+            return None
+        start, end = function.span
+        return self.source[start:end].decode('utf-8', errors='replace')
+
+    def to_dict(self) -> dict:
+        """A JSON-serializable form (without the source buffer), e.g. for the parse cache."""
+        return {
+            "imports": [imp.to_dict() for imp in self.imports],
+            "classes": [parsed_class.to_dict() for parsed_class in self.classes],
+            "functions": [function.to_dict() for function in self.functions],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ParsedFile":
+        return cls(
+            imports=[ParsedImport.from_dict(imp) for imp in data["imports"]],
+            classes=[ParsedClass.from_dict(parsed_class) for parsed_class in data["classes"]],
+            functions=[ParsedFunction.from_dict(function) for function in data["functions"]],
+        )
+
+
+@dataclass(slots=True)
+class FileEdges:
+    """
+    The part of a ParsedFile that relationships are built from: its imports, each class's base
+    classes and each function's calls, without docstrings, spans or arguments. Ingestion keeps
+    one per file until relationships are written, so it stays a small fraction of the ParsedFile.
+    """
+    imports: tuple[ParsedImport, ...]
+    class_bases: tuple[tuple[str, tuple[str, ...]], ...] # (class name, base class names)
+    function_calls: tuple[tuple[str, tuple[str, ...]], ...] # (function or method name, called names)
+
+    @classmethod
+    def from_parsed_file(cls, parsed_file: ParsedFile) -> "FileEdges":
+        return cls(
+            imports=tuple(parsed_file.imports),
+            class_bases=tuple((parsed_class.name, tuple(parsed_class.base_classes)) for parsed_class in parsed_file.classes if parsed_class.base_classes),
+            function_calls=tuple((function.name, tuple(function.calls)) for _, function in parsed_file.all_functions() if function.calls),
+        )
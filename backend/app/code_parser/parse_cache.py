@@ -0,0 +1,40 @@
+# backend/app/code_parser/parse_cache.py
+import json
+import zlib
+from flask import current_app
+from ..utils.sqlite_cache import SQLiteCache
+from .python_parser import ANALYZER_VERSION
+from .models import ParsedFile
+
+
+class ParseCache:
+    """
+    Cache of CodeAnalyzer results keyed by git blob SHA.
+
+    A blob SHA identifies the exact file contents, so a file that is unchanged between syncs,
+    branches or forks is only ever parsed once. Keys also carry ANALYZER_VERSION, so changing the
+    analyzer's output never serves stale results. Values are zlib-compressed JSON in a local SQLite
+    file (PARSE_CACHE_PATH), bounded by PARSE_CACHE_MAX_ENTRIES.
+    """
+    def __init__(self, path: str | None = None, max_entries: int | None = None):
+        self._store = SQLiteCache(
+            path or current_app.config['PARSE_CACHE_PATH'],
+            table="parse_results",
+            max_entries=max_entries if max_entries is not None else current_app.config.get('PARSE_CACHE_MAX_ENTRIES', 0)
+        )
+
+    @staticmethod
+    def _key(blob_sha: str) -> str:
+        return f"v{ANALYZER_VERSION}:{blob_sha}"
+
+    def get_many(self, blob_shas: list[str]) -> dict[str, ParsedFile]:
+        """Returns {blob_sha: ParsedFile} for every cached blob."""
+        keys = {self._key(blob_sha): blob_sha for blob_sha in blob_shas}
+        found = self._store.get_many(list(keys))
+        return {keys[key]: ParsedFile.from_dict(json.loads(zlib.decompress(value))) for key, value in found.items()}
+
+    def set_many(self, parsed_by_blob_sha: dict[str, ParsedFile]):
+        self._store.set_many({
+            self._key(blob_sha): zlib.compress(json.dumps(parsed_data.to_dict(), separators=(',', ':')).encode('utf-8'))
+            for blob_sha, parsed_data in parsed_by_blob_sha.items()
+        })
@@ -2,104 +2,251 @@
 # This is the NEW, SOTA version of backend/app/code_parser/python_parser.py
 #
 import ast
+import multiprocessing
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 from flask import current_app
+from .models import ParsedFile, ParsedClass, ParsedFunction, ParsedImport
 
-class CodeAnalyzer(ast.NodeVisitor):
+# Bump whenever CodeAnalyzer's output changes, so cached parse results (see parse_cache.py) are not reused.
+ANALYZER_VERSION = 4
+
+
+class CodeAnalyzer:
     """
-    An advanced AST visitor to extract detailed information from Python code,
-    including classes, functions, methods, imports, and function calls.
+    Extracts classes, functions, methods, imports, decorators and function calls from Python code
+    in a single iterative traversal of the AST, so analysis is linear in file size.
+
+    Nested and async functions are reported like any other function (with a dotted `qualname`);
+    a call is attributed to the innermost function it appears in. Function bodies are recorded as
+    byte spans into the file buffer (see models.ParsedFile.source_of) rather than copied, and all
+    names are interned, since the same identifiers repeat across thousands of files.
     """
-    def __init__(self, source_code: str):
+    def __init__(self, source_code: str, keep_source: bool = True):
         self.source_code = source_code
+        self.keep_source = keep_source
         self.imports = []
         self.classes = {}
         self.functions = []
-        self.current_class = None
-
-    def visit_Import(self, node: ast.Import):
-        for alias in node.names:
-            self.imports.append({"module": alias.name, "asname": alias.asname})
-        self.generic_visit(node)
-
-    def visit_ImportFrom(self, node: ast.ImportFrom):
-        for alias in node.names:
-            self.imports.append({"module": node.module, "name": alias.name, "asname": alias.asname})
-        self.generic_visit(node)
-
-    def visit_ClassDef(self, node: ast.ClassDef):
-        self.current_class = node.name
-        self.classes[node.name] = {
-            "name": node.name,
-            "methods": [],
-            "docstring": ast.get_docstring(node) or "",
-            "base_classes": [base.id for base in node.bases if isinstance(base, ast.Name)]
-        }
-        self.generic_visit(node)
-        self.current_class = None
-
-    def visit_FunctionDef(self, node: ast.FunctionDef):
-        function_info = {
-            "name": node.name,
-            "args": [arg.arg for arg in node.args.args],
-            "docstring": ast.get_docstring(node) or "",
-            "source_code": self._get_source_segment(node),
-            "calls": self._find_calls(node)
-        }
-        
-        if self.current_class:
+        self._calls = [] # (ParsedFunction, ordered set of called names), finalized at the end
+        self._source_bytes = source_code.encode('utf-8')
+        self._line_offsets = self._compute_line_offsets()
+
+    def _compute_line_offsets(self) -> list[int]:
+        """
+        Byte offset of the start of every line. AST column offsets are UTF-8 byte offsets too.
+        Like the tokenizer, bytes.splitlines ends a line at LF, CRLF or a lone CR.
+        """
+        offsets = [0]
+        for line in self._source_bytes.splitlines(keepends=True):
+            offsets.append(offsets[-1] + len(line))
+        return offsets
+
+    def _get_span(self, node) -> tuple[int, int]:
+        """(start, end) byte offsets of a node in the file buffer."""
+        return (self._line_offsets[node.lineno - 1] + node.col_offset,
+                self._line_offsets[node.end_lineno - 1] + node.end_col_offset)
+
+    @staticmethod
+    def _expression_name(node) -> str:
+        """'name', 'module.name' or, for anything more complex, the unparsed expression."""
+        if isinstance(node, ast.Call):
+            node = node.func
+        parts = []
+        while isinstance(node, ast.Attribute):
+            parts.append(node.attr)
+            node = node.value
+        if isinstance(node, ast.Name):
+            parts.append(node.id)
+            return '.'.join(reversed(parts))
+        return ast.unparse(node)
+
+    @staticmethod
+    def _qualname(name: str, parent_function: ParsedFunction | None, parent_class: ParsedClass | None) -> str:
+        parent = parent_class or parent_function
+        return sys.intern(f"{parent.qualname}.{name}" if parent else name)
+
+    @staticmethod
+    def _push(stack: list, nodes, function, calls, parent_class):
+        # Reversed, so nodes are popped (and reported) in source order.
+        for node in reversed(nodes):
+            if node is not None:
+                stack.append((node, function, calls, parent_class))
+
+    def _add_function(self, node, parent_function: ParsedFunction | None, parent_class: ParsedClass | None) -> tuple[ParsedFunction, dict]:
+        function = ParsedFunction(
+            name=sys.intern(node.name),
+            qualname=self._qualname(node.name, parent_function, parent_class),
+            args=tuple(sys.intern(arg.arg) for arg in node.args.args),
+            docstring=ast.get_docstring(node) or "",
+            calls=(),
+            decorators=tuple(sys.intern(self._expression_name(decorator)) for decorator in node.decorator_list),
+            is_async=isinstance(node, ast.AsyncFunctionDef),
+            start_line=node.lineno,
+            end_line=node.end_lineno,
+            span=self._get_span(node),
+        )
+        if parent_class is not None:
             # This is a method within a class
-            self.classes[self.current_class]["methods"].append(function_info)
+            parent_class.methods.append(function)
         else:
-            # This is a standalone function
-            self.functions.append(function_info)
-            
-        # We don't call generic_visit here to avoid visiting nested functions twice
-        # The _find_calls method already traverses the function's body.
-
-    def _find_calls(self, node: ast.FunctionDef) -> list[str]:
-        """Find all function calls within a given function definition node."""
-        calls = []
-        for sub_node in ast.walk(node):
-            if isinstance(sub_node, ast.Call):
-                if isinstance(sub_node.func, ast.Name):
-                    calls.append(sub_node.func.id)
-                elif isinstance(sub_node.func, ast.Attribute):
-                    # This captures method calls like `self.connect()` or `socket.socket()`
-                    # We can refine this further later if needed
-                    calls.append(sub_node.func.attr)
-        return list(set(calls)) # Return unique calls
-
-    def _get_source_segment(self, node) -> str:
-        """Safely get the source code segment for a node."""
-        try:
-            return ast.get_source_segment(self.source_code, node)
-        except Exception:
-            return f"# Could not extract source code for {getattr(node, 'name', 'node')}."
-
-    def analyze(self) -> dict:
+            # This is a standalone (possibly nested) function
+            self.functions.append(function)
+        calls = {}
+        self._calls.append((function, calls))
+        return function, calls
+
+    def _add_class(self, node: ast.ClassDef, parent_function: ParsedFunction | None, parent_class: ParsedClass | None) -> ParsedClass:
+        parsed_class = ParsedClass(
+            name=sys.intern(node.name),
+            qualname=self._qualname(node.name, parent_function, parent_class),
+            docstring=ast.get_docstring(node) or "",
+            base_classes=tuple(sys.intern(base.id if isinstance(base, ast.Name) else base.attr)
+                               for base in node.bases if isinstance(base, (ast.Name, ast.Attribute))),
+            decorators=tuple(sys.intern(self._expression_name(decorator)) for decorator in node.decorator_list),
+            start_line=node.lineno,
+            end_line=node.end_lineno,
+        )
+        self.classes[parsed_class.qualname] = parsed_class
+        return parsed_class
+
+    def analyze(self) -> ParsedFile:
         """Run the analysis and return the structured data."""
-        self.visit(ast.parse(self.source_code))
-        return {
-            "imports": self.imports,
-            "classes": list(self.classes.values()),
-            "functions": self.functions
-        }
-
-def parse_python_file(file_content: str) -> dict | None:
+        tree = ast.parse(self.source_code)
+        # (node, innermost enclosing function, that function's calls, class whose body directly contains the node)
+        stack = []
+        self._push(stack, tree.body, None, None, None)
+        while stack:
+            node, function, calls, parent_class = stack.pop()
+
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                # Decorators, defaults and annotations run in the enclosing scope.
+                self._push(stack, [*node.decorator_list, node.args, node.returns], function, calls, parent_class)
+                inner_function, inner_calls = self._add_function(node, function, parent_class)
+                self._push(stack, node.body, inner_function, inner_calls, None)
+            elif isinstance(node, ast.ClassDef):
+                self._push(stack, [*node.decorator_list, *node.bases, *node.keywords], function, calls, parent_class)
+                self._push(stack, node.body, None, None, self._add_class(node, function, parent_class))
+            else:
+                if isinstance(node, ast.Call) and calls is not None:
+                    if isinstance(node.func, ast.Name):
+                        calls[node.func.id] = None
+                    elif isinstance(node.func, ast.Attribute):
+                        # This captures method calls like `self.connect()` or `socket.socket()`
+                        calls[node.func.attr] = None
+                elif isinstance(node, ast.Import):
+                    for alias in node.names:
+                        self.imports.append(ParsedImport.from_dict({"module": alias.name, "asname": alias.asname}))
+                elif isinstance(node, ast.ImportFrom):
+                    for alias in node.names:
+                        self.imports.append(ParsedImport.from_dict({"module": node.module, "name": alias.name, "asname": alias.asname}))
+                self._push(stack, list(ast.iter_child_nodes(node)), function, calls, parent_class)
+
+        for function, calls in self._calls:
+            function.calls = tuple(sys.intern(name) for name in calls)
+        return ParsedFile(
+            imports=self.imports,
+            classes=list(self.classes.values()),
+            functions=self.functions,
+            source=self._source_bytes if self.keep_source else None
+        )
+
+def parse_python_file(file_content: str, keep_source: bool = True) -> ParsedFile | None:
     """
 
     Parses the content of a Python file using the advanced CodeAnalyzer.
     
-    Returns a rich dictionary containing imports, classes (with their methods),
+    Returns a ParsedFile containing imports, classes (with their methods),
     standalone functions, and the calls made within each function/method.
+    With `keep_source=False` the file buffer isn't retained, so function sources can't be sliced out.
     """
     try:
         # We use the CodeAnalyzer class to perform the deep analysis
-        analyzer = CodeAnalyzer(file_content)
+        analyzer = CodeAnalyzer(file_content, keep_source=keep_source)
         return analyzer.analyze()
     except SyntaxError as e:
         current_app.logger.warning(f"Could not parse Python file due to SyntaxError: {e}")
         return None
     except Exception as e:
         current_app.logger.error(f"An unexpected error occurred during parsing: {e}", exc_info=True)
-        return None
\ No newline at end of file
+        return None
+
+
+def _parse_in_worker(item: tuple[str, str]) -> tuple[str, ParsedFile | None, str | None]:
+    """
+    Process-pool entry point. Worker processes have no Flask app context, so instead of
+    logging, failures are returned to the parent as an error string. The file buffer is not
+    kept, so it isn't pickled back to the parent.
+    """
+    file_path, file_content = item
+    try:
+        return file_path, CodeAnalyzer(file_content, keep_source=False).analyze(), None
+    except SyntaxError as e:
+        return file_path, None, f"SyntaxError: {e}"
+    except Exception as e:
+        return file_path, None, f"{type(e).__name__}: {e}"
+
+
+class ParserPool:
+    """
+    A process pool for parsing, kept open across calls so an ingestion task that parses its files
+    batch by batch starts its worker processes once. Use it as a context manager.
+
+    Parses in-process when `max_workers <= 1`, when running inside a daemonic process (a Celery
+    prefork child can't have children of its own: the pool would only fail once work is
+    submitted to it) or when no pool can be started.
+    """
+    def __init__(self, max_workers: int, chunk_size: int = 64):
+        self.max_workers = max(1, max_workers)
+        self.chunk_size = max(1, chunk_size)
+        self._executor = None
+        if max_workers > 1 and multiprocessing.current_process().daemon:
+            current_app.logger.info("Parser is running in a daemonic process, which can't start a process pool. Parsing serially.")
+        elif max_workers > 1:
+            try:
+                self._executor = ProcessPoolExecutor(max_workers=max_workers)
+            except (OSError, ValueError, AssertionError) as e:
+                current_app.logger.warning(f"Could not start parser process pool ({e}). Parsing serially.")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def parse(self, files):
+        """
+        Parses an iterable of (file_path, file_content) pairs. Contents are pulled from `files`
+        lazily, `chunk_size * max_workers` at a time, so the caller can stream them from disk
+        without loading the whole repository. Yields (file_path, ParsedFile | None, error | None)
+        tuples in input order.
+        """
+        files = iter(files)
+        if self._executor is None:
+            for item in files:
+                yield _parse_in_worker(item)
+            return
+
+        window = self.chunk_size * self.max_workers
+        while True:
+            batch = list(islice(files, window))
+            if not batch:
+                break
+            yield from self._executor.map(_parse_in_worker, batch, chunksize=self.chunk_size)
+
+
+def parse_python_files_in_parallel(files, max_workers: int, chunk_size: int = 64):
+    """
+    Parses an iterable of (file_path, file_content) pairs on a process pool started for this
+    call; see ParserPool, which callers parsing several batches should hold on to instead.
+    Yields (file_path, ParsedFile | None, error | None) tuples in input order.
+    """
+    with ParserPool(max_workers, chunk_size) as pool:
+        yield from pool.parse(files)
@@ -0,0 +1,93 @@
+# backend/app/code_parser/symbol_table.py
+from collections import defaultdict
+from .models import ParsedFile, ParsedImport
+
+
+def module_names_for_path(file_path: str) -> list[str]:
+    """
+    Every dotted module name a repo file could be imported as: its full dotted path plus each
+    suffix of it, since we can't know which directory is on sys.path
+    (e.g. 'src/pkg/mod.py' -> ['src.pkg.mod', 'pkg.mod', 'mod'], 'pkg/__init__.py' -> ['pkg']).
+    """
+    if not file_path.endswith('.py'):
+        return []
+    parts = file_path[:-3].split('/')
+    if parts[-1] == '__init__':
+        parts = parts[:-1]
+    return ['.'.join(parts[i:]) for i in range(len(parts))]
+
+
+class SymbolTable:
+    """
+    An in-process index of the functions, methods and classes of one data source, used to
+    resolve CALLS and INHERITS_FROM targets before anything is written to Neo4j.
+
+    Calls are recorded by bare name (`self.save()` -> 'save'), so a name is resolved to the
+    files defining it, preferring, in order:
+      1. a definition in the calling file itself;
+      2. the target of a `from module import name [as alias]` in the calling file;
+      3. definitions in repo modules the calling file imports;
+      4. every definition of that name in the repository.
+    Names defined nowhere in the repository (builtins, library calls) resolve to nothing and
+    are dropped instead of becoming a MATCH that finds no node. Ingestion records the dropped
+    names of each file on its File node (`unresolved_names`), so that an incremental sync that
+    adds a definition of one of them can re-link the file.
+    """
+    def __init__(self):
+        self._definitions = {"function": defaultdict(set), "class": defaultdict(set)} # kind -> name -> {file_path}
+        self._module_files = defaultdict(set) # dotted module name -> {file_path}
+
+    def add_file(self, file_path: str):
+        for module_name in module_names_for_path(file_path):
+            self._module_files[module_name].add(file_path)
+
+    def add_definition(self, kind: str, name: str, file_path: str):
+        """`kind` is 'function' (functions and methods) or 'class'."""
+        self._definitions[kind][name].add(file_path)
+
+    def add_parsed_file(self, file_path: str, parsed_file: ParsedFile):
+        self.add_file(file_path)
+        for parsed_class in parsed_file.classes:
+            self.add_definition("class", parsed_class.name, file_path)
+        for _, function in parsed_file.all_functions():
+            self.add_definition("function", function.name, file_path)
+
+    @classmethod
+    def from_parsed_files(cls, parsed_files: dict[str, ParsedFile]) -> "SymbolTable":
+        table = cls()
+        for file_path, parsed_file in parsed_files.items():
+            table.add_parsed_file(file_path, parsed_file)
+        return table
+
+    def _imported_files(self, imports: list[ParsedImport]) -> set:
+        files = set()
+        for imp in imports:
+            if imp.module:
+                files |= self._module_files.get(imp.module, set())
+        return files
+
+    def _resolve(self, kind: str, file_path: str, name: str, imports: list[ParsedImport]) -> list[tuple[str, str]]:
+        definitions = self._definitions[kind]
+
+        if file_path in definitions.get(name, ()):
+            return [(name, file_path)]
+
+        for imp in imports:
+            if imp.name and (imp.asname or imp.name) == name and imp.module:
+                targets = self._module_files.get(imp.module, set()) & definitions.get(imp.name, set())
+                if targets:
+                    return [(imp.name, target) for target in sorted(targets)]
+
+        candidates = definitions.get(name)
+        if not candidates:
+            return []
+        imported = candidates & self._imported_files(imports)
+        return [(name, target) for target in sorted(imported or candidates)]
+
+    def resolve_call(self, file_path: str, callee_name: str, imports: list[ParsedImport]) -> list[tuple[str, str]]:
+        """Returns the (function_name, file_path) pairs a call to `callee_name` from `file_path` may reach."""
+        return self._resolve("function", file_path, callee_name, imports)
+
+    def resolve_class(self, file_path: str, class_name: str, imports: list[ParsedImport]) -> list[tuple[str, str]]:
+        """Returns the (class_name, file_path) pairs a base class name used in `file_path` may refer to."""
+        return self._resolve("class", file_path, class_name, imports)
@@ -0,0 +1,199 @@
+# backend/app/knowledge_graph/cypher_guard.py
+import re
+from flask import current_app
+from .query_cache import execute_cached_cypher
+
+# String literals and backtick-quoted names are blanked out before the clause checks, so that
+# e.g. a function named 'create_user' doesn't read as a CREATE clause.
+_QUOTED = re.compile(r"""'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*"|`[^`]*`""")
+_LINE_COMMENT = re.compile(r"//[^\n]*")
+_WRITE_CLAUSE = re.compile(r"\b(CREATE|MERGE|DELETE|DETACH|SET|REMOVE|DROP|FOREACH|LOAD\s+CSV|CALL)\b", re.IGNORECASE)
+# The range of a variable-length relationship: `*`, `*3`, `*1..3`, `*..3`, `*2..`.
+_VARIABLE_LENGTH = re.compile(r"\[[^\]]*\*\s*(\d+)?\s*(\.\.\s*(\d+)?)?\s*\]")
+_LIMIT = re.compile(r"\bLIMIT\b", re.IGNORECASE)
+_RETURN = re.compile(r"\bRETURN\b", re.IGNORECASE)
+_UNION = re.compile(r"\bUNION\b", re.IGNORECASE)
+# Stands in for this data source's id wherever the query quotes it, so the tenancy check can match it in the bare query.
+_DATA_SOURCE_ID = "__data_source_id__"
+# The pattern of a MATCH / OPTIONAL MATCH clause, up to the next clause.
+_MATCH_PATTERN = re.compile(
+    r"\bMATCH\b(.*?)(?=\b(?:WHERE|RETURN|WITH|UNWIND|ORDER|SKIP|LIMIT|UNION|MATCH|OPTIONAL)\b|$)",
+    re.IGNORECASE | re.DOTALL,
+)
+# A node pattern: (variable:Label {properties}), every part optional.
+_NODE_PATTERN = re.compile(r"\(\s*([A-Za-z_]\w*)?\s*((?::\s*[\w|&!]+\s*)*)(\{[^{}]*\})?\s*\)")
+_INLINE_FILTER = re.compile(rf"\bdataSourceId\s*:\s*{_DATA_SOURCE_ID}\b")
+# The predicate of a WHERE clause, up to the next clause (a WITH that isn't part of STARTS WITH / ENDS WITH).
+_WHERE_CLAUSE = re.compile(
+    r"\bWHERE\b(.*?)(?=\b(?:RETURN|(?<!STARTS\s)(?<!ENDS\s)WITH|UNWIND|ORDER|SKIP|LIMIT|UNION|MATCH|OPTIONAL)\b|$)",
+    re.IGNORECASE | re.DOTALL,
+)
+_AND = re.compile(r"\bAND\b", re.IGNORECASE)
+_OR = re.compile(r"\b(?:OR|XOR)\b", re.IGNORECASE)
+
+
+class CypherRejected(ValueError):
+    """A generated query the guard refused to run. The message says why, for feeding back to the generator."""
+
+
+def _strip_literals(cypher_query: str, data_source_id: str) -> str:
+    def blank(match):
+        return _DATA_SOURCE_ID if match.group(0)[0] in "'\"" and match.group(0)[1:-1] == data_source_id else "''"
+    return _LINE_COMMENT.sub(" ", _QUOTED.sub(blank, cypher_query))
+
+
+def _split_paths(pattern: str) -> list[str]:
+    """Splits a MATCH pattern into its comma-separated paths, ignoring commas inside (), [] and {}."""
+    paths, depth, start = [], 0, 0
+    for index, char in enumerate(pattern):
+        if char in "([{":
+            depth += 1
+        elif char in ")]}":
+            depth -= 1
+        elif char == "," and depth == 0:
+            paths.append(pattern[start:index])
+            start = index + 1
+    paths.append(pattern[start:])
+    return paths
+
+
+def _top_level(text: str) -> str:
+    """`text` with everything inside (), [] and {} blanked out, keeping every other character at its offset."""
+    chars, depth = [], 0
+    for char in text:
+        if char in "([{":
+            depth += 1
+        top = depth == 0
+        if char in ")]}":
+            depth = max(depth - 1, 0)
+        chars.append(char if top else " ")
+    return "".join(chars)
+
+
+def _conjuncts(predicate: str) -> list[str]:
+    """
+    The top-level AND operands of a WHERE predicate, unwrapping enclosing parentheses. A predicate
+    with a top-level OR or XOR has none: no single operand of it has to hold.
+    """
+    predicate = predicate.strip()
+    top = _top_level(predicate)
+    if predicate.startswith("(") and predicate.endswith(")") and not top.strip():
+        return _conjuncts(predicate[1:-1])
+    if _OR.search(top):
+        return []
+    bounds = [0] + [offset for match in _AND.finditer(top) for offset in match.span()] + [len(predicate)]
+    if len(bounds) == 2:
+        return [predicate]
+    return [conjunct for start, end in zip(bounds[::2], bounds[1::2]) for conjunct in _conjuncts(predicate[start:end])]
+
+
+def _check_tenancy(data_source_id: str, bare: str):
+    """
+    Every node variable bound in a MATCH must be filtered by this data source, inline
+    (`{dataSourceId: '<id>'}`, on any of its occurrences) or with `WHERE v.dataSourceId = '<id>'`
+    as a top-level conjunct of a WHERE clause (not e.g. one side of an OR).
+    An anonymous node is let through on a path that has a filtered node: relationships never
+    connect two data sources.
+    """
+    rejection = CypherRejected(f"Every node must be filtered by dataSourceId: '{data_source_id}'.")
+    paths = [path for match in _MATCH_PATTERN.finditer(bare) for path in _split_paths(match.group(1))]
+    nodes_per_path = [[(node.group(1), bool(node.group(3) and _INLINE_FILTER.search(node.group(3)))) for node in _NODE_PATTERN.finditer(path)] for path in paths]
+    if not any(nodes_per_path):
+        raise rejection
+
+    filtered = {variable for nodes in nodes_per_path for variable, inline in nodes if variable and inline}
+    top = _top_level(bare)
+    conjuncts = [conjunct for clause in _WHERE_CLAUSE.finditer(top) for conjunct in _conjuncts(bare[clause.start(1):clause.end(1)])]
+    for variable in {variable for nodes in nodes_per_path for variable, _ in nodes if variable} - filtered:
+        predicate = rf"{variable}\.dataSourceId\s*=\s*{_DATA_SOURCE_ID}|{_DATA_SOURCE_ID}\s*=\s*{variable}\.dataSourceId"
+        if any(re.fullmatch(predicate, conjunct) for conjunct in conjuncts):
+            filtered.add(variable)
+        else:
+            raise CypherRejected(f"Node `{variable}` must be filtered by dataSourceId: '{data_source_id}'.")
+    for nodes in nodes_per_path:
+        if any(not variable and not inline for variable, inline in nodes) and not any(inline or variable in filtered for variable, inline in nodes):
+            raise rejection
+
+
+def _plan_operators(plan: dict):
+    """Yields every operator type in an EXPLAIN plan, without the '@neo4j' runtime suffix."""
+    stack = [plan]
+    while stack:
+        node = stack.pop()
+        operator = node.get("operatorType")
+        if operator:
+            yield operator.split("@")[0]
+        stack.extend(node.get("children") or [])
+
+
+def check_cypher(data_source_id: str, cypher_query: str) -> str:
+    """
+    The static half of the guard. Rejects write clauses and procedure calls, unbounded (or longer
+    than CYPHER_GUARD_MAX_PATH_LENGTH hops) variable-length paths and queries that don't filter by
+    this data source's dataSourceId. Returns the query to run: a query without a LIMIT on its final
+    RETURN gets
+    CYPHER_GUARD_DEFAULT_LIMIT appended, and a UNION is wrapped as `CALL { ... } RETURN * LIMIT n`
+    so that the limit applies to all of its branches, not just the last one.
+    """
+    cypher_query = cypher_query.strip().rstrip(";").strip()
+    bare = _strip_literals(cypher_query, data_source_id)
+
+    write_clause = _WRITE_CLAUSE.search(bare)
+    if write_clause:
+        raise CypherRejected(f"'{write_clause.group(1).upper()}' is not allowed; queries must be read-only MATCH ... RETURN.")
+
+    max_hops = current_app.config.get('CYPHER_GUARD_MAX_PATH_LENGTH', 5)
+    for path in _VARIABLE_LENGTH.finditer(bare):
+        lower, has_range, upper = path.group(1), path.group(2), path.group(3)
+        hops = int(upper) if upper else (int(lower) if lower and not has_range else None)
+        if hops is None or hops > max_hops:
+            raise CypherRejected(f"Variable-length paths need an upper bound of at most {max_hops} hops, e.g. [:CALLS*1..{min(3, max_hops)}].")
+
+    _check_tenancy(data_source_id, bare)
+
+    default_limit = current_app.config.get('CYPHER_GUARD_DEFAULT_LIMIT', 200)
+    if _UNION.search(bare):
+        # Checked above, so the CALL of the wrapper is the only one in the query.
+        cypher_query = f"CALL {{\n{cypher_query}\n}}\nRETURN *\nLIMIT {default_limit}"
+    else:
+        # Only a LIMIT after the final RETURN bounds the result; one in a WITH or a subquery doesn't.
+        top = _top_level(bare)
+        returns = list(_RETURN.finditer(top))
+        if not returns or not _LIMIT.search(top, returns[-1].end()):
+            cypher_query = f"{cypher_query}\nLIMIT {default_limit}"
+    return cypher_query
+
+
+def explain_cypher(kg_manager, cypher_query: str):
+    """
+    The planner half of the guard: EXPLAINs the query and rejects it if it doesn't compile or its
+    plan contains one of CYPHER_GUARD_FORBIDDEN_OPERATORS (by default a scan of every node in the
+    database or a cartesian product).
+    """
+    try:
+        plan = kg_manager.explain_cypher_query(cypher_query)
+    except Exception as e:
+        raise CypherRejected(f"Neo4j could not plan the query: {e}") from e
+    forbidden = set(current_app.config.get('CYPHER_GUARD_FORBIDDEN_OPERATORS', ("AllNodesScan", "CartesianProduct")))
+    found = sorted(forbidden.intersection(_plan_operators(plan)))
+    if found:
+        raise CypherRejected(f"The query plan uses {', '.join(found)}; match nodes by label and key properties and connect every pattern.")
+
+
+def execute_guarded_cypher(kg_manager, data_source_id: str, revision: str | None, cypher_query: str) -> list[dict]:
+    """
+    Runs an LLM-generated query through the guard, then through execute_cached_cypher. Raises
+    CypherRejected instead of running a query the guard refuses. The EXPLAIN round trip is only
+    paid on a cache miss: cached results come from queries that already passed it. With
+    CYPHER_GUARD_ENABLED off, queries run unchecked (they still get the server-side timeout).
+    """
+    if not current_app.config.get('CYPHER_GUARD_ENABLED', True):
+        return execute_cached_cypher(kg_manager, data_source_id, revision, cypher_query)
+
+    cypher_query = check_cypher(data_source_id, cypher_query)
+
+    def explain_and_execute(query):
+        explain_cypher(kg_manager, query)
+        return kg_manager.execute_cypher_query(query)
+
+    return execute_cached_cypher(kg_manager, data_source_id, revision, cypher_query, execute=explain_and_execute)
@@ -1,12 +1,16 @@
 # backend/app/knowledge_graph/kg_manager.py
 
-from neo4j import GraphDatabase
+import os
+from neo4j import Query, READ_ACCESS
+from neo4j.exceptions import ClientError
 from flask import current_app
 from langchain_community.graphs import Neo4jGraph
 from langchain.chains import GraphCypherQAChain
 from langchain_google_genai import ChatGoogleGenerativeAI
 # NEW: Import for building custom prompts
 from langchain.prompts import PromptTemplate
+from .neo4j_driver import get_driver, get_graph
+from ..utils.ingestion_metrics import track_call
 
 # NEW: A more advanced prompt that tells the LLM how to use our specific dataSourceId
 CYPHER_GENERATION_TEMPLATE = """
@@ -39,27 +43,283 @@ Cypher Query:
 CYPHER_GENERATION_PROMPT = PromptTemplate(
     input_variables=["schema", "question", "data_source_id"], template=CYPHER_GENERATION_TEMPLATE
 )
+
+# Parameterized UNWIND statements used by GraphBatchWriter, one per record kind.
+# The order of this dict is the flush order: every statement only MATCHes nodes
+# created by statements earlier in the list.
+BATCH_WRITE_QUERIES = {
+    "directories": (
+        "UNWIND $rows AS row "
+        "MERGE (d:Directory {path: row.path, dataSourceId: row.data_source_id}) "
+        "ON CREATE SET d.summary = ''"
+    ),
+    "files": (
+        "UNWIND $rows AS row "
+        "MERGE (f:File {path: row.path, dataSourceId: row.data_source_id}) "
+        "ON CREATE SET f.summary = ''"
+    ),
+    "directory_links": (
+        "UNWIND $rows AS row "
+        "MATCH (parent:Directory {path: row.parent_path, dataSourceId: row.data_source_id}) "
+        "MATCH (child:Directory {path: row.child_path, dataSourceId: row.data_source_id}) "
+        "MERGE (parent)-[:CONTAINS]->(child)"
+    ),
+    "file_links": (
+        "UNWIND $rows AS row "
+        "MATCH (parent:Directory {path: row.parent_path, dataSourceId: row.data_source_id}) "
+        "MATCH (child:File {path: row.child_path, dataSourceId: row.data_source_id}) "
+        "MERGE (parent)-[:CONTAINS]->(child)"
+    ),
+    "classes": (
+        "UNWIND $rows AS row "
+        "MERGE (file:File {path: row.file_path, dataSourceId: row.data_source_id}) "
+        "MERGE (class:Class {name: row.class_name, file_path: row.file_path, dataSourceId: row.data_source_id}) "
+        "ON CREATE SET class.summary = row.docstring "
+        "MERGE (file)-[:DEFINES_CLASS]->(class)"
+    ),
+    "methods": (
+        "UNWIND $rows AS row "
+        "MATCH (class:Class {name: row.class_name, file_path: row.file_path, dataSourceId: row.data_source_id}) "
+        "MERGE (func:Function {name: row.function_name, file_path: row.file_path, dataSourceId: row.data_source_id}) "
+        "ON CREATE SET func.summary = row.docstring "
+        "MERGE (class)-[:HAS_METHOD]->(func)"
+    ),
+    "functions": (
+        "UNWIND $rows AS row "
+        "MATCH (file:File {path: row.file_path, dataSourceId: row.data_source_id}) "
+        "MERGE (func:Function {name: row.function_name, file_path: row.file_path, dataSourceId: row.data_source_id}) "
+        "ON CREATE SET func.summary = row.docstring "
+        "MERGE (file)-[:DEFINES_FUNCTION]->(func)"
+    ),
+    # Edges already resolved in-process (see code_parser.symbol_table): both ends are matched by their full key.
+    "resolved_inheritance": (
+        "UNWIND $rows AS row "
+        "MATCH (class:Class {name: row.class_name, file_path: row.file_path, dataSourceId: row.data_source_id}) "
+        "MATCH (base_class:Class {name: row.base_name, file_path: row.base_file, dataSourceId: row.data_source_id}) "
+        "MERGE (class)-[:INHERITS_FROM]->(base_class)"
+    ),
+    "resolved_calls": (
+        "UNWIND $rows AS row "
+        "MATCH (caller:Function {name: row.caller_name, file_path: row.caller_file, dataSourceId: row.data_source_id}) "
+        "MATCH (callee:Function {name: row.callee_name, file_path: row.callee_file, dataSourceId: row.data_source_id}) "
+        "MERGE (caller)-[:CALLS]->(callee)"
+    ),
+    "imports": (
+        "UNWIND $rows AS row "
+        "MERGE (file:File {path: row.file_path, dataSourceId: row.data_source_id}) "
+        "MERGE (mod:Module {name: row.import_name}) " # Modules are global, not tied to a data source
+        "MERGE (file)-[:IMPORTS]->(mod)"
+    ),
+    # The call and base class names of a file that resolved to nothing in the repository when it was last linked.
+    "unresolved_names": (
+        "UNWIND $rows AS row "
+        "MATCH (file:File {path: row.file_path, dataSourceId: row.data_source_id}) "
+        "SET file.unresolved_names = row.names"
+    ),
+}
+
+
+# Constraints and indexes backing the lookups above: (label, properties) per name.
+# Node keys (Enterprise) also guarantee the properties exist; Community falls back to a composite uniqueness constraint.
+SCHEMA_CONSTRAINTS = {
+    "kg_directory_key": ("Directory", ("path", "dataSourceId")),
+    "kg_file_key": ("File", ("path", "dataSourceId")),
+    "kg_class_key": ("Class", ("name", "file_path", "dataSourceId")),
+    "kg_function_key": ("Function", ("name", "file_path", "dataSourceId")),
+}
+# Lookups that don't use a full key, e.g. generated chat queries matching a function or class by name alone.
+SCHEMA_INDEXES = {
+    "kg_function_name": ("Function", ("name", "dataSourceId")),
+    "kg_class_name": ("Class", ("name", "dataSourceId")),
+    "kg_module_name": ("Module", ("name",)),
+}
+
+# Pids of the processes that have already run ensure_schema(); it only needs to happen once per process.
+_schema_ensured_pids = set()
+
+
+def _property_list(variable: str, properties: tuple) -> str:
+    return "(" + ", ".join(f"{variable}.{prop}" for prop in properties) + ")"
+
+
+class GraphBatchWriter:
+    """
+    Buffers graph writes and flushes them as parameterized `UNWIND $rows` statements.
+
+    Exposes the same `add_*` / `link_*` methods as KnowledgeGraphManager, so ingestion code can
+    write through either one. Once any buffer reaches `batch_size` rows, every buffer is flushed in
+    BATCH_WRITE_QUERIES order inside a single write transaction, which keeps nodes ahead of the
+    relationships that MATCH them. Use it as a context manager so the tail is flushed on exit.
+    """
+    def __init__(self, driver, batch_size: int):
+        self._driver = driver
+        self.batch_size = max(1, batch_size)
+        self._buffers = {kind: [] for kind in BATCH_WRITE_QUERIES}
+        self.rows_written = 0
+        self.transactions = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.flush()
+        return False
+
+    def _buffer(self, kind: str, row: dict):
+        self._buffers[kind].append(row)
+        if len(self._buffers[kind]) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Writes every buffered row. Each kind is chunked to `batch_size` rows per statement."""
+        pending = {kind: rows for kind, rows in self._buffers.items() if rows}
+        if not pending:
+            return
+
+        def _write(tx):
+            for kind, rows in pending.items():
+                for i in range(0, len(rows), self.batch_size):
+                    tx.run(BATCH_WRITE_QUERIES[kind], rows=rows[i : i + self.batch_size]).consume()
+
+        with track_call("neo4j"), self._driver.session() as session:
+            session.execute_write(_write)
+
+        flushed = sum(len(rows) for rows in pending.values())
+        self.rows_written += flushed
+        self.transactions += 1
+        self._buffers = {kind: [] for kind in BATCH_WRITE_QUERIES}
+        current_app.logger.debug(f"KG: Flushed {flushed} buffered rows ({', '.join(f'{k}={len(v)}' for k, v in pending.items())}).")
+
+    def add_directory_node(self, data_source_id: str, directory_path: str):
+        self._buffer("directories", {"data_source_id": data_source_id, "path": directory_path})
+
+    def add_file_node(self, data_source_id: str, file_path: str):
+        self._buffer("files", {"data_source_id": data_source_id, "path": file_path})
+
+    def link_directory_to_child(self, data_source_id: str, parent_dir_path: str, child_path: str, child_type: str):
+        if child_type not in ["File", "Directory"]:
+            current_app.logger.error(f"KG: Invalid child_type '{child_type}' for linking. Must be 'File' or 'Directory'.")
+            return
+        kind = "file_links" if child_type == "File" else "directory_links"
+        self._buffer(kind, {"data_source_id": data_source_id, "parent_path": parent_dir_path, "child_path": child_path})
+
+    def add_class_node(self, data_source_id: str, file_path: str, class_name: str, docstring: str):
+        self._buffer("classes", {"data_source_id": data_source_id, "file_path": file_path, "class_name": class_name, "docstring": docstring})
+
+    def add_function_node(self, data_source_id: str, file_path: str, function_name: str, docstring: str, class_name: str | None = None):
+        row = {"data_source_id": data_source_id, "file_path": file_path, "function_name": function_name, "docstring": docstring}
+        if class_name:
+            row["class_name"] = class_name
+            self._buffer("methods", row)
+        else:
+            self._buffer("functions", row)
+
+    def add_resolved_inheritance(self, data_source_id: str, file_path: str, class_name: str, base_name: str, base_file: str):
+        self._buffer("resolved_inheritance", {"data_source_id": data_source_id, "file_path": file_path, "class_name": class_name, "base_name": base_name, "base_file": base_file})
+
+    def add_resolved_call(self, data_source_id: str, caller_name: str, caller_file: str, callee_name: str, callee_file: str):
+        self._buffer("resolved_calls", {"data_source_id": data_source_id, "caller_name": caller_name, "caller_file": caller_file, "callee_name": callee_name, "callee_file": callee_file})
+
+    def add_import_relationship(self, data_source_id: str, file_path: str, module: str, name: str, asname: str):
+        import_name = name or module
+        self._buffer("imports", {"data_source_id": data_source_id, "file_path": file_path, "import_name": import_name})
+
+    def set_unresolved_names(self, data_source_id: str, file_path: str, names: list[str]):
+        self._buffer("unresolved_names", {"data_source_id": data_source_id, "file_path": file_path, "names": names})
+
 class KnowledgeGraphManager:
-    """Manages all interactions with the Neo4j Knowledge Graph."""
+    """
+    Manages all interactions with the Neo4j Knowledge Graph.
+    Cheap to construct: it borrows the process-wide driver from neo4j_driver instead of opening its own.
+    """
     def __init__(self):
-        uri = current_app.config.get('NEO4J_URI')
-        user = current_app.config.get('NEO4J_USERNAME')
-        password = current_app.config.get('NEO4J_PASSWORD')
+        self._driver = get_driver()
 
-        if not all([uri, user, password]):
-            raise ValueError("Neo4j credentials are not configured in the application.")
-            
-        self._driver = GraphDatabase.driver(uri, auth=(user, password))
-        self.graph = Neo4jGraph(url=uri, username=user, password=password)
+    @property
+    def graph(self) -> Neo4jGraph:
+        """The shared LangChain graph wrapper, built on first use."""
+        return get_graph()
 
     def close(self):
-        """Closes the database connection driver."""
-        if self._driver:
-            self._driver.close()
+        """
+        Kept for API compatibility. The driver is shared by the whole process and is closed
+        by neo4j_driver.close_driver() on shutdown, not per manager.
+        """
+        pass
+
+    def ensure_schema(self, force: bool = False):
+        """
+        Idempotently creates the constraints and indexes in SCHEMA_CONSTRAINTS / SCHEMA_INDEXES,
+        so that every MERGE/MATCH during ingestion is an index seek instead of a label scan.
+        Runs once per process unless `force` is set, and waits for new indexes to come online.
+        """
+        if os.getpid() in _schema_ensured_pids and not force:
+            return
+        with self._driver.session() as session:
+            for name, (label, properties) in SCHEMA_CONSTRAINTS.items():
+                props = _property_list("n", properties)
+                attempts = [
+                    f"CREATE CONSTRAINT {name} IF NOT EXISTS FOR (n:{label}) REQUIRE {props} IS NODE KEY",
+                    f"CREATE CONSTRAINT {name} IF NOT EXISTS FOR (n:{label}) REQUIRE {props} IS UNIQUE",
+                    # e.g. existing duplicates from before the constraint: still give MERGE an index to seek on.
+                    f"CREATE INDEX {name} IF NOT EXISTS FOR (n:{label}) ON {props}",
+                ]
+                for statement in attempts:
+                    try:
+                        session.run(statement).consume()
+                        break
+                    except ClientError as e:
+                        current_app.logger.warning(f"KG: '{statement}' failed ({e.code}); trying a weaker alternative.")
+                else:
+                    raise RuntimeError(f"Could not create constraint or index '{name}' on :{label}{props}.")
+
+            for name, (label, properties) in SCHEMA_INDEXES.items():
+                session.run(f"CREATE INDEX {name} IF NOT EXISTS FOR (n:{label}) ON {_property_list('n', properties)}").consume()
+
+            session.run("CALL db.awaitIndexes(300)").consume()
+
+        problems = self.verify_schema()
+        if problems:
+            current_app.logger.warning(f"KG: Graph schema is incomplete: {' '.join(problems)}")
+            return
+        _schema_ensured_pids.add(os.getpid())
+        current_app.logger.info("KG: Graph constraints and indexes are in place.")
+
+    def verify_schema(self) -> list[str]:
+        """
+        Checks that every lookup in SCHEMA_CONSTRAINTS / SCHEMA_INDEXES is backed by a constraint or an
+        ONLINE index. Returns a list of problems; an empty list means the schema is complete.
+        """
+        covered = set()
+        with self._driver.session() as session:
+            for record in session.run("SHOW CONSTRAINTS YIELD labelsOrTypes, properties"):
+                for label in record["labelsOrTypes"] or []:
+                    covered.add((label, tuple(record["properties"] or [])))
+            not_online = []
+            for record in session.run("SHOW INDEXES YIELD name, labelsOrTypes, properties, state"):
+                if record["state"] != "ONLINE":
+                    not_online.append(f"Index '{record['name']}' is {record['state']}.")
+                    continue
+                for label in record["labelsOrTypes"] or []:
+                    covered.add((label, tuple(record["properties"] or [])))
+
+        problems = [
+            f"No constraint or index '{name}' on :{label}{_property_list('n', properties)}."
+            for name, (label, properties) in {**SCHEMA_CONSTRAINTS, **SCHEMA_INDEXES}.items()
+            if (label, properties) not in covered
+        ]
+        return problems + not_online
+
+    def batch_writer(self, batch_size: int | None = None) -> GraphBatchWriter:
+        """Returns a GraphBatchWriter on this manager's driver. Batch size defaults to GRAPH_WRITE_BATCH_SIZE."""
+        if batch_size is None:
+            batch_size = current_app.config.get('GRAPH_WRITE_BATCH_SIZE', 1000)
+        return GraphBatchWriter(self._driver, batch_size)
 
     def run_query(self, query, parameters=None):
         """A generic method to run a Cypher query against the database."""
-        with self._driver.session() as session:
+        with track_call("neo4j"), self._driver.session() as session:
             result = session.run(query, parameters)
             return [record for record in result]
     def query_graph(self, natural_language_query: str, data_source_id: str) -> str:
@@ -70,6 +330,9 @@ class KnowledgeGraphManager:
         current_app.logger.info(f"KG Tool: Received query -> '{natural_language_query}' for data source '{data_source_id}'")
         try:
             llm = ChatGoogleGenerativeAI(model="gemini-pro", temperature=0, convert_system_message_to_human=True)
+            if not self.graph.structured_schema:
+                # The shared graph is built without introspection; GraphCypherQAChain needs the structured schema.
+                self.graph.refresh_schema()
 
             # We now use our custom prompt that includes the data_source_id
             chain = GraphCypherQAChain.from_llm(
@@ -98,9 +361,8 @@ class KnowledgeGraphManager:
         parameters = {"file_path": file_path, "data_source_id": data_source_id}
         self.run_query(query, parameters)
         current_app.logger.debug(f"KG: Merged File node for {file_path}")
-    def add_class_node(self, data_source_id: str, file_path: str, class_name: str, docstring: str, base_classes: list[str]):
-        """Adds a 'Class' node, links it to its file, and links its inheritance."""
-        # Step 1: Create the Class node and link it to the file it's defined in.
+    def add_class_node(self, data_source_id: str, file_path: str, class_name: str, docstring: str):
+        """Adds a 'Class' node and links it to its file."""
         query = (
             "MERGE (file:File {path: $file_path, dataSourceId: $data_source_id}) "
             "MERGE (class:Class {name: $class_name, file_path: $file_path, dataSourceId: $data_source_id}) "
@@ -116,43 +378,6 @@ class KnowledgeGraphManager:
         self.run_query(query, parameters)
         current_app.logger.debug(f"KG: Merged Class '{class_name}'.")
 
-        # Step 2: Link the class to its base classes (inheritance).
-        if base_classes:
-            # This query finds the current class and its parent classes and creates INHERITS_FROM relationships.
-            # It assumes base classes are in the same repo; cross-library inheritance is a more advanced topic.
-            inheritance_query = (
-                "MATCH (class:Class {name: $class_name, file_path: $file_path, dataSourceId: $data_source_id}) "
-                "UNWIND $base_classes AS base_class_name "
-                "MATCH (base_class:Class {name: base_class_name, dataSourceId: $data_source_id}) "
-                "MERGE (class)-[:INHERITS_FROM]->(base_class)"
-            )
-            inheritance_params = {
-                "class_name": class_name,
-                "file_path": file_path,
-                "data_source_id": data_source_id,
-                "base_classes": base_classes
-            }
-            self.run_query(inheritance_query, inheritance_params)
-            current_app.logger.debug(f"KG: Linked inheritance for '{class_name}'.")
-
-    def add_call_relationship(self, data_source_id: str, caller_name: str, caller_file: str, callee_name: str):
-        """Adds a 'CALLS' relationship between two functions/methods."""
-        # This query is critical for tracing execution flow. It finds the calling function
-        # and the function being called and creates a directional CALLS relationship.
-        query = (
-            "MATCH (caller:Function {name: $caller_name, file_path: $caller_file, dataSourceId: $data_source_id}) "
-            "MATCH (callee:Function {name: $callee_name, dataSourceId: $data_source_id}) "
-            "MERGE (caller)-[:CALLS]->(callee)"
-        )
-        parameters = {
-            "caller_name": caller_name,
-            "caller_file": caller_file,
-            "callee_name": callee_name,
-            "data_source_id": data_source_id
-        }
-        self.run_query(query, parameters)
-        current_app.logger.debug(f"KG: Linked call from '{caller_name}' to '{callee_name}'.")
-
     def add_import_relationship(self, data_source_id: str, file_path: str, module: str, name: str, asname: str):
         """Adds an 'IMPORTS' relationship from a file to a module/object."""
         # This helps in understanding dependencies between files.
@@ -216,14 +441,119 @@ class KnowledgeGraphManager:
         parameters = {"data_source_id": data_source_id}
         self.run_query(query, parameters)
         current_app.logger.info(f"KG: Cleared all graph data for data source {data_source_id}.")
+    def find_dependent_files(self, data_source_id: str, file_paths: list[str]) -> list[str]:
+        """
+        Returns the files outside `file_paths` that hold CALLS or INHERITS_FROM edges pointing
+        into `file_paths`. Those edges are lost when the target files are purged, so an
+        incremental sync has to re-link them.
+        """
+        if not file_paths:
+            return []
+        query = (
+            "MATCH (caller:Function {dataSourceId: $data_source_id})-[:CALLS]->(callee:Function {dataSourceId: $data_source_id}) "
+            "WHERE callee.file_path IN $file_paths AND NOT caller.file_path IN $file_paths "
+            "RETURN DISTINCT caller.file_path AS file_path "
+            "UNION "
+            "MATCH (child:Class {dataSourceId: $data_source_id})-[:INHERITS_FROM]->(base:Class {dataSourceId: $data_source_id}) "
+            "WHERE base.file_path IN $file_paths AND NOT child.file_path IN $file_paths "
+            "RETURN DISTINCT child.file_path AS file_path"
+        )
+        records = self.run_query(query, {"data_source_id": data_source_id, "file_paths": file_paths})
+        return [record["file_path"] for record in records]
+
+    def find_files_with_unresolved_names(self, data_source_id: str, names: list[str]) -> list[str]:
+        """
+        Returns the files whose calls or base classes include one of `names` that didn't resolve to
+        anything in the repository when the file was last linked (File.unresolved_names). Once a
+        definition of such a name is added, an incremental sync has to re-link those files.
+        """
+        if not names:
+            return []
+        query = (
+            "MATCH (f:File {dataSourceId: $data_source_id}) "
+            "WHERE any(name IN coalesce(f.unresolved_names, []) WHERE name IN $names) "
+            "RETURN f.path AS file_path"
+        )
+        records = self.run_query(query, {"data_source_id": data_source_id, "names": names})
+        return [record["file_path"] for record in records]
+
+    def get_code_definitions(self, data_source_id: str) -> tuple[list[str], list[dict]]:
+        """
+        Returns (file_paths, definitions) currently in the graph for a data source, where each
+        definition is {"kind": "class" | "function", "name": ..., "file_path": ...}.
+        Used to seed the symbol table with the files an incremental sync doesn't re-parse.
+        """
+        parameters = {"data_source_id": data_source_id}
+        file_records = self.run_query("MATCH (f:File {dataSourceId: $data_source_id}) RETURN f.path AS path", parameters)
+        definition_records = self.run_query(
+            "MATCH (c:Class {dataSourceId: $data_source_id}) RETURN 'class' AS kind, c.name AS name, c.file_path AS file_path "
+            "UNION ALL "
+            "MATCH (f:Function {dataSourceId: $data_source_id}) RETURN 'function' AS kind, f.name AS name, f.file_path AS file_path",
+            parameters
+        )
+        return [record["path"] for record in file_records], [record.data() for record in definition_records]
+
+    def delete_file_entities(self, data_source_id: str, file_paths: list[str]):
+        """Deletes the Class/Function nodes defined in the given files and the files' IMPORTS edges."""
+        if not file_paths:
+            return
+        parameters = {"data_source_id": data_source_id, "file_paths": file_paths}
+        self.run_query(
+            "MATCH (n {dataSourceId: $data_source_id}) "
+            "WHERE (n:Class OR n:Function) AND n.file_path IN $file_paths "
+            "DETACH DELETE n",
+            parameters
+        )
+        self.run_query(
+            "MATCH (f:File {dataSourceId: $data_source_id})-[r:IMPORTS]->() "
+            "WHERE f.path IN $file_paths "
+            "DELETE r",
+            parameters
+        )
+        current_app.logger.info(f"KG: Purged code entities for {len(file_paths)} files in data source {data_source_id}.")
+
+    def delete_file_nodes(self, data_source_id: str, file_paths: list[str]):
+        """Deletes File nodes and prunes any Directory nodes left without children."""
+        if not file_paths:
+            return
+        self.run_query(
+            "MATCH (f:File {dataSourceId: $data_source_id}) "
+            "WHERE f.path IN $file_paths "
+            "DETACH DELETE f",
+            {"data_source_id": data_source_id, "file_paths": file_paths}
+        )
+        # Each pass removes one level of empty directories, so repeat until nothing is left to prune.
+        while True:
+            records = self.run_query(
+                "MATCH (d:Directory {dataSourceId: $data_source_id}) "
+                "WHERE d.path <> '.' AND NOT (d)-[:CONTAINS]->() "
+                "DETACH DELETE d "
+                "RETURN count(*) AS deleted",
+                {"data_source_id": data_source_id}
+            )
+            if not records or records[0]["deleted"] == 0:
+                break
+        current_app.logger.info(f"KG: Deleted {len(file_paths)} File nodes in data source {data_source_id}.")
+
+    def explain_cypher_query(self, cypher_query: str) -> dict:
+        """
+        Returns the planner's plan for a query (EXPLAIN: nothing is executed), as the driver's
+        nested dict of operators. Raises if Neo4j refuses the query, e.g. on a syntax error.
+        """
+        with track_call("neo4j"), self._driver.session(default_access_mode=READ_ACCESS) as session:
+            return session.run(f"EXPLAIN {cypher_query}").consume().plan or {}
+
     def execute_cypher_query(self, cypher_query: str) -> list[dict]:
         """
         Executes a raw Cypher query and returns the raw, structured results.
+        The query runs in a read-access session and is aborted by the server after
+        CYPHER_QUERY_TIMEOUT_SECONDS.
         """
         current_app.logger.info(f"KG Manager: Executing raw cypher: {cypher_query}")
+        timeout = current_app.config.get('CYPHER_QUERY_TIMEOUT_SECONDS', 10)
         try:
-            with self._driver.session() as session:
-                result = session.run(cypher_query)
+            with track_call("neo4j"), self._driver.session(default_access_mode=READ_ACCESS) as session:
+                result = session.run(Query(cypher_query, timeout=timeout or None))
                 # Return the records as a list of dictionaries
                 records = [record.data() for record in result]
                 return records
@@ -0,0 +1,89 @@
+# backend/app/knowledge_graph/neo4j_driver.py
+import atexit
+import os
+import threading
+from neo4j import GraphDatabase
+from flask import current_app
+from langchain_community.graphs import Neo4jGraph
+
+# One driver per process, shared by the LangChain graph wrapper. The pid is remembered so that a
+# Celery child forked from a parent that already connected builds its own pool instead of
+# sharing the parent's sockets.
+_driver = None
+_graph = None
+_owner_pid = None
+_lock = threading.Lock()
+
+
+def _credentials() -> tuple[str, str, str]:
+    uri = current_app.config.get('NEO4J_URI')
+    user = current_app.config.get('NEO4J_USERNAME')
+    password = current_app.config.get('NEO4J_PASSWORD')
+    if not all([uri, user, password]):
+        raise ValueError("Neo4j credentials are not configured in the application.")
+    return uri, user, password
+
+
+def _reset_if_forked():
+    global _driver, _graph, _owner_pid
+    if _owner_pid != os.getpid():
+        _driver, _graph, _owner_pid = None, None, os.getpid()
+
+
+def get_driver():
+    """Returns the process-wide Neo4j driver, creating its connection pool on first use."""
+    global _driver
+    with _lock:
+        _reset_if_forked()
+        if _driver is None:
+            uri, user, password = _credentials()
+            _driver = GraphDatabase.driver(
+                uri,
+                auth=(user, password),
+                max_connection_pool_size=current_app.config.get('NEO4J_MAX_CONNECTION_POOL_SIZE', 50),
+                connection_acquisition_timeout=current_app.config.get('NEO4J_CONNECTION_ACQUISITION_TIMEOUT', 60),
+            )
+            current_app.logger.info("KG: Created shared Neo4j driver.")
+        return _driver
+
+
+class _SharedDriverGraph(Neo4jGraph):
+    """
+    A Neo4jGraph that runs its queries on the shared driver. Neo4jGraph.__init__ always opens a
+    driver (and connection pool) of its own, so it is not called; the attributes it would set are.
+    """
+    def __init__(self, driver, database: str = "neo4j"):
+        self._driver = driver
+        self._database = database
+        self.timeout = None
+        self.sanitize = False
+        self._enhanced_schema = False
+        self.schema = ""
+        self.structured_schema = {}
+
+
+def get_graph() -> Neo4jGraph:
+    """
+    Returns the process-wide LangChain Neo4jGraph. It's built without introspecting the
+    schema; use schema_cache.get_graph_schema() for that.
+    """
+    global _graph
+    driver = get_driver()
+    with _lock:
+        if _graph is None or _graph._driver is not driver:
+            _graph = _SharedDriverGraph(driver)
+        return _graph
+
+
+def close_driver():
+    """Closes the shared driver (and with it the graph wrapper). Called on Celery worker shutdown and at interpreter exit."""
+    global _driver, _graph
+    with _lock:
+        if _owner_pid != os.getpid():
+            return
+        if _driver is not None:
+            _driver.close()
+        _driver, _graph = None, None
+
+
+atexit.register(close_driver)
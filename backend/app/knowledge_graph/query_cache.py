@@ -0,0 +1,106 @@
+# backend/app/knowledge_graph/query_cache.py
+import hashlib
+import json
+import re
+import threading
+from cachetools import TTLCache
+from flask import current_app
+from ..utils.redis_client import get_redis_client
+
+_REDIS_KEY_PREFIX = "kg:cypher"
+# String literals (single/double quoted, with escapes) and backtick-quoted names are kept verbatim.
+_QUOTED_OR_SPACE = re.compile(r"""('(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*"|`[^`]*`)|\s+""")
+
+_lock = threading.Lock()
+_local = {"cache": None, "settings": None}
+
+
+def normalize_cypher(cypher_query: str) -> str:
+    """Collapses whitespace outside quoted literals and drops a trailing semicolon, so reformatted copies of a query share a key."""
+    normalized = _QUOTED_OR_SPACE.sub(lambda match: match.group(1) or " ", cypher_query.strip())
+    return normalized.rstrip(";").strip()
+
+
+def _local_cache() -> TTLCache:
+    settings = (current_app.config.get('CYPHER_CACHE_MAX_ENTRIES', 2048), current_app.config.get('CYPHER_CACHE_TTL_SECONDS', 3600))
+    if _local["cache"] is None or _local["settings"] != settings:
+        _local.update(cache=TTLCache(maxsize=settings[0], ttl=settings[1]), settings=settings)
+    return _local["cache"]
+
+
+def _redis_key(data_source_id: str, revision: str, normalized: str) -> str:
+    digest = hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+    return f"{_REDIS_KEY_PREFIX}:{data_source_id}:{revision}:{digest}"
+
+
+def execute_cached_cypher(kg_manager, data_source_id: str, revision: str | None, cypher_query: str, execute=None) -> list[dict]:
+    """
+    Runs a read-only Cypher query through `execute` (default: `kg_manager.execute_cypher_query`),
+    reusing the records of an identical (normalized) query against the same data source and
+    index revision. `execute` is only called on a miss.
+
+    Results live in a per-process TTL + LRU cache (CYPHER_CACHE_MAX_ENTRIES, CYPHER_CACHE_TTL_SECONDS)
+    and, when CACHE_REDIS_URL is set, in Redis for the other processes. The revision (see
+    utils/index_revision.py) changes with every completed ingestion, so a reindex retires every
+    cached result; pass None to bypass the cache. Empty results aren't cached, since
+    execute_cypher_query also returns [] on errors, and neither are results over
+    CYPHER_CACHE_MAX_ROWS records.
+    """
+    execute = execute or kg_manager.execute_cypher_query
+    if revision is None or not current_app.config.get('CYPHER_CACHE_ENABLED', True):
+        return execute(cypher_query)
+
+    normalized = normalize_cypher(cypher_query)
+    key = (data_source_id, revision, normalized)
+    with _lock:
+        records = _local_cache().get(key)
+    if records is not None:
+        current_app.logger.info("KG: Cypher result cache hit (local).")
+        return records
+
+    client = get_redis_client()
+    if client is not None:
+        try:
+            payload = client.get(_redis_key(data_source_id, revision, normalized))
+            if payload is not None:
+                records = json.loads(payload)
+                with _lock:
+                    _local_cache()[key] = records
+                current_app.logger.info("KG: Cypher result cache hit (Redis).")
+                return records
+        except Exception as e:
+            current_app.logger.warning(f"KG: Could not read Cypher result from Redis: {e}")
+
+    records = execute(cypher_query)
+    if not records or len(records) > current_app.config.get('CYPHER_CACHE_MAX_ROWS', 1000):
+        return records
+
+    with _lock:
+        _local_cache()[key] = records
+    if client is not None:
+        try:
+            client.set(
+                _redis_key(data_source_id, revision, normalized),
+                json.dumps(records, default=str),
+                ex=current_app.config.get('CYPHER_CACHE_TTL_SECONDS', 3600)
+            )
+        except Exception as e:
+            current_app.logger.warning(f"KG: Could not write Cypher result to Redis: {e}")
+    return records
+
+
+def invalidate_cypher_cache(data_source_id: str):
+    """Drops a data source's cached results, in this process and in Redis. Called when ingestion finalizes."""
+    with _lock:
+        cache = _local["cache"]
+        if cache is not None:
+            for key in [key for key in cache.keys() if key[0] == data_source_id]:
+                cache.pop(key, None)
+    client = get_redis_client()
+    if client is not None:
+        try:
+            keys = list(client.scan_iter(match=f"{_REDIS_KEY_PREFIX}:{data_source_id}:*", count=500))
+            if keys:
+                client.delete(*keys)
+        except Exception as e:
+            current_app.logger.warning(f"KG: Could not invalidate cached Cypher results in Redis: {e}")
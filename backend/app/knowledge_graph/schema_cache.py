@@ -0,0 +1,126 @@
+# backend/app/knowledge_graph/schema_cache.py
+import json
+import threading
+import time
+from flask import current_app
+from sqlalchemy import func, select, update
+from .neo4j_driver import get_graph
+from ..models.models import db, DataSource
+from ..utils.redis_client import get_redis_client
+
+# Redis keys shared by every web and worker process.
+_REDIS_GENERATION_KEY = "kg:schema:generation"
+_REDIS_SCHEMA_KEY = "kg:schema:value"
+
+_lock = threading.Lock()
+_cached = {"schema": None, "generation": None, "loaded_at": 0.0, "checked_at": 0.0}
+
+
+def _introspect() -> str:
+    """Runs the (expensive) schema introspection against Neo4j."""
+    graph = get_graph()
+    graph.refresh_schema()
+    return graph.schema
+
+
+def _store_local(schema: str, generation, now: float):
+    _cached.update(schema=schema, generation=generation, loaded_at=now, checked_at=now)
+
+
+def _read_redis_generation(client):
+    try:
+        value = client.get(_REDIS_GENERATION_KEY)
+        return int(value) if value is not None else 0
+    except Exception as e:
+        current_app.logger.warning(f"KG: Could not read schema generation from Redis: {e}")
+        return None
+
+
+def _read_db_generation():
+    """
+    Without Redis, the generation is derived from the data sources' graph_schema_generation
+    counters (and their count, since deleting a data source also changes the graph).
+    """
+    try:
+        with db.engine.connect() as connection:
+            count, total = connection.execute(
+                select(func.count(DataSource.id), func.coalesce(func.sum(DataSource.graph_schema_generation), 0))
+            ).one()
+        return f"db:{count}:{total}"
+    except Exception as e:
+        current_app.logger.warning(f"KG: Could not read schema generation from the database: {e}")
+        return None
+
+
+def get_graph_schema() -> str:
+    """
+    Returns the Neo4j graph schema, introspecting the database only when no cached copy is valid.
+
+    The schema is held in process memory together with a generation: each process re-reads the
+    generation at most every GRAPH_SCHEMA_REDIS_CHECK_SECONDS and reloads when
+    invalidate_graph_schema() has bumped it. With CACHE_REDIS_URL set, the generation is a Redis
+    counter and the schema itself is shared through Redis too; otherwise the generation comes
+    from the data_sources table. GRAPH_SCHEMA_CACHE_TTL_SECONDS bounds a copy's age regardless.
+    """
+    check_interval = current_app.config.get('GRAPH_SCHEMA_REDIS_CHECK_SECONDS', 30)
+    ttl = current_app.config.get('GRAPH_SCHEMA_CACHE_TTL_SECONDS', 3600)
+    client = get_redis_client()
+
+    with _lock:
+        now = time.monotonic()
+        if _cached["schema"] is not None and now - _cached["loaded_at"] < ttl and now - _cached["checked_at"] < check_interval:
+            return _cached["schema"]
+
+        generation = _read_redis_generation(client) if client is not None else _read_db_generation()
+        if generation is not None and generation == _cached["generation"] and _cached["schema"] is not None and now - _cached["loaded_at"] < ttl:
+            _cached["checked_at"] = now
+            return _cached["schema"]
+
+        if generation is not None and client is not None:
+            try:
+                payload = client.get(_REDIS_SCHEMA_KEY)
+                if payload is not None:
+                    shared = json.loads(payload)
+                    if shared.get("generation") == generation:
+                        _store_local(shared["schema"], generation, now)
+                        return shared["schema"]
+            except Exception as e:
+                current_app.logger.warning(f"KG: Could not read cached schema from Redis: {e}")
+
+        current_app.logger.info("KG: Introspecting graph schema...")
+        schema = _introspect()
+        _store_local(schema, generation, now)
+        if generation is not None and client is not None:
+            try:
+                client.set(_REDIS_SCHEMA_KEY, json.dumps({"generation": generation, "schema": schema}))
+            except Exception as e:
+                current_app.logger.warning(f"KG: Could not write schema to Redis: {e}")
+        return schema
+
+
+def invalidate_graph_schema(data_source_id: str | None = None):
+    """
+    Drops the cached schema in this process and in every other process: by bumping the shared
+    generation in Redis when it's configured, else the graph_schema_generation of the data source
+    whose graph was rewritten. Called whenever ingestion has rewritten a data source's graph.
+    """
+    with _lock:
+        _cached.update(schema=None, generation=None, loaded_at=0.0, checked_at=0.0)
+    client = get_redis_client()
+    if client is not None:
+        try:
+            client.incr(_REDIS_GENERATION_KEY)
+            client.delete(_REDIS_SCHEMA_KEY)
+        except Exception as e:
+            current_app.logger.warning(f"KG: Could not invalidate schema in Redis: {e}")
+    elif data_source_id is not None:
+        try:
+            # Its own transaction, so the caller's session state is neither committed nor needed.
+            with db.engine.begin() as connection:
+                connection.execute(
+                    update(DataSource).where(DataSource.id == data_source_id)
+                    .values(graph_schema_generation=DataSource.graph_schema_generation + 1)
+                )
+        except Exception as e:
+            current_app.logger.warning(f"KG: Could not bump the schema generation in the database: {e}")
+    current_app.logger.info("KG: Graph schema cache invalidated.")
@@ -6,4 +6,4 @@ from .. import db, bcrypt
 
 # It also needs to import the actual model classes from models.py so that
 # other parts of the application can import them from the 'app.models' package.
-from .models import AdminUser, APIKey, ConfiguredModel, DataSource
\ No newline at end of file
+from .models import AdminUser, APIKey, ConfiguredModel, DataSource, IngestionRun
\ No newline at end of file
@@ -93,6 +93,13 @@ class DataSource(db.Model):
     connection_details = db.Column(JSONB, nullable=False, unique=True)
     status = db.Column(db.String(50), nullable=False, default="pending") 
     last_indexed_at = db.Column(db.DateTime, nullable=True)
+    # Commit SHA of the last successful ingestion. Used as the base for incremental syncs.
+    last_indexed_commit = db.Column(db.String(40), nullable=True)
+    # Progress of an unfinished ingestion run (see tasks/ingestion_checkpoint.py). Cleared once a run completes.
+    ingestion_checkpoint = db.Column(JSONB, nullable=True)
+    # Bumped whenever ingestion rewrites this data source's graph. Without Redis, processes detect a
+    # changed graph schema by the sum of these (see knowledge_graph/schema_cache.py).
+    graph_schema_generation = db.Column(db.Integer, nullable=False, default=0, server_default='0')
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -110,10 +117,49 @@ class DataSource(db.Model):
             'connection_details': self.connection_details,
             'status': self.status,
             'last_indexed_at': self.last_indexed_at.isoformat() if self.last_indexed_at else None,
+            'last_indexed_commit': self.last_indexed_commit,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
         }
 
+class IngestionRun(db.Model):
+    """
+    One execution of an ingestion task (an attempt, a shard or the link step of a fanned-out run),
+    with its per-phase timings and external call statistics (see utils/ingestion_metrics.py).
+    """
+    __tablename__ = 'ingestion_runs'
+
+    id = db.Column(db.String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    data_source_id = db.Column(db.String, db.ForeignKey('data_sources.id', ondelete='CASCADE'), nullable=False, index=True)
+    task_id = db.Column(db.String(155), nullable=True)
+    task_name = db.Column(db.String(100), nullable=False) # 'ingest', 'shard' or 'link'
+    attempt = db.Column(db.Integer, nullable=False, default=0)
+    mode = db.Column(db.String(20), nullable=True) # 'full' or 'incremental'
+    commit_sha = db.Column(db.String(40), nullable=True)
+    status = db.Column(db.String(20), nullable=False, default="running") # running, completed, dispatched, failed
+    error = db.Column(db.Text, nullable=True)
+    metrics = db.Column(JSONB, nullable=True)
+    started_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    duration_seconds = db.Column(db.Float, nullable=True)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'data_source_id': self.data_source_id,
+            'task_id': self.task_id,
+            'task_name': self.task_name,
+            'attempt': self.attempt,
+            'mode': self.mode,
+            'commit_sha': self.commit_sha,
+            'status': self.status,
+            'error': self.error,
+            'metrics': self.metrics,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'duration_seconds': self.duration_seconds,
+        }
+
 # --- NEW MODEL FOR CHAT HISTORY ---
 class ChatHistory(db.Model):
     """
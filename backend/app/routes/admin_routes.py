@@ -8,7 +8,7 @@ import jwt # This imports the jwt library (PyJWT)
 
 
 from ..utils.auth import token_required, encrypt_value, decrypt_value # Ensure these are imported
-from ..models.models import db, AdminUser, APIKey, ConfiguredModel
+from ..models.models import db, AdminUser, APIKey, ConfiguredModel, IngestionRun
 from .. import bcrypt # This imports bcrypt from your __init__.py if set up as a package-level variable
 from ..core_config.static_model_data import get_predefined_model_suggestions
 
@@ -302,4 +302,32 @@ def get_model_suggestions_route(current_admin_username):
         return jsonify(filtered_suggestions), 200
     except Exception as e:
         current_app.logger.error(f"Error fetching model suggestions: {e}", exc_info=True)
-        return jsonify({"msg": "Failed to fetch model suggestions", "error": str(e)}), 500
\ No newline at end of file
+        return jsonify({"msg": "Failed to fetch model suggestions", "error": str(e)}), 500
+
+@admin_bp.route('/ingestion-runs/', methods=['GET'])
+@token_required
+def get_ingestion_runs(current_admin_username):
+    """
+    Lists recorded ingestion runs, newest first, with their per-phase timings and call statistics.
+    Optional filters: data_source_id, status, task_name ('ingest', 'shard', 'link'); limit (default 50, max 500).
+    """
+    try:
+        query = db.session.query(IngestionRun)
+        for field in ('data_source_id', 'status', 'task_name'):
+            value = request.args.get(field)
+            if value:
+                query = query.filter(getattr(IngestionRun, field) == value)
+        limit = min(request.args.get('limit', 50, type=int), 500)
+        runs = query.order_by(IngestionRun.started_at.desc()).limit(limit).all()
+        return jsonify([run.to_dict() for run in runs]), 200
+    except Exception as e:
+        current_app.logger.error(f"Error fetching ingestion runs: {e}", exc_info=True)
+        return jsonify({"msg": "Failed to fetch ingestion runs", "error": str(e)}), 500
+
+@admin_bp.route('/ingestion-runs/<string:run_id>', methods=['GET'])
+@token_required
+def get_ingestion_run(current_admin_username, run_id):
+    run = db.session.get(IngestionRun, run_id)
+    if not run:
+        return jsonify({"msg": "Ingestion run not found"}), 404
+    return jsonify(run.to_dict()), 200
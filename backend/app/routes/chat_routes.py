@@ -12,6 +12,8 @@ from ..models.models import APIKey, ConfiguredModel, DataSource, ChatHistory, Ad
 from backend.celery_worker import celery_app # Import from celery_worker directly
 from ..tasks.memory_tasks import generate_repo_summary_task, extract_user_facts_task
 from ..ai_core.graph import agent_graph # THIS IMPORT IS THE KEY
+from ..ai_core.progress import stream_answer_events
+from ..ai_core.context_budget import fold_into_summary, get_token_budget, split_recent_turns
 from backend.app import db 
 
 chat_bp = Blueprint('chat_api_routes', __name__, url_prefix='/api/chat')
@@ -119,14 +121,20 @@ def chat_handler(current_user_identity):
     # --- RETRIEVE ALL MEMORY LAYERS ---
     
     # Layer 1: Short-Term (In-Session) Conversation History
-    all_chat_messages = db.session.query(ChatHistory).filter_by(
+    # Only the last CHAT_HISTORY_TURNS turns are sent verbatim. A turn is two rows (question and answer),
+    # and twice as many turns are loaded, 4 * CHAT_HISTORY_TURNS rows, so that the older turns the repo
+    # summary doesn't cover yet can be folded into it (Layer 2). The extra row is the current question,
+    # already saved and not answered yet.
+    max_turns = current_app.config.get('CHAT_HISTORY_TURNS', 6)
+    recent_chat_messages = db.session.query(ChatHistory).filter_by(
         session_id=session_id,
         user_id=user.id,
         data_source_id=data_source_id
-    ).order_by(ChatHistory.timestamp.asc()).all()
+    ).order_by(ChatHistory.timestamp.desc()).limit(4 * max_turns + 1).all()[::-1]
+    older_chat_messages, windowed_chat_messages = split_recent_turns(recent_chat_messages, max_turns)
 
     langchain_messages = []
-    for msg in all_chat_messages:
+    for msg in windowed_chat_messages:
         if msg.sender == 'user':
             langchain_messages.append(HumanMessage(content=msg.message_content))
         elif msg.sender == 'llm':
@@ -140,6 +148,10 @@ def chat_handler(current_user_identity):
         data_source_id=data_source_id
     ).first()
     repo_summary_text = repo_summary_record.summary_text if repo_summary_record else "No previous conversation summary for this repository."
+    summarized_until = repo_summary_record.last_message_timestamp if repo_summary_record else None
+    repo_summary_text = fold_into_summary(repo_summary_text, [
+        msg for msg in older_chat_messages if summarized_until is None or msg.timestamp > summarized_until
+    ])
     current_app.logger.info(f"Retrieved Repo Summary (length: {len(repo_summary_text)}).")
 
     # Layer 3: Long-Term (User-Specific) General Knowledge
@@ -169,6 +181,10 @@ def chat_handler(current_user_identity):
     if not db_model_config:
         return jsonify({"error": f"Model '{selected_model_id_from_frontend}' is not configured or not active."}), 400
 
+    # The planner and synthesizer trim their prompts to this model's budget.
+    token_budget = get_token_budget(db_model_config.context_window)
+    current_app.logger.info(f"Token budget for model '{selected_model_id_from_frontend}': {token_budget}")
+
     api_key_name_for_model = db_model_config.api_key_name_ref
     if api_key_name_for_model:
         if not current_app.fernet_cipher:
@@ -187,92 +203,68 @@ def chat_handler(current_user_identity):
     # --- Prepare input for the LangGraph agent ---
     agent_input_state = {
     "original_query": user_query,
-    "chat_history": combined_messages_for_agent, # Pass the full history
+    "chat_history": combined_messages_for_agent, # The windowed history; the planner fits it to the budget
+    "token_budget": token_budget,
     "final_answer": [], # Initialize as an empty list
     "repo_id": data_source_id,
     "session_id": session_id,
     "api_key": llm_api_key,
     "model_id": selected_model_id_from_frontend
     }
-# --- ADD THIS FINAL, CORRECT BLOCK ---
-    try:
-        current_app.logger.info("Starting agent graph execution...")
-        full_ai_response_content = ""
-        final_state = agent_graph.invoke(agent_input_state, {"recursion_limit": 15})
-        # --- ALSO ADD THESE LINES ---
-        if final_state and "final_answer" in final_state and final_state["final_answer"]:
-            last_message = final_state["final_answer"][-1]
-            if isinstance(last_message, AIMessage):
-                full_ai_response_content = last_message.content
-                current_app.logger.info(f"SUCCESS: Final answer retrieved from completed graph.")
-        # This new loop inspects each state update as it happens.
-        # for state_chunk in agent_graph.stream(agent_input_state, {"recursion_limit": 15}):
-        #     # As soon as we see the 'final_answer' key appear, we grab it.
-        #     # This is robust because we capture the answer the moment it's created.
-        #     if "final_answer" in state_chunk and state_chunk["final_answer"]:
-        #         last_message = state_chunk["final_answer"][-1]
-        #         if isinstance(last_message, AIMessage):
-        #             full_ai_response_content = last_message.content
-        #             current_app.logger.info(f"SUCCESS: Final answer captured from graph stream.")
-        
-        # If the loop finishes and we never found a final answer, use a fallback message.
-        if not full_ai_response_content:
-            current_app.logger.warning("Graph execution finished, but no 'final_answer' was ever produced.")
-            full_ai_response_content = "I was unable to produce a final answer based on the information I found."
-        
-        # The rest of the function for streaming the response and saving it is correct.
-        ai_response_chunks = []
-        def generate_stream_chunks():
-            nonlocal ai_response_chunks
-            try:
-                ai_response_chunks = [full_ai_response_content]
-
-                # Send the entire response as one single data chunk.
-                if full_ai_response_content:
-                    # The key is still 'chunk', but the value is the whole answer.
-                    data_payload = json.dumps({"chunk": full_ai_response_content})
-                    yield f"data: {data_payload}\n\n".encode('utf-8')
-
-                # We still send the 'done' status so the frontend knows to stop listening.
-                yield f"data: {json.dumps({'status': 'done'})}\n\n".encode('utf-8')
-            except Exception as e:
-                current_app.logger.error(f"Error during streaming simulation: {e}", exc_info=True)
-                error_payload = json.dumps({"error": f"Stream generation error: {str(e)}"})
-                yield f"data: {error_payload}\n\n".encode('utf-8')
-                ai_response_chunks = [f"Error: {str(e)}"]
-            finally:
-                if ai_response_chunks:
-                    final_save_content = "".join(ai_response_chunks)
-                    new_ai_message_entry = ChatHistory(
-                        session_id=session_id, user_id=user.id, data_source_id=data_source_id,
-                        message_content=final_save_content, sender='llm'
-                    )
-                    db.session.add(new_ai_message_entry)
-                    db.session.commit()
-                    current_app.logger.info(f"AI response saved for session {session_id}.")
-                    
-                    celery_app.send_task(
-                        'backend.app.tasks.memory_tasks.generate_repo_summary_task',
-                        args=[user.id, data_source_id],
-                        kwargs={'last_chat_timestamp_str': new_ai_message_entry.timestamp.isoformat()},
-                        countdown=5
-                    )
-                    celery_app.send_task(
-                        'backend.app.tasks.memory_tasks.extract_user_facts_task',
-                        args=[user.id],
-                        countdown=10
-                    )
-
-        response = Response(stream_with_context(generate_stream_chunks()), mimetype='text/event-stream')
-        response.headers.add("Cache-Control", "no-cache")
-        response.headers.add("X-Accel-Buffering", "no")
-        response.direct_passthrough = True
-        return response
 
-    except Exception as e:
-        current_app.logger.error(f"A critical error occurred with the AI agent: {e}", exc_info=True)
-        return jsonify({"error": f"An error occurred with the AI agent: {str(e)}"}), 502
-    
+    # --- Stream the agent run to the client ---
+    # The graph runs inside the response generator: progress events from the nodes and the
+    # synthesizer's tokens are forwarded as SSE events while the agent is still working.
+    current_app.logger.info("Starting agent graph execution...")
+    ai_response_chunks = []
+
+    def sse_event(payload: dict) -> bytes:
+        return f"data: {json.dumps(payload)}\n\n".encode('utf-8')
+
+    def generate_stream_chunks():
+        nonlocal ai_response_chunks
+        try:
+            for event in stream_answer_events(agent_graph, agent_input_state, {"recursion_limit": 15}):
+                if "chunk" in event:
+                    ai_response_chunks.append(event["chunk"])
+                yield sse_event(event)
+            current_app.logger.info("SUCCESS: Agent graph finished streaming.")
+
+            # We still send the 'done' status so the frontend knows to stop listening.
+            yield sse_event({'status': 'done'})
+        except Exception as e:
+            current_app.logger.error(f"A critical error occurred with the AI agent: {e}", exc_info=True)
+            yield sse_event({"error": f"An error occurred with the AI agent: {str(e)}"})
+            ai_response_chunks = [f"Error: {str(e)}"]
+        finally:
+            if ai_response_chunks:
+                final_save_content = "".join(ai_response_chunks)
+                new_ai_message_entry = ChatHistory(
+                    session_id=session_id, user_id=user.id, data_source_id=data_source_id,
+                    message_content=final_save_content, sender='llm'
+                )
+                db.session.add(new_ai_message_entry)
+                db.session.commit()
+                current_app.logger.info(f"AI response saved for session {session_id}.")
+
+                celery_app.send_task(
+                    'backend.app.tasks.memory_tasks.generate_repo_summary_task',
+                    args=[user.id, data_source_id],
+                    kwargs={'last_chat_timestamp_str': new_ai_message_entry.timestamp.isoformat()},
+                    countdown=5
+                )
+                celery_app.send_task(
+                    'backend.app.tasks.memory_tasks.extract_user_facts_task',
+                    args=[user.id],
+                    countdown=10
+                )
+
+    response = Response(stream_with_context(generate_stream_chunks()), mimetype='text/event-stream')
+    response.headers.add("Cache-Control", "no-cache")
+    response.headers.add("X-Accel-Buffering", "no")
+    response.direct_passthrough = True
+    return response
+
 @chat_bp.route('/history/<session_id>/', methods=['DELETE'])
 @token_required
 def clear_chat_history(current_user_identity, session_id):
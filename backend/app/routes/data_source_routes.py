@@ -4,6 +4,7 @@ from flask import Blueprint, request, jsonify, current_app
 from flask_cors import CORS 
 from ..models import db, DataSource
 from ..utils.auth import token_required
+from ..utils.repo_cache import RepoMirrorCache
 from ..tasks.repo_ingestion_tasks import process_data_source_for_ai # Import the Celery task
 from backend.celery_worker  import celery_app # Import the celery_app instance for checking task status
 
@@ -114,7 +115,8 @@ def reindex_data_source(current_admin_username, data_source_id):
 @token_required
 def sync_data_source(current_admin_username, data_source_id):
     """
-    Initiates a sync process. For now, it triggers a full re-index.
+    Initiates an incremental sync: only files changed since the last indexed commit are re-processed.
+    Falls back to a full re-index when there is no usable previous commit.
     """
     source = db.session.get(DataSource, data_source_id)
     if source is None:
@@ -127,7 +129,7 @@ def sync_data_source(current_admin_username, data_source_id):
     
     current_app.logger.info(f"Admin '{current_admin_username}' requested sync for data source: {data_source_id}. Triggering background task.")
     
-    task = process_data_source_for_ai.delay(data_source_id) 
+    task = process_data_source_for_ai.delay(data_source_id, incremental=True)
 
     return jsonify({"message": f"Sync initiated for {source.name}.", "task_id": task.id}), 202
 
@@ -143,12 +145,16 @@ def delete_data_source(current_admin_username, data_source_id):
             return jsonify({"error": "Data source not found"}), 404
             
         # TODO: In future steps, trigger a Celery task here to clean up:
-        # 1. The cloned repository folder from the server.
-        # 2. All associated nodes and relationships from the Neo4j Knowledge Graph.
-        # 3. All associated vectors from the ChromaDB Vector Database.
+        # 1. All associated nodes and relationships from the Neo4j Knowledge Graph.
+        # 2. All associated vectors from the ChromaDB Vector Database.
 
         db.session.delete(source_to_delete)
         db.session.commit()
+
+        try:
+            RepoMirrorCache().remove(data_source_id)
+        except OSError as cache_error:
+            current_app.logger.warning(f"Could not remove cached mirror for data source {data_source_id}: {cache_error}")
         
         current_app.logger.info(f"Admin '{current_admin_username}' successfully deleted data source: {source_to_delete.name} ({data_source_id}).")
         return '', 204
@@ -164,13 +170,67 @@ def delete_data_source(current_admin_username, data_source_id):
 def get_task_status(current_admin_username, task_id):
     """
     Retrieves the current status and result of a Celery task, allowing the frontend to poll for progress.
+    While an ingestion runs, its state is PROGRESS and 'progress' holds its live counters, throughput and ETA.
+    An ingestion fanned out across workers finishes as soon as it has dispatched its shards, with a
+    'link_task_id' and its 'shard_tasks'. The link task stays PENDING until every shard is done, so
+    the shards' states and combined progress are included under 'shards', next to the link task's status.
     """
+    response_data = _describe_task(task_id)
+    info = response_data['info']
+    if isinstance(info, dict) and info.get('link_task_id'):
+        response_data['link_task'] = _describe_task(info['link_task_id'])
+        response_data['shards'] = _describe_shards(info.get('shard_tasks') or [])
+
+    return jsonify(response_data), 200
+
+
+def _describe_task(task_id):
     task = celery_app.AsyncResult(task_id)
-    
+    info = task.info # The return value on SUCCESS, the error on FAILURE/RETRY, the progress metadata on PROGRESS
+    if isinstance(info, BaseException):
+        info = {'error': str(info)}
+
     response_data = {
         'task_id': task.id,
-        'state': task.state, # PENDING, STARTED, SUCCESS, FAILURE, RETRY
-        'info': task.info,   # This will contain the return value on SUCCESS or the error on FAILURE
+        'state': task.state, # PENDING, STARTED, PROGRESS, SUCCESS, FAILURE, RETRY
+        'info': info,
+    }
+    if task.state == 'PROGRESS':
+        response_data['progress'] = info
+    elif isinstance(info, dict) and 'progress' in info:
+        response_data['progress'] = info['progress']
+    return response_data
+
+
+# Fields of an IngestionProgress snapshot that aren't counters to add up across shards.
+_NON_COUNTER_FIELDS = {'files_total', 'percent', 'eta_seconds', 'elapsed_seconds'}
+
+
+def _describe_shards(shard_tasks):
+    """
+    Aggregates the ingest_shard tasks of a fanned-out ingestion: how many are in each state, their
+    summed progress counters and the overall percentage, with every shard weighted by its file count.
+    """
+    states = {}
+    counters = {}
+    files_total = 0
+    files_done = 0.0
+    for shard in shard_tasks:
+        shard_status = _describe_task(shard['task_id'])
+        state = shard_status['state']
+        states[state] = states.get(state, 0) + 1
+        progress = shard_status.get('progress') or {}
+        for name, value in progress.items():
+            if name not in _NON_COUNTER_FIELDS and isinstance(value, int) and not isinstance(value, bool):
+                counters[name] = counters.get(name, 0) + value
+        files_total += shard['files']
+        percent = 100 if state == 'SUCCESS' else (progress.get('percent') or 0)
+        files_done += shard['files'] * percent / 100
+
+    return {
+        'shards': len(shard_tasks),
+        'states': states,
+        'files_total': files_total,
+        **counters,
+        'percent': round(100 * files_done / files_total, 1) if files_total else None,
     }
-    
-    return jsonify(response_data), 200
\ No newline at end of file
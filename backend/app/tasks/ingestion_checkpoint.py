@@ -0,0 +1,73 @@
+# backend/app/tasks/ingestion_checkpoint.py
+import json
+import threading
+from sqlalchemy import cast, func, update
+from sqlalchemy.dialects.postgresql import JSONB
+from backend.app import db
+from ..models.models import DataSource
+
+
+class IngestionCheckpoint:
+    """
+    Durable progress of an ingestion run, stored in DataSource.ingestion_checkpoint so that a
+    retried or re-triggered run can skip the work that already reached Neo4j and Pinecone.
+
+    The state is a flat dict, e.g.:
+        {"commit": <sha>, "mode": "full" | "incremental", "base_commit": <sha or None>,
+         "batch_files": 200, "cleared": True, "directories": True,
+         "nodes": 12, "edges": 3, "embeddings": 9}
+    where "nodes", "edges" and "embeddings" are watermarks: the number of file batches whose
+    writes are complete. Every step is idempotent (MERGEs and upserts), so redoing the batch
+    that was in flight during a crash is safe.
+
+    `mark()` may be called from pipeline stage threads. Writes are serialized by a lock and
+    always store the whole state through a short-lived connection, independent of any ORM session.
+    Concurrent writers in other processes use `merge_shared()` instead.
+    """
+    def __init__(self, data_source_id: str, state: dict):
+        self.data_source_id = data_source_id
+        self._state = dict(state)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def matches(cls, state: dict | None, commit_sha: str, mode: str, base_commit: str | None) -> bool:
+        """True if `state` is a checkpoint of a run of the same kind towards the same commit."""
+        return bool(state) and state.get("commit") == commit_sha and state.get("mode") == mode \
+            and (mode == "full" or state.get("base_commit") == base_commit)
+
+    @classmethod
+    def start(cls, data_source_id: str, commit_sha: str, mode: str, base_commit: str | None, batch_files: int) -> "IngestionCheckpoint":
+        """Creates and persists a fresh checkpoint for a new run."""
+        checkpoint = cls(data_source_id, {"commit": commit_sha, "mode": mode, "base_commit": base_commit, "batch_files": batch_files})
+        checkpoint.save()
+        return checkpoint
+
+    def get(self, key: str, default=None):
+        with self._lock:
+            return self._state.get(key, default)
+
+    def mark(self, **values):
+        """Updates the given keys and persists the checkpoint."""
+        with self._lock:
+            self._state.update(values)
+            self._save_locked()
+
+    @classmethod
+    def merge_shared(cls, data_source_id: str, **values):
+        """
+        Merges keys into the stored checkpoint in a single atomic statement (jsonb `||`), for writers
+        in other processes (e.g. ingestion shards) that must not overwrite each other's keys.
+        """
+        merged = func.coalesce(DataSource.ingestion_checkpoint, cast('{}', JSONB)).op('||')(cast(json.dumps(values), JSONB))
+        with db.engine.begin() as connection:
+            connection.execute(update(DataSource).where(DataSource.id == data_source_id).values(ingestion_checkpoint=merged))
+
+    def save(self):
+        with self._lock:
+            self._save_locked()
+
+    def _save_locked(self):
+        with db.engine.begin() as connection:
+            connection.execute(
+                update(DataSource).where(DataSource.id == self.data_source_id).values(ingestion_checkpoint=dict(self._state))
+            )
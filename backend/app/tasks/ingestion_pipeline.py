@@ -0,0 +1,89 @@
+# backend/app/tasks/ingestion_pipeline.py
+import queue
+import threading
+import time
+from flask import current_app
+
+_DONE = object()
+
+
+class PipelineStage:
+    """
+    One stage of the streaming ingestion pipeline: a thread that calls `handler(item)` for every
+    item put on its bounded queue, then `on_finish()` once the producer calls `finish()`.
+
+    The queue is bounded (INGESTION_QUEUE_SIZE), so a slow stage applies backpressure to the
+    producer instead of letting items pile up in memory. The thread runs inside the producer's
+    Flask app context. If the handler raises, the stage stops and the error is re-raised to the
+    producer on its next `put()` or on `finish()`. Use it as a context manager so a failure in
+    the producer also stops the thread.
+    """
+    def __init__(self, name: str, handler, on_finish=None, maxsize: int | None = None):
+        self.name = name
+        self._handler = handler
+        self._on_finish = on_finish
+        self._queue = queue.Queue(maxsize=maxsize or current_app.config.get('INGESTION_QUEUE_SIZE', 256))
+        self._app = current_app._get_current_object()
+        self._abort = threading.Event()
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name=f"ingestion-{name}", daemon=True)
+        self.items_processed = 0
+        self.busy_seconds = 0.0
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._thread.is_alive():
+            self.abort()
+            self._thread.join()
+        return False
+
+    def _run(self):
+        with self._app.app_context():
+            try:
+                while True:
+                    item = self._queue.get()
+                    if item is _DONE or self._abort.is_set():
+                        break
+                    started = time.monotonic()
+                    self._handler(item)
+                    self.busy_seconds += time.monotonic() - started
+                    self.items_processed += 1
+                if self._on_finish and not self._abort.is_set():
+                    started = time.monotonic()
+                    self._on_finish()
+                    self.busy_seconds += time.monotonic() - started
+            except BaseException as e:
+                self._error = e
+                self._abort.set()
+
+    def _raise_if_failed(self):
+        if self._error is not None:
+            raise RuntimeError(f"Ingestion stage '{self.name}' failed: {self._error}") from self._error
+
+    def put(self, item):
+        """Hands an item to the stage, blocking while its queue is full."""
+        while True:
+            self._raise_if_failed()
+            try:
+                self._queue.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def finish(self):
+        """Signals that no more items are coming, waits for the stage to drain and re-raises its error, if any."""
+        self.put(_DONE)
+        self._thread.join()
+        self._raise_if_failed()
+        current_app.logger.info(f"  -> Stage '{self.name}': {self.items_processed} items, {self.busy_seconds:.1f}s busy.")
+
+    def abort(self):
+        """Stops the stage without running `on_finish`. Items still queued are dropped."""
+        self._abort.set()
+        try:
+            self._queue.put_nowait(_DONE) # Wakes the thread if it's waiting on an empty queue.
+        except queue.Full:
+            pass # It's busy and will see the abort flag before taking the next item.
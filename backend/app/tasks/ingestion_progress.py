@@ -0,0 +1,96 @@
+# backend/app/tasks/ingestion_progress.py
+import threading
+import time
+from flask import current_app
+
+# Per-file counters of the stages that each process every Python file once. The overall completion
+# is their average.
+FILE_STAGES = ("files_parsed", "files_written", "files_embedded", "files_linked")
+
+
+class IngestionProgress:
+    """
+    Live progress of one ingestion task, published as Celery task state 'PROGRESS'.
+
+    Phases and stage threads bump counters with `add()`; the state is pushed to the result
+    backend at most once every INGESTION_PROGRESS_INTERVAL_SECONDS (and always on a phase change),
+    so a large repository doesn't turn into a write per file. The metadata carries every counter,
+    its throughput per second since the start of the phase in which it first moved, the overall completion of the per-file stages
+    and an ETA extrapolated from it.
+
+    The task id is captured up front: Celery's task request is thread-local, and counters are
+    updated from pipeline stage threads too.
+    """
+    def __init__(self, task, data_source_id: str, file_stages: tuple[str, ...] = FILE_STAGES, min_interval: float | None = None):
+        self._task = task
+        self._task_id = task.request.id
+        self._min_interval = min_interval if min_interval is not None else current_app.config.get('INGESTION_PROGRESS_INTERVAL_SECONDS', 2.0)
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._last_published = 0.0
+        self._phase_started = self._started
+        self._first_moved = {}
+        self._work_started = None
+        self.data_source_id = data_source_id
+        self.file_stages = file_stages
+        self.phase = "setup"
+        self.files_total = 0
+        self.counters = dict.fromkeys(("files_walked", *FILE_STAGES, "nodes_written", "edges_written", "chunks_embedded"), 0)
+
+    def set_phase(self, phase: str, files_total: int | None = None):
+        with self._lock:
+            self.phase = phase
+            self._phase_started = time.monotonic()
+            if files_total is not None:
+                self.files_total = files_total
+                if self._work_started is None:
+                    self._work_started = time.monotonic()
+        self.publish(force=True)
+
+    def add(self, **increments):
+        """Adds to the named counters, then publishes if the last update is old enough."""
+        with self._lock:
+            for name, increment in increments.items():
+                self.counters[name] += increment
+                self._first_moved.setdefault(name, self._phase_started)
+        self.publish()
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            counters = dict(self.counters)
+            throughput = {
+                name: round(counters[name] / (now - first_moved), 2)
+                for name, first_moved in self._first_moved.items() if now - first_moved > 0
+            }
+            percent, eta_seconds = None, None
+            if self.files_total:
+                done = sum(min(counters[stage], self.files_total) for stage in self.file_stages)
+                fraction = done / (len(self.file_stages) * self.files_total)
+                percent = round(100 * fraction, 1)
+                if 0 < fraction < 1 and self._work_started is not None:
+                    eta_seconds = round((now - self._work_started) * (1 - fraction) / fraction)
+            return {
+                "data_source_id": self.data_source_id,
+                "phase": self.phase,
+                "files_total": self.files_total,
+                **counters,
+                "throughput_per_second": throughput,
+                "percent": percent,
+                "eta_seconds": eta_seconds,
+                "elapsed_seconds": round(now - self._started),
+            }
+
+    def publish(self, force: bool = False):
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._last_published < self._min_interval:
+                return
+            self._last_published = now
+        if not self._task_id:
+            return # Called eagerly / outside a worker: there's no task state to update.
+        try:
+            self._task.update_state(task_id=self._task_id, state='PROGRESS', meta=self.snapshot())
+        except Exception as e:
+            # Progress is informational; a hiccup of the result backend must not fail the ingestion.
+            current_app.logger.warning(f"Could not publish ingestion progress: {e}")
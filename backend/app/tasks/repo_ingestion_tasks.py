@@ -1,20 +1,653 @@
 # backend/app/tasks/repo_ingestion_tasks.py
-import os
-import shutil
+import posixpath
 import git
+from celery import chord, group
+from celery.utils import uuid
 from datetime import datetime
 from flask import current_app
+from sqlalchemy.orm.attributes import flag_modified
 from backend.app import db # db is from backend.app (global instance)
 from backend.celery_worker import celery_app # Import celery_app from where it's defined and configured
 
-from ..models.models import DataSource
-from ..knowledge_graph.kg_manager import KnowledgeGraphManager
-from ..code_parser.python_parser import parse_python_file
+from ..models.models import DataSource, IngestionRun
+from ..knowledge_graph.kg_manager import KnowledgeGraphManager, GraphBatchWriter
+from ..knowledge_graph.schema_cache import invalidate_graph_schema
+from ..knowledge_graph.query_cache import invalidate_cypher_cache
+from ..utils.answer_cache import answer_cache
+from ..code_parser.python_parser import ParserPool
+from ..code_parser.symbol_table import SymbolTable
+from ..code_parser.parse_cache import ParseCache
+from ..code_parser.models import FileEdges, ParsedFile
+from .ingestion_pipeline import PipelineStage
+from .ingestion_checkpoint import IngestionCheckpoint
+from .ingestion_progress import IngestionProgress
 from ..vector_db.vector_store_manager import VectorStoreManager
+from ..utils.repo_cache import RepoMirrorCache, build_clone_url
+from ..utils.ingestion_metrics import IngestionMetrics, start_collecting, stop_collecting, timed_phase
+
+IGNORED_DIRECTORIES = {'.git', '__pycache__', 'node_modules', 'venv'}
+
+
+def _is_ignored(relative_path: str) -> bool:
+    """True if any component of the path is a directory we never index."""
+    return any(part in IGNORED_DIRECTORIES for part in relative_path.split('/'))
+
+
+def _parent_directories(relative_path: str) -> list[str]:
+    """Returns the directory chain of a repo-relative path, from '.' down to its immediate parent."""
+    parents = ['.']
+    parts = relative_path.split('/')[:-1]
+    for i in range(len(parts)):
+        parents.append('/'.join(parts[:i + 1]))
+    return parents
+
+
+def _walk_tree(commit: git.Commit):
+    """
+    Yields every Tree (directory) and Blob (file) of a commit straight from the object database,
+    parents before children, without descending into ignored directories.
+    """
+    prune = lambda item, depth: item.type == 'tree' and item.name in IGNORED_DIRECTORIES
+    for item in commit.tree.traverse(prune=prune):
+        if item.type in ('tree', 'blob'): # Skip submodules, which have no content in this repo.
+            yield item
+
+
+def _python_blobs(commit: git.Commit, relative_file_paths) -> list[tuple[str, git.Blob]]:
+    """Returns (relative_path, blob) for the Python files among `relative_file_paths`. Blob contents are not read."""
+    blobs = []
+    for relative_file_path in relative_file_paths:
+        if not relative_file_path.endswith('.py'):
+            continue
+        try:
+            blobs.append((relative_file_path, commit.tree / relative_file_path))
+        except KeyError:
+            current_app.logger.warning(f"Could not read file {relative_file_path}: not in commit {commit.hexsha}.")
+    return blobs
+
+
+class _ParseSession:
+    """
+    The parser process pool (PARSER_MAX_WORKERS processes, PARSER_CHUNK_SIZE files per task) and the
+    parse cache of one ingestion task, shared by every batch it parses. Use it as a context manager.
+    """
+    def __init__(self):
+        self._pool = ParserPool(current_app.config.get('PARSER_MAX_WORKERS', 1), current_app.config.get('PARSER_CHUNK_SIZE', 64))
+        self._parse_cache = ParseCache() if current_app.config.get('PARSE_CACHE_ENABLED') else None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._pool.close()
+        return False
+
+    def iter_parsed_files(self, commit: git.Commit, relative_file_paths):
+        """
+        Parses the given Python files and yields (relative_path, ParsedFile) as results become available.
+
+        Results are looked up in the parse cache by blob SHA first, and hits are yielded straight away.
+        Only the misses are read and parsed, on the process pool, and their results are added to the cache.
+        """
+        blobs = _python_blobs(commit, relative_file_paths)
+        parse_cache = self._parse_cache
+
+        misses = []
+        for i in range(0, len(blobs), 500):
+            chunk = blobs[i : i + 500]
+            cached = parse_cache.get_many([blob.hexsha for _, blob in chunk]) if parse_cache else {}
+            for relative_file_path, blob in chunk:
+                if blob.hexsha in cached:
+                    yield relative_file_path, cached[blob.hexsha]
+                else:
+                    misses.append((relative_file_path, blob))
+        current_app.logger.info(f"Parse cache: {len(blobs) - len(misses)} hits, {len(misses)} files to parse.")
+
+        new_cache_entries = {}
+        results = self._pool.parse(
+            (relative_file_path, blob.data_stream.read().decode('utf-8', errors='ignore')) for relative_file_path, blob in misses
+        )
+        for (relative_file_path, blob), (_, parsed_file, parse_error) in zip(misses, results):
+            if parse_error:
+                current_app.logger.warning(f"Could not parse file {relative_file_path}: {parse_error}")
+            elif parsed_file is not None:
+                new_cache_entries[blob.hexsha] = parsed_file
+                if parse_cache and len(new_cache_entries) >= 500:
+                    parse_cache.set_many(new_cache_entries)
+                    new_cache_entries = {}
+                yield relative_file_path, parsed_file
+        if parse_cache:
+            parse_cache.set_many(new_cache_entries)
+
+    def parse_files(self, commit: git.Commit, relative_file_paths) -> dict[str, ParsedFile]:
+        """Parses the given Python files and returns {relative_path: ParsedFile}. See iter_parsed_files."""
+        with timed_phase("parse") as phase:
+            parsed_files = dict(self.iter_parsed_files(commit, relative_file_paths))
+            phase.add(len(parsed_files))
+        return parsed_files
+
+
+def _write_code_nodes(graph_writer: GraphBatchWriter, data_source_id: str, parsed_files: dict[str, ParsedFile]):
+    """Pass 1: creates Class, method and Function nodes."""
+    for file_path, parsed_file in parsed_files.items():
+        # Create Class nodes
+        for parsed_class in parsed_file.classes:
+            graph_writer.add_class_node(
+                data_source_id=data_source_id,
+                file_path=file_path,
+                class_name=parsed_class.name,
+                docstring=parsed_class.docstring
+            )
+        # Create Method nodes (as functions linked to the class) and standalone Function nodes
+        for parsed_class, function in parsed_file.all_functions():
+            graph_writer.add_function_node(
+                data_source_id=data_source_id,
+                file_path=file_path,
+                function_name=function.name,
+                docstring=function.docstring,
+                class_name=parsed_class.name if parsed_class else None
+            )
+
+
+def _write_code_relationships(graph_writer: GraphBatchWriter, data_source_id: str, file_edges: dict[str, FileEdges], symbol_table: SymbolTable, include_imports: bool = True):
+    """
+    Pass 2: creates INHERITS_FROM, IMPORTS and CALLS relationships. All MERGEs, so safe to re-run.
+    Call and base-class targets are resolved against `symbol_table` first; names that don't resolve
+    to anything in the repository (builtins, library calls) are dropped without touching the database,
+    and recorded on the file's File node, so an incremental sync can find the file again once one of
+    them gets defined.
+    """
+    dropped = 0
+    for file_path, edges in file_edges.items():
+        imports = edges.imports
+        unresolved = set()
+        # Create IMPORT relationships
+        if include_imports:
+            for imp in imports:
+                graph_writer.add_import_relationship(
+                    data_source_id=data_source_id,
+                    file_path=file_path,
+                    module=imp.module,
+                    name=imp.name,
+                    asname=imp.asname
+                )
+
+        # Create INHERITS_FROM relationships
+        for class_name, base_classes in edges.class_bases:
+            for base_class in base_classes:
+                targets = symbol_table.resolve_class(file_path, base_class, imports)
+                if not targets:
+                    unresolved.add(base_class)
+                for base_name, base_file in targets:
+                    graph_writer.add_resolved_inheritance(data_source_id, file_path, class_name, base_name, base_file)
+
+        # Create CALLS relationships for standalone functions and methods
+        for function_name, calls in edges.function_calls:
+            for call in calls:
+                targets = symbol_table.resolve_call(file_path, call, imports)
+                if not targets:
+                    unresolved.add(call)
+                for callee_name, callee_file in targets:
+                    graph_writer.add_resolved_call(data_source_id, function_name, file_path, callee_name, callee_file)
+
+        graph_writer.set_unresolved_names(data_source_id, file_path, sorted(unresolved))
+        dropped += len(unresolved)
+
+    current_app.logger.info(f"  -> Dropped {dropped} call/base class names that don't resolve to code in this repository.")
+
+
+def _build_embedding_chunks(parsed_files: dict[str, ParsedFile]) -> tuple[list[str], list[dict]]:
+    """Builds one text chunk (and its Pinecone metadata) per function and method."""
+    text_chunks_for_embedding = []
+    metadatas_for_embedding = []
+
+    for file_path, parsed_file in parsed_files.items():
+        for parsed_class, function in parsed_file.all_functions():
+            arguments = ', '.join(function.args) if function.args else 'None'
+            if parsed_class is None:
+                # Standalone function
+                text_chunk = (
+                    f"Function: {function.name}\n"
+                    f"File: {file_path}\n"
+                    f"Arguments: {arguments}\n"
+                    f"Documentation:\n{function.docstring}"
+                )
+                metadata = {"file_path": file_path, "function_name": function.name, "type": "function"}
+            else:
+                # Class method
+                text_chunk = (
+                    f"Method: {parsed_class.name}.{function.name}\n"
+                    f"File: {file_path}\n"
+                    f"Arguments: {arguments}\n"
+                    f"Documentation:\n{function.docstring}"
+                )
+                metadata = {"file_path": file_path, "function_name": function.name, "type": "method", "class_name": parsed_class.name}
+            text_chunks_for_embedding.append(text_chunk)
+            metadatas_for_embedding.append(metadata)
+
+    return text_chunks_for_embedding, metadatas_for_embedding
+
+
+def _embed_parsed_files(vector_store_manager: VectorStoreManager, data_source_id: str, parsed_files: dict[str, ParsedFile]) -> int:
+    """Embeds and upserts one chunk per function and method. Returns the number of chunks."""
+    with timed_phase("chunk_build") as phase:
+        text_chunks_for_embedding, metadatas_for_embedding = _build_embedding_chunks(parsed_files)
+        phase.add(len(text_chunks_for_embedding))
+    if text_chunks_for_embedding:
+        current_app.logger.info(f"Generating embeddings for {len(text_chunks_for_embedding)} code chunks...")
+        with timed_phase("embed_upsert", items=len(text_chunks_for_embedding)):
+            vector_store_manager.generate_and_store_embeddings(
+                text_chunks=text_chunks_for_embedding,
+                metadatas=metadatas_for_embedding,
+                data_source_id=data_source_id
+            )
+    return len(text_chunks_for_embedding)
+
+
+def _batches(python_files: list[str], batch_files: int) -> list[list[str]]:
+    return [python_files[i : i + batch_files] for i in range(0, len(python_files), batch_files)]
+
+
+def _build_symbol_table(kg_manager, data_source_id: str, seed_from_graph: bool) -> SymbolTable:
+    """
+    An empty symbol table, or, with `seed_from_graph`, one holding every file and definition already
+    in the graph. Incremental syncs need the latter: unchanged files aren't re-parsed.
+    """
+    symbol_table = SymbolTable()
+    if seed_from_graph:
+        with timed_phase("symbol_table_seed") as phase:
+            known_files, definitions = kg_manager.get_code_definitions(data_source_id)
+            phase.add(len(definitions))
+        for known_file in known_files:
+            symbol_table.add_file(known_file)
+        for definition in definitions:
+            symbol_table.add_definition(definition["kind"], definition["name"], definition["file_path"])
+    return symbol_table
+
+
+def _defined_names(parsed_file: ParsedFile) -> set[str]:
+    """The names of the classes, functions and methods a file defines."""
+    return {parsed_class.name for parsed_class in parsed_file.classes} | {function.name for _, function in parsed_file.all_functions()}
+
+
+def _files_to_relink(kg_manager, data_source_id: str, batches: list[list[str]], checkpoint: IngestionCheckpoint, defined_names, dependent_file_paths) -> list[str]:
+    """
+    The unchanged files an incremental sync re-links: `dependent_file_paths` (their edges into the
+    purged files are gone) plus the files with a call or base class name that resolved to nothing
+    when they were last linked and that the re-parsed files define now. The latter are stored in
+    the checkpoint first, because re-linking a file overwrites the names it was found by.
+    """
+    if checkpoint.get("relink_files") is None:
+        processed = {path for batch in batches for path in batch}
+        newly_resolvable = set(kg_manager.find_files_with_unresolved_names(data_source_id, sorted(defined_names))) - processed
+        checkpoint.mark(relink_files=sorted(newly_resolvable - set(dependent_file_paths)))
+        current_app.logger.info(f"  -> {len(newly_resolvable)} unchanged files call or subclass a name the changed files now define.")
+    return sorted(set(dependent_file_paths) | set(checkpoint.get("relink_files")))
+
+
+def _write_relationship_batches(kg_manager, parse_session: _ParseSession, data_source_id: str, commit: git.Commit, batches: list[list[str]],
+                                file_edges: dict[str, FileEdges], symbol_table: SymbolTable, checkpoint: IngestionCheckpoint,
+                                progress: IngestionProgress, dependent_file_paths=(), defined_names=()):
+    """
+    Phase 4: writes relationships batch by batch from each file's FileEdges, advancing the checkpoint's
+    "edges" watermark. On an incremental sync, unchanged files are re-linked last, as one extra batch,
+    without re-creating their nodes: `dependent_file_paths` and the files whose unresolved names are
+    among `defined_names`, the names the re-parsed files define (see _files_to_relink).
+    """
+    current_app.logger.info("Phase 4: Creating relationships...")
+    progress.set_phase("linking")
+    edges_done = checkpoint.get("edges", 0)
+    for index, batch in enumerate(batches):
+        if index < edges_done:
+            progress.add(files_linked=len(batch))
+            continue
+        with timed_phase("edge_write") as phase, kg_manager.batch_writer() as edge_writer:
+            batch_edges = {path: file_edges[path] for path in batch if path in file_edges}
+            _write_code_relationships(edge_writer, data_source_id, batch_edges, symbol_table)
+            edge_writer.flush()
+            phase.add(edge_writer.rows_written)
+        checkpoint.mark(edges=index + 1)
+        progress.add(files_linked=len(batch), edges_written=edge_writer.rows_written)
+    if edges_done <= len(batches) and checkpoint.get("mode") == "incremental":
+        dependent_file_paths = _files_to_relink(kg_manager, data_source_id, batches, checkpoint, defined_names, dependent_file_paths)
+    if edges_done <= len(batches) and dependent_file_paths:
+        dependent_edges = {
+            path: FileEdges.from_parsed_file(parsed_file)
+            for path, parsed_file in parse_session.iter_parsed_files(commit, dependent_file_paths)
+        }
+        with timed_phase("edge_write") as phase, kg_manager.batch_writer() as edge_writer:
+            _write_code_relationships(edge_writer, data_source_id, dependent_edges, symbol_table, include_imports=False)
+            edge_writer.flush()
+            phase.add(edge_writer.rows_written)
+        checkpoint.mark(edges=len(batches) + 1)
+        progress.add(edges_written=edge_writer.rows_written)
+        current_app.logger.info(f"  -> Re-linked {len(dependent_edges)} dependent files.")
+    current_app.logger.info("✅ Phase 4 Complete. Relationships written.")
+
+
+def _run_code_pipeline(kg_manager, vector_store_manager, data_source_id: str, commit: git.Commit, python_files: list[str],
+                       checkpoint: IngestionCheckpoint, progress: IngestionProgress, seed_from_graph: bool, dependent_file_paths=()):
+    """
+    Phases 3-5 in this process, as a streaming pipeline. File and Directory nodes must already be written.
+
+    Python files are processed in sorted batches of the checkpoint's `batch_files`. Each parsed batch
+    flows from the parser (this thread) into two concurrent stages, the code-node writer and the
+    embedder, each behind a bounded queue. Relationships need every definition in the symbol table
+    and every node in the graph, so they are written once parsing is done and the node stage has
+    drained, while the embedder keeps working in the background. Until then only each file's
+    FileEdges is kept; a batch's full parse results are dropped once both stages are done with it.
+    Every batch is parsed on the same process pool.
+
+    Every completed batch advances that stage's watermark in `checkpoint`. On a resumed run, every
+    batch is still parsed (the parse cache makes that cheap) to rebuild the symbol table, but only
+    batches past each watermark are written or embedded again.
+    """
+    batches = _batches(python_files, checkpoint.get("batch_files"))
+    nodes_done, edges_done, embeddings_done = checkpoint.get("nodes", 0), checkpoint.get("edges", 0), checkpoint.get("embeddings", 0)
+    if nodes_done or edges_done or embeddings_done:
+        current_app.logger.info(f"Resuming from checkpoint: {nodes_done} node, {edges_done} edge and {embeddings_done} embedding batches of {len(batches)} already done.")
+
+    symbol_table = _build_symbol_table(kg_manager, data_source_id, seed_from_graph)
+    file_edges = {}
+    defined_names = set()
+    node_writer = kg_manager.batch_writer()
+
+    def write_nodes(item):
+        index, batch, batch_parsed_files = item
+        rows_before = node_writer.rows_written
+        with timed_phase("node_write") as phase:
+            _write_code_nodes(node_writer, data_source_id, batch_parsed_files)
+            node_writer.flush()
+            phase.add(node_writer.rows_written - rows_before)
+        checkpoint.mark(nodes=index + 1)
+        progress.add(files_written=len(batch), nodes_written=node_writer.rows_written - rows_before)
+
+    def embed(item):
+        index, batch, batch_parsed_files = item
+        chunks = _embed_parsed_files(vector_store_manager, data_source_id, batch_parsed_files)
+        checkpoint.mark(embeddings=index + 1)
+        progress.add(files_embedded=len(batch), chunks_embedded=chunks)
+
+    with _ParseSession() as parse_session, PipelineStage("graph-nodes", write_nodes) as node_stage, PipelineStage("embeddings", embed) as embedding_stage:
+        current_app.logger.info(f"Phase 3: Parsing {len(python_files)} files in {len(batches)} batches, with graph nodes and embeddings streaming behind it...")
+        progress.set_phase("parsing", files_total=len(python_files))
+        for index, batch in enumerate(batches):
+            batch_parsed_files = parse_session.parse_files(commit, batch)
+            for relative_file_path, parsed_file in batch_parsed_files.items():
+                symbol_table.add_parsed_file(relative_file_path, parsed_file)
+                file_edges[relative_file_path] = FileEdges.from_parsed_file(parsed_file)
+                defined_names |= _defined_names(parsed_file)
+            progress.add(files_parsed=len(batch))
+            # Batches finished by an earlier attempt count as done, so the completion and ETA stay honest.
+            if index >= nodes_done:
+                node_stage.put((index, batch, batch_parsed_files))
+            else:
+                progress.add(files_written=len(batch))
+            if index >= embeddings_done:
+                embedding_stage.put((index, batch, batch_parsed_files))
+            else:
+                progress.add(files_embedded=len(batch))
+        current_app.logger.info(f"✅ Phase 3 Complete. Parsed {len(file_edges)} Python files.")
+
+        progress.set_phase("writing nodes")
+        node_stage.finish()
+        current_app.logger.info(f"  -> Code nodes written ({node_writer.rows_written} rows in {node_writer.transactions} transactions).")
+
+        _write_relationship_batches(kg_manager, parse_session, data_source_id, commit, batches, file_edges, symbol_table, checkpoint, progress,
+                                    dependent_file_paths, defined_names)
+
+        progress.set_phase("embedding")
+        embedding_stage.finish()
+        current_app.logger.info("✅ Phase 5 Complete. Vector DB populated.")
+
+
+def _dispatch_shards(data_source_id: str, commit_sha: str, python_files: list[str], checkpoint: IngestionCheckpoint, dependent_file_paths=()):
+    """
+    Phases 3-5 across the worker fleet: a chord of ingest_shard tasks, one per INGESTION_SHARD_FILES
+    consecutive files of the sorted file list (so a shard covers whole directory subtrees where it can),
+    followed by link_ingestion_shards, which writes the cross-shard relationships and finalizes the
+    data source. Shards already completed by an earlier attempt of this run are not dispatched again.
+
+    Returns the link task's id and, for status polling, each dispatched shard's task id and file count.
+    """
+    if not checkpoint.get("shard_files"):
+        checkpoint.mark(shard_files=current_app.config.get('INGESTION_SHARD_FILES', 500))
+    shards = _batches(python_files, checkpoint.get("shard_files"))
+    pending = [index for index in range(len(shards)) if not checkpoint.get(f"shard_{index}")]
+    current_app.logger.info(f"Dispatching {len(pending)} of {len(shards)} ingestion shards for {len(python_files)} Python files.")
+
+    callback = link_ingestion_shards.s(data_source_id, commit_sha, python_files, list(dependent_file_paths))
+    callback.on_error(mark_ingestion_failed.si(data_source_id))
+    if not pending:
+        return {"link_task_id": callback.delay([]).id, "shard_tasks": []}
+    shard_signatures = [ingest_shard.s(data_source_id, commit_sha, index, shards[index]).set(task_id=uuid()) for index in pending]
+    link_result = chord(group(shard_signatures))(callback)
+    return {
+        "link_task_id": link_result.id,
+        "shard_tasks": [{"task_id": signature.id, "files": len(shards[index])} for index, signature in zip(pending, shard_signatures)],
+    }
+
+
+def _process_code_files(kg_manager, vector_store_manager, data_source_id: str, commit: git.Commit, relative_file_paths,
+                        checkpoint: IngestionCheckpoint, progress: IngestionProgress, seed_from_graph: bool, dependent_file_paths=()):
+    """
+    Runs phases 3-5 for the given files: in this task, or, for at least INGESTION_SHARD_MIN_FILES
+    Python files, fanned out across workers. Returns _dispatch_shards' task ids in the latter case, else None.
+    """
+    python_files = sorted(path for path in relative_file_paths if path.endswith('.py'))
+    shard_min_files = current_app.config.get('INGESTION_SHARD_MIN_FILES', 0)
+    if checkpoint.get("sharded") or (shard_min_files and len(python_files) >= shard_min_files):
+        checkpoint.mark(sharded=True)
+        progress.set_phase("dispatching shards", files_total=len(python_files))
+        return _dispatch_shards(data_source_id, commit.hexsha, python_files, checkpoint, dependent_file_paths)
+    _run_code_pipeline(kg_manager, vector_store_manager, data_source_id, commit, python_files, checkpoint, progress, seed_from_graph, dependent_file_paths)
+    return None
+
+
+def _diff_commits(repo: git.Repo, old_commit_sha: str, new_commit_sha: str) -> tuple[set, set]:
+    """
+    Returns (changed, deleted) repo-relative paths between two commits.
+    Renames count as a delete of the old path plus an add of the new one.
+    """
+    changed, deleted = set(), set()
+    for diff in repo.commit(old_commit_sha).diff(new_commit_sha):
+        if diff.change_type == 'A':
+            changed.add(diff.b_path)
+        elif diff.change_type == 'D':
+            deleted.add(diff.a_path)
+        elif diff.change_type == 'R':
+            deleted.add(diff.a_path)
+            changed.add(diff.b_path)
+        else: # 'M' (content) and 'T' (type change)
+            changed.add(diff.b_path)
+    changed = {p for p in changed if not _is_ignored(p)}
+    deleted = {p for p in deleted if not _is_ignored(p)}
+    return changed, deleted
+
+
+def _run_full_ingestion(kg_manager, vector_store_manager, data_source_id: str, commit: git.Commit, checkpoint: IngestionCheckpoint, progress: IngestionProgress):
+    if not checkpoint.get("cleared"):
+        progress.set_phase("clearing")
+        current_app.logger.info(f"Clearing any existing data for data source {data_source_id}...")
+        with timed_phase("clear"):
+            kg_manager.clear_data_source_data(data_source_id)
+            vector_store_manager.clear_data_source_data(data_source_id)
+        checkpoint.mark(cleared=True)
+        current_app.logger.info(f"✅ Data cleared.")
+
+    # --- Directory Graph Construction (tree objects only, no file contents) ---
+    python_files = []
+    progress.set_phase("walking")
+    with timed_phase("walk") as phase, kg_manager.batch_writer() as graph_writer:
+        write_directories = not checkpoint.get("directories")
+        if write_directories:
+            current_app.logger.info("Writing the directory graph...")
+            graph_writer.add_directory_node(data_source_id, '.')
+        for item in _walk_tree(commit):
+            parent_dir_path = posixpath.dirname(item.path) or '.'
+            if item.type == 'tree':
+                if write_directories:
+                    graph_writer.add_directory_node(data_source_id, item.path)
+                    graph_writer.link_directory_to_child(data_source_id, parent_dir_path, item.path, 'Directory')
+            else:
+                if write_directories:
+                    graph_writer.add_file_node(data_source_id, item.path)
+                    graph_writer.link_directory_to_child(data_source_id, parent_dir_path, item.path, 'File')
+                python_files.append(item.path)
+                progress.add(files_walked=1)
+                phase.add(1)
+    if write_directories:
+        checkpoint.mark(directories=True)
+        current_app.logger.info(f"✅ Directory graph written ({graph_writer.rows_written} rows).")
+
+    # --- Parsing, Deep Intelligence graph and Vector DB population ---
+    return _process_code_files(kg_manager, vector_store_manager, data_source_id, commit, python_files, checkpoint, progress, seed_from_graph=False)
+
+
+def _run_incremental_ingestion(kg_manager, vector_store_manager, data_source_id: str, commit: git.Commit, changed: set, deleted: set,
+                               checkpoint: IngestionCheckpoint, progress: IngestionProgress):
+    current_app.logger.info(f"Incremental sync: {len(changed)} added/modified and {len(deleted)} deleted files.")
+    progress.add(files_walked=len(changed))
+    purged = sorted(changed | deleted)
+
+    # --- 3. Purge the diff from the graph and the vector index ---
+    if not checkpoint.get("purged"):
+        progress.set_phase("purging")
+        # Edges into the purged files come from files we are not re-parsing. Remember them before they
+        # vanish, durably, because a resumed run can't find them in the graph anymore.
+        if checkpoint.get("dependent_files") is None:
+            dependent_files = set(kg_manager.find_dependent_files(data_source_id, purged)) - changed - deleted
+            checkpoint.mark(dependent_files=sorted(dependent_files))
+        with timed_phase("purge", items=len(purged)):
+            kg_manager.delete_file_entities(data_source_id, purged)
+            kg_manager.delete_file_nodes(data_source_id, sorted(deleted))
+            vector_store_manager.delete_file_vectors(data_source_id, purged)
+        checkpoint.mark(purged=True)
+    dependent_files = checkpoint.get("dependent_files")
+
+    if not checkpoint.get("directories"):
+        with timed_phase("walk", items=len(changed)), kg_manager.batch_writer() as graph_writer:
+            for relative_file_path in sorted(changed):
+                parents = _parent_directories(relative_file_path)
+                graph_writer.add_directory_node(data_source_id, parents[0])
+                for parent_dir, child_dir in zip(parents, parents[1:]):
+                    graph_writer.add_directory_node(data_source_id, child_dir)
+                    graph_writer.link_directory_to_child(data_source_id, parent_dir, child_dir, 'Directory')
+                graph_writer.add_file_node(data_source_id, relative_file_path)
+                graph_writer.link_directory_to_child(data_source_id, parents[-1], relative_file_path, 'File')
+        checkpoint.mark(directories=True)
+
+    # --- 4. Re-create nodes for the diff, re-link everything that touched it, re-embed only the changed files ---
+    # Unchanged files aren't re-parsed, so their definitions come from the graph (already purged of the diff).
+    return _process_code_files(kg_manager, vector_store_manager, data_source_id, commit, changed, checkpoint, progress, seed_from_graph=True, dependent_file_paths=dependent_files)
+
+
+def _open_commit(data_source: DataSource, commit_sha: str) -> tuple[RepoMirrorCache, git.Repo]:
+    """
+    Returns this host's mirror of the data source, fetching (or cloning) it first if it doesn't
+    have `commit_sha` yet. Shards and the link callback may run on other hosts than the coordinator.
+    """
+    repo_cache = RepoMirrorCache()
+    repo = repo_cache.get_mirror(data_source.id)
+    if repo is None or not repo_cache.has_commit(repo, commit_sha):
+        with timed_phase("clone"):
+            repo = repo_cache.ensure_mirror(data_source.id, build_clone_url(data_source.connection_details.get('repo_full_name')))
+    return repo_cache, repo
+
+
+def _start_run(task, task_name: str, data_source_id: str, **fields) -> tuple[IngestionRun, IngestionMetrics]:
+    """Records the start of an ingestion task in ingestion_runs and starts collecting its metrics."""
+    run = IngestionRun(data_source_id=data_source_id, task_id=task.request.id, task_name=task_name, attempt=task.request.retries, **fields)
+    db.session.add(run)
+    db.session.commit()
+    metrics = IngestionMetrics()
+    start_collecting(metrics)
+    return run, metrics
+
+
+def _finish_run(run: IngestionRun, metrics: IngestionMetrics, progress: IngestionProgress, status: str, error: Exception | None = None, **fields):
+    """
+    Stores the outcome, phase timings, call statistics and final progress counters of a run.
+    Failing to record them is logged, never raised: the ingestion's own outcome matters more.
+    """
+    stop_collecting(metrics)
+    try:
+        db.session.rollback() # A failed run may have left the session unusable.
+        finished_at = datetime.utcnow()
+        run.status = status
+        run.error = str(error) if error is not None else None
+        run.metrics = {**metrics.to_dict(), "counters": progress.snapshot()}
+        run.finished_at = finished_at
+        run.duration_seconds = (finished_at - run.started_at).total_seconds()
+        for name, value in fields.items():
+            setattr(run, name, value)
+        db.session.commit()
+        phase_summary = ", ".join(f"{name}={phase['seconds']}s" for name, phase in run.metrics["phases"].items())
+        current_app.logger.info(f"📊 Ingestion run {run.id} ({run.task_name}) {status} in {run.duration_seconds:.1f}s. Phases: {phase_summary or 'none'}.")
+    except Exception as record_error:
+        db.session.rollback()
+        current_app.logger.warning(f"Could not record ingestion run {run.id}: {record_error}")
+
+
+def _finalize_ingestion(data_source: DataSource, commit_sha: str):
+    data_source.status = 'indexed'
+    data_source.last_indexed_at = datetime.utcnow()
+    data_source.last_indexed_commit = commit_sha
+    # The checkpoint was written outside this session, so force the column into the UPDATE.
+    data_source.ingestion_checkpoint = None
+    flag_modified(data_source, 'ingestion_checkpoint')
+    db.session.add(data_source)
+    db.session.commit()
+    current_app.logger.info(f"✅ Set data source {data_source.id} status to 'indexed'. All phases complete!")
+    # Cached answers and Cypher results are keyed by the index revision, so they're already unreachable; this frees them.
+    try:
+        answer_cache.invalidate(data_source.id)
+        invalidate_cypher_cache(data_source.id)
+    except Exception as invalidate_error:
+        current_app.logger.warning(f"Could not invalidate cached answers for data source {data_source.id}: {invalidate_error}")
+
+
+def _mark_failed(data_source_id: str):
+    db.session.rollback()
+    data_source_to_fail = db.session.get(DataSource, data_source_id)
+    if data_source_to_fail:
+        data_source_to_fail.status = 'failed'
+        db.session.add(data_source_to_fail)
+        db.session.commit()
+
+
+def _retry_or_fail(task, data_source_id: str, error: Exception):
+    """Retries `task` (up to INGESTION_MAX_RETRIES times, resuming from the checkpoint), else marks the data source failed and re-raises."""
+    db.session.rollback()
+    max_retries = current_app.config.get('INGESTION_MAX_RETRIES', 0)
+    if task.request.retries < max_retries:
+        raise task.retry(exc=error, countdown=current_app.config.get('INGESTION_RETRY_DELAY_SECONDS', 60), max_retries=max_retries)
+    _mark_failed(data_source_id)
+    raise error
+
+
+def _invalidate_graph_schema_safely(data_source_id: str):
+    # Whether it completed or not, ingestion may have changed labels, properties or relationships.
+    try:
+        invalidate_graph_schema(data_source_id)
+    except Exception as invalidate_error:
+        current_app.logger.warning(f"Could not invalidate graph schema cache: {invalidate_error}")
+
 
 @celery_app.task(bind=True)
-def process_data_source_for_ai(self, data_source_id: str):
-    current_app.logger.info(f"🚀 Task {self.request.id}: Starting processing for data source: {data_source_id}")
+def process_data_source_for_ai(self, data_source_id: str, incremental: bool = False):
+    """
+    Ingests a repository into the knowledge graph and vector index.
+
+    With `incremental=True` and a previously indexed commit available, only the files changed
+    between that commit and the new HEAD are purged, re-parsed, re-linked and re-embedded.
+    Otherwise (or if the old commit is no longer reachable) the data source is rebuilt from scratch.
+
+    Progress is checkpointed on the DataSource row. A failed run is retried up to
+    INGESTION_MAX_RETRIES times, and any later run towards the same commit resumes from the checkpoint.
+    Large runs are fanned out as a chord of ingest_shard tasks; link_ingestion_shards then finalizes them.
+    """
+    current_app.logger.info(f"🚀 Task {self.request.id}: Starting processing for data source: {data_source_id} (incremental={incremental})")
     data_source = db.session.get(DataSource, data_source_id)
     if not data_source:
         current_app.logger.error(f"Task failed: Data source {data_source_id} not found.")
@@ -22,177 +655,204 @@ def process_data_source_for_ai(self, data_source_id: str):
 
     kg_manager = None
     vector_store_manager = None
-    local_repo_path = os.path.join(current_app.config['REPO_CLONE_PATH'], data_source_id)
+    dispatched = None
+    progress = IngestionProgress(self, data_source_id)
+    run, metrics = _start_run(self, "ingest", data_source_id)
+    run_fields = {}
 
     try:
         # --- 1. Setup Phase ---
         kg_manager = KnowledgeGraphManager()
+        kg_manager.ensure_schema()
         vector_store_manager = VectorStoreManager()
-        current_app.logger.info(f"Clearing any existing data for data source {data_source_id}...")
-        kg_manager.clear_data_source_data(data_source_id)
-        vector_store_manager.clear_data_source_data(data_source_id)
-        current_app.logger.info(f"✅ Data cleared.")
 
         # --- 2. Code Fetching Phase ---
         repo_full_name = data_source.connection_details.get('repo_full_name')
         if not repo_full_name:
             raise ValueError("GitHub repo_full_name not found in connection_details.")
-        clone_url = f"https://{current_app.config.get('GITHUB_PAT')}@github.com/{repo_full_name}.git"
-        if os.path.exists(local_repo_path):
-            shutil.rmtree(local_repo_path)
-        current_app.logger.info(f"Cloning '{repo_full_name}'...")
-        git.Repo.clone_from(clone_url, local_repo_path)
-        current_app.logger.info(f"✅ Cloning successful.")
-        
-        # --- 3. Parsing & Directory Graph Construction ---
-        current_app.logger.info("Phase 3: Starting AST parsing and directory graph construction...")
-        parsed_files = {}
-
-        for root, dirs, files in os.walk(local_repo_path, topdown=True):
-            if any(d in root.split(os.sep) for d in ['.git', '__pycache__', 'node_modules', 'venv']):
-                continue
-            
-            relative_dir_path = os.path.relpath(root, local_repo_path)
-            if relative_dir_path == '.': # Ensure root directory is handled correctly
-                kg_manager.add_directory_node(data_source_id, relative_dir_path)
-
-            for dir_name in dirs:
-                relative_child_dir_path = os.path.join(relative_dir_path, dir_name)
-                kg_manager.add_directory_node(data_source_id, relative_child_dir_path)
-                kg_manager.link_directory_to_child(data_source_id, relative_dir_path, relative_child_dir_path, 'Directory')
-
-            for file_name in files:
-                relative_file_path = os.path.relpath(os.path.join(root, file_name), local_repo_path)
-                kg_manager.add_file_node(data_source_id, relative_file_path)
-                kg_manager.link_directory_to_child(data_source_id, relative_dir_path, relative_file_path, 'File')
-
-                if file_name.endswith('.py'):
-                    try:
-                        with open(os.path.join(root, file_name), 'r', encoding='utf-8', errors='ignore') as f:
-                            content = f.read()
-                            parsed_data = parse_python_file(content)
-                            if parsed_data:
-                                parsed_files[relative_file_path] = parsed_data
-                    except Exception as parse_error:
-                        current_app.logger.warning(f"Could not parse file {relative_file_path}: {parse_error}")
-        
-        current_app.logger.info(f"✅ Phase 3 Complete. Parsed {len(parsed_files)} Python files.")
-
-
-        # --- 4. Deep Intelligence Graph Population (Two-Pass System) ---
-        current_app.logger.info("Phase 4: Starting Deep Intelligence graph population...")
-
-        # -- PASS 1: Create all nodes (Files, Classes, Functions) --
-        current_app.logger.info("  -> Pass 1: Creating nodes...")
-        for file_path, data in parsed_files.items():
-            # Create Class nodes
-            for class_data in data.get("classes", []):
-                kg_manager.add_class_node(
-                    data_source_id=data_source_id,
-                    file_path=file_path,
-                    class_name=class_data["name"],
-                    docstring=class_data["docstring"],
-                    base_classes=class_data["base_classes"]
-                )
-                # Create Method nodes (as functions linked to the class)
-                for method_data in class_data.get("methods", []):
-                    kg_manager.add_function_node(
-                        data_source_id=data_source_id,
-                        file_path=file_path,
-                        function_name=method_data["name"],
-                        docstring=method_data["docstring"],
-                        class_name=class_data["name"]
-                    )
-            # Create standalone Function nodes
-            for func_data in data.get("functions", []):
-                kg_manager.add_function_node(
-                    data_source_id=data_source_id,
-                    file_path=file_path,
-                    function_name=func_data["name"],
-                    docstring=func_data["docstring"]
-                )
+        repo_cache = RepoMirrorCache()
+        progress.set_phase("fetching")
+        current_app.logger.info(f"Updating mirror of '{repo_full_name}'...")
+        with timed_phase("clone"):
+            repo = repo_cache.ensure_mirror(data_source_id, build_clone_url(repo_full_name))
 
-        # -- PASS 2: Create all relationships (Imports, Calls) --
-        current_app.logger.info("  -> Pass 2: Creating relationships...")
-        for file_path, data in parsed_files.items():
-            # Create IMPORT relationships
-            for imp in data.get("imports", []):
-                kg_manager.add_import_relationship(
-                    data_source_id=data_source_id,
-                    file_path=file_path,
-                    module=imp.get("module"),
-                    name=imp.get("name"),
-                    asname=imp.get("asname")
-                )
-            # Create CALLS relationships for standalone functions
-            for func_data in data.get("functions", []):
-                for call in func_data.get("calls", []):
-                    kg_manager.add_call_relationship(data_source_id, func_data["name"], file_path, call)
-            # Create CALLS relationships for methods within classes
-            for class_data in data.get("classes", []):
-                for method_data in class_data.get("methods", []):
-                    for call in method_data.get("calls", []):
-                        kg_manager.add_call_relationship(data_source_id, method_data["name"], file_path, call)
-        
-        current_app.logger.info("✅ Phase 4 Complete. Deep Intelligence graph populated.")
-
-        
-        # --- 5. Vector DB Population (Semantic Layer) ---
-        current_app.logger.info("Phase 5: Starting Vector DB population for semantic search...")
-        text_chunks_for_embedding = []
-        metadatas_for_embedding = []
-
-        for file_path, data in parsed_files.items():
-            # Add standalone functions
-            for func_data in data.get("functions", []):
-                text_chunk = (
-                    f"Function: {func_data['name']}\n"
-                    f"File: {file_path}\n"
-                    f"Arguments: {', '.join(func_data['args']) if func_data['args'] else 'None'}\n"
-                    f"Documentation:\n{func_data['docstring']}"
-                )
-                text_chunks_for_embedding.append(text_chunk)
-                metadatas_for_embedding.append({"file_path": file_path, "function_name": func_data["name"], "type": "function"})
-            # Add class methods
-            for class_data in data.get("classes", []):
-                 for method_data in class_data.get("methods", []):
-                    text_chunk = (
-                        f"Method: {class_data['name']}.{method_data['name']}\n"
-                        f"File: {file_path}\n"
-                        f"Arguments: {', '.join(method_data['args']) if method_data['args'] else 'None'}\n"
-                        f"Documentation:\n{method_data['docstring']}"
+        with repo_cache.pinned(data_source_id):
+            head_commit = repo.head.commit
+            head_commit_sha = head_commit.hexsha
+            current_app.logger.info(f"✅ Mirror up to date. HEAD is {head_commit_sha}.")
+
+            previous_commit_sha = data_source.last_indexed_commit
+            existing_checkpoint = data_source.ingestion_checkpoint
+            diff = None
+            if incremental and previous_commit_sha:
+                try:
+                    diff = _diff_commits(repo, previous_commit_sha, head_commit_sha)
+                except (ValueError, git.BadName, git.GitCommandError) as diff_error:
+                    # e.g. a force-push removed the old commit from history.
+                    current_app.logger.warning(f"Cannot diff against last indexed commit {previous_commit_sha}: {diff_error}. Falling back to full ingestion.")
+            mode = "full" if diff is None else "incremental"
+
+            if existing_checkpoint and not IngestionCheckpoint.matches(existing_checkpoint, head_commit_sha, mode, previous_commit_sha) and mode == "incremental":
+                # An unfinished run towards another target left the graph partially written; a diff can't repair that.
+                current_app.logger.warning(f"Found an unfinished {existing_checkpoint.get('mode')} run towards {existing_checkpoint.get('commit')}. Falling back to full ingestion.")
+                mode = "full"
+            run_fields = {"mode": mode, "commit_sha": head_commit_sha}
+
+            if mode == "incremental" and previous_commit_sha == head_commit_sha and not existing_checkpoint:
+                current_app.logger.info(f"Data source {data_source_id} is already indexed at {head_commit_sha}. Nothing to do.")
+            else:
+                base_commit_sha = previous_commit_sha if mode == "incremental" else None
+                if IngestionCheckpoint.matches(existing_checkpoint, head_commit_sha, mode, base_commit_sha):
+                    current_app.logger.info(f"Resuming the unfinished {mode} ingestion of {head_commit_sha}.")
+                    checkpoint = IngestionCheckpoint(data_source_id, existing_checkpoint)
+                else:
+                    checkpoint = IngestionCheckpoint.start(
+                        data_source_id, head_commit_sha, mode, base_commit_sha,
+                        batch_files=current_app.config.get('INGESTION_CHECKPOINT_BATCH_FILES', 200)
                     )
-                    text_chunks_for_embedding.append(text_chunk)
-                    metadatas_for_embedding.append({"file_path": file_path, "function_name": method_data["name"], "type": "method", "class_name": class_data["name"]})
 
-        if text_chunks_for_embedding:
-            current_app.logger.info(f"Generating embeddings for {len(text_chunks_for_embedding)} code chunks...")
-            vector_store_manager.generate_and_store_embeddings(
-                text_chunks=text_chunks_for_embedding,
-                metadatas=metadatas_for_embedding,
-                data_source_id=data_source_id
-            )
-        current_app.logger.info("✅ Phase 5 Complete. Vector DB populated.")
+                if mode == "full":
+                    dispatched = _run_full_ingestion(kg_manager, vector_store_manager, data_source_id, head_commit, checkpoint, progress)
+                else:
+                    changed, deleted = diff
+                    dispatched = _run_incremental_ingestion(kg_manager, vector_store_manager, data_source_id, head_commit, changed, deleted, checkpoint, progress)
+
+        if dispatched is not None:
+            # The link callback finalizes the data source once every shard is done.
+            _finish_run(run, metrics, progress, "dispatched", **run_fields)
+            return {"status": "dispatched", "message": f"Ingestion of {data_source.name} fanned out across workers.",
+                    **dispatched, "progress": progress.snapshot()}
 
         # --- 6. Finalize and Update Status ---
-        data_source.status = 'indexed'
-        data_source.last_indexed_at = datetime.utcnow()
-        db.session.add(data_source)
-        db.session.commit()
-        current_app.logger.info(f"✅ Set data source {data_source_id} status to 'indexed'. All phases complete!")
-        return {"status": "completed", "message": f"Data source {data_source.name} processed successfully."}
+        progress.set_phase("finalizing")
+        _finalize_ingestion(data_source, head_commit_sha)
+        _finish_run(run, metrics, progress, "completed", **run_fields)
+        return {"status": "completed", "message": f"Data source {data_source.name} processed successfully.", "progress": progress.snapshot()}
 
     except Exception as e:
         current_app.logger.error(f"❌ Task failed for data source {data_source_id}: {e}", exc_info=True)
-        data_source_to_fail = db.session.get(DataSource, data_source_id)
-        if data_source_to_fail:
-            data_source_to_fail.status = 'failed'
-            db.session.add(data_source_to_fail)
-            db.session.commit()
-        raise e
+        _finish_run(run, metrics, progress, "failed", error=e, **run_fields)
+        # The ingestion checkpoint (if any) stays in place: the retry, or the next sync/reindex, resumes from it.
+        _retry_or_fail(self, data_source_id, e)
     finally:
         if kg_manager:
             kg_manager.close()
-        if os.path.exists(local_repo_path):
-            shutil.rmtree(local_repo_path)
-            current_app.logger.info(f"Cleaned up cloned repo at {local_repo_path}")
\ No newline at end of file
+            # A fanned-out run is still writing; link_ingestion_shards invalidates once it is done.
+            if dispatched is None:
+                _invalidate_graph_schema_safely(data_source_id)
+
+
+@celery_app.task(bind=True)
+def ingest_shard(self, data_source_id: str, commit_sha: str, shard_index: int, relative_file_paths: list[str]):
+    """
+    One shard of a fanned-out ingestion: parses its files, writes their code nodes and embeds them.
+    Relationships are left to link_ingestion_shards, which sees every shard's definitions.
+    """
+    current_app.logger.info(f"🧩 Task {self.request.id}: Shard {shard_index} of data source {data_source_id} ({len(relative_file_paths)} files).")
+    data_source = db.session.get(DataSource, data_source_id)
+    if not data_source:
+        return {"shard": shard_index, "status": "skipped", "message": "Data source not found"}
+
+    progress = IngestionProgress(self, data_source_id, file_stages=("files_parsed", "files_written", "files_embedded"))
+    run, metrics = _start_run(self, "shard", data_source_id, commit_sha=commit_sha)
+
+    def embed(files):
+        progress.add(files_embedded=len(relative_file_paths), chunks_embedded=_embed_parsed_files(vector_store_manager, data_source_id, files))
+
+    kg_manager = None
+    try:
+        kg_manager = KnowledgeGraphManager()
+        vector_store_manager = VectorStoreManager()
+        progress.set_phase("parsing", files_total=len(relative_file_paths))
+        repo_cache, repo = _open_commit(data_source, commit_sha)
+        with repo_cache.pinned(data_source_id), _ParseSession() as parse_session:
+            parsed_files = parse_session.parse_files(repo.commit(commit_sha), relative_file_paths)
+        progress.add(files_parsed=len(relative_file_paths))
+
+        progress.set_phase("writing nodes")
+        with kg_manager.batch_writer() as graph_writer, PipelineStage("embeddings", embed) as embedding_stage:
+            # Node writes overlap with embedding.
+            embedding_stage.put(parsed_files)
+            with timed_phase("node_write") as phase:
+                _write_code_nodes(graph_writer, data_source_id, parsed_files)
+                graph_writer.flush()
+                phase.add(graph_writer.rows_written)
+            progress.add(files_written=len(relative_file_paths), nodes_written=graph_writer.rows_written)
+            progress.set_phase("embedding")
+            embedding_stage.finish()
+
+        IngestionCheckpoint.merge_shared(data_source_id, **{f"shard_{shard_index}": True})
+        current_app.logger.info(f"✅ Shard {shard_index} of data source {data_source_id} complete.")
+        _finish_run(run, metrics, progress, "completed")
+        return {"shard": shard_index, "status": "completed", "files": len(parsed_files), "progress": progress.snapshot()}
+
+    except Exception as e:
+        current_app.logger.error(f"❌ Shard {shard_index} failed for data source {data_source_id}: {e}", exc_info=True)
+        _finish_run(run, metrics, progress, "failed", error=e)
+        max_retries = current_app.config.get('INGESTION_MAX_RETRIES', 0)
+        raise self.retry(exc=e, countdown=current_app.config.get('INGESTION_RETRY_DELAY_SECONDS', 60), max_retries=max_retries)
+    finally:
+        if kg_manager:
+            kg_manager.close()
+
+
+@celery_app.task(bind=True)
+def link_ingestion_shards(self, shard_results, data_source_id: str, commit_sha: str, python_files: list[str], dependent_file_paths: list[str]):
+    """
+    Chord callback of a fanned-out ingestion. Every shard's nodes exist now, so the full symbol table
+    can be built and the cross-shard CALLS / INHERITS_FROM relationships written. Then finalizes the data source.
+    Parse results come from this host's parse cache wherever a shard ran here (or an earlier run did);
+    only each file's FileEdges is kept for the relationship pass.
+    """
+    current_app.logger.info(f"🔗 Task {self.request.id}: Linking {len(shard_results)} shards of data source {data_source_id}.")
+    data_source = db.session.get(DataSource, data_source_id)
+    if not data_source:
+        return {"status": "failed", "message": "Data source not found"}
+
+    progress = IngestionProgress(self, data_source_id, file_stages=("files_parsed", "files_linked"))
+    run, metrics = _start_run(self, "link", data_source_id, commit_sha=commit_sha)
+
+    kg_manager = None
+    try:
+        kg_manager = KnowledgeGraphManager()
+        checkpoint = IngestionCheckpoint(data_source_id, data_source.ingestion_checkpoint or {})
+        progress.set_phase("parsing", files_total=len(python_files))
+        repo_cache, repo = _open_commit(data_source, commit_sha)
+        with repo_cache.pinned(data_source_id), _ParseSession() as parse_session:
+            commit = repo.commit(commit_sha)
+            symbol_table = _build_symbol_table(kg_manager, data_source_id, seed_from_graph=checkpoint.get("mode") == "incremental")
+            batches = _batches(python_files, checkpoint.get("batch_files") or current_app.config.get('INGESTION_CHECKPOINT_BATCH_FILES', 200))
+            file_edges = {}
+            defined_names = set()
+            for batch in batches:
+                with timed_phase("parse") as phase:
+                    for relative_file_path, parsed_file in parse_session.iter_parsed_files(commit, batch):
+                        symbol_table.add_parsed_file(relative_file_path, parsed_file)
+                        file_edges[relative_file_path] = FileEdges.from_parsed_file(parsed_file)
+                        defined_names |= _defined_names(parsed_file)
+                        phase.add(1)
+                progress.add(files_parsed=len(batch))
+            _write_relationship_batches(kg_manager, parse_session, data_source_id, commit, batches, file_edges, symbol_table, checkpoint, progress,
+                                        dependent_file_paths, defined_names)
+
+        progress.set_phase("finalizing")
+        mode = checkpoint.get("mode")
+        _finalize_ingestion(data_source, commit_sha)
+        _finish_run(run, metrics, progress, "completed", mode=mode)
+        return {"status": "completed", "message": f"Data source {data_source.name} processed successfully.", "progress": progress.snapshot()}
+
+    except Exception as e:
+        current_app.logger.error(f"❌ Linking failed for data source {data_source_id}: {e}", exc_info=True)
+        _finish_run(run, metrics, progress, "failed", error=e)
+        _retry_or_fail(self, data_source_id, e)
+    finally:
+        if kg_manager:
+            kg_manager.close()
+        _invalidate_graph_schema_safely(data_source_id)
+
+
+@celery_app.task
+def mark_ingestion_failed(data_source_id: str):
+    """Error callback of a fanned-out ingestion: a shard failed for good. Its checkpoint stays for the next run to resume."""
+    current_app.logger.error(f"❌ Fanned-out ingestion failed for data source {data_source_id}.")
+    _mark_failed(data_source_id)
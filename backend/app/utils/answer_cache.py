@@ -0,0 +1,151 @@
+# backend/app/utils/answer_cache.py
+import hashlib
+import json
+import math
+import re
+import threading
+from cachetools import TTLCache
+from flask import current_app
+from .llm_pool import get_embedding_model
+from .redis_client import get_redis_client
+
+EMBEDDING_MODEL_NAME = "models/text-embedding-004"
+_REDIS_KEY_PREFIX = "answer"
+
+
+def normalize_query(query: str) -> str:
+    """Lower-cases, collapses whitespace and drops trailing punctuation, so trivially different phrasings share a key."""
+    return re.sub(r"\s+", " ", query or "").strip().lower().rstrip("?.!").strip()
+
+
+def _cosine_similarity(a: list[float], b: list[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+class AnswerCache:
+    """
+    Final answers of the chat agent, keyed by (data source, index revision, normalized decomposed query).
+
+    The process-local tier is a TTL + LRU cache (ANSWER_CACHE_TTL_SECONDS, ANSWER_CACHE_MAX_ENTRIES)
+    that also matches near-duplicate questions: when no exact key exists, the query's embedding is
+    compared with those of the cached questions for the same data source and revision, and the best
+    one at or above ANSWER_CACHE_SIMILARITY_THRESHOLD is a hit. When CACHE_REDIS_URL is set, exact
+    matches are also shared between processes through Redis.
+
+    The index revision changes on every completed ingestion, so answers never outlive the graph
+    they were derived from; invalidate() additionally frees a reindexed data source's entries.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = None
+        self._settings = None
+
+    def _local(self) -> TTLCache:
+        settings = (current_app.config.get('ANSWER_CACHE_MAX_ENTRIES', 1024), current_app.config.get('ANSWER_CACHE_TTL_SECONDS', 86400))
+        if self._entries is None or self._settings != settings:
+            self._entries = TTLCache(maxsize=settings[0], ttl=settings[1])
+            self._settings = settings
+        return self._entries
+
+    @staticmethod
+    def _redis_key(data_source_id: str, revision: str, normalized: str) -> str:
+        digest = hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+        return f"{_REDIS_KEY_PREFIX}:{data_source_id}:{revision}:{digest}"
+
+    def embed(self, query: str) -> list[float] | None:
+        """Embeds a query for similarity matching, or returns None when that's disabled or fails."""
+        threshold = current_app.config.get('ANSWER_CACHE_SIMILARITY_THRESHOLD', 0.95)
+        api_key = current_app.config.get('GEMINI_API_KEY')
+        if not api_key or not 0 < threshold < 1:
+            return None
+        try:
+            return get_embedding_model(EMBEDDING_MODEL_NAME, api_key).embed_query(query)
+        except Exception as e:
+            current_app.logger.warning(f"Answer cache: could not embed query, falling back to exact matching: {e}")
+            return None
+
+    def get(self, data_source_id: str, revision: str, query: str) -> str | None:
+        """The answer cached for exactly this (normalized) query, from this process or Redis."""
+        normalized = normalize_query(query)
+        key = (data_source_id, revision, normalized)
+        with self._lock:
+            entry = self._local().get(key)
+            if entry is not None:
+                return entry["answer"]
+
+        client = get_redis_client()
+        if client is not None:
+            try:
+                payload = client.get(self._redis_key(data_source_id, revision, normalized))
+                if payload is not None:
+                    answer = json.loads(payload)["answer"]
+                    with self._lock:
+                        self._local()[key] = {"embedding": None, "answer": answer}
+                    return answer
+            except Exception as e:
+                current_app.logger.warning(f"Answer cache: could not read from Redis: {e}")
+        return None
+
+    def _similarity_candidates(self, data_source_id: str, revision: str) -> list[tuple[list[float], str]]:
+        with self._lock:
+            return [
+                (entry["embedding"], entry["answer"])
+                for (entry_source, entry_revision, _), entry in self._local().items()
+                if entry_source == data_source_id and entry_revision == revision and entry["embedding"] is not None
+            ]
+
+    def has_similarity_candidates(self, data_source_id: str, revision: str) -> bool:
+        """False when no cached question of this data source and revision has an embedding, so embedding the query would be wasted."""
+        return bool(self._similarity_candidates(data_source_id, revision))
+
+    def get_similar(self, data_source_id: str, revision: str, embedding: list[float] | None) -> str | None:
+        """
+        The answer of the most similar cached question of this data source and revision, if it's at
+        least ANSWER_CACHE_SIMILARITY_THRESHOLD similar. The lock is only held while the candidates
+        are collected, not during the scan, so concurrent chat requests don't wait on each other.
+        """
+        if embedding is None:
+            return None
+        best_answer, best_score = None, current_app.config.get('ANSWER_CACHE_SIMILARITY_THRESHOLD', 0.95)
+        for candidate_embedding, answer in self._similarity_candidates(data_source_id, revision):
+            score = _cosine_similarity(embedding, candidate_embedding)
+            if score >= best_score:
+                best_answer, best_score = answer, score
+        return best_answer
+
+    def set(self, data_source_id: str, revision: str, query: str, answer: str, embedding: list[float] | None = None):
+        normalized = normalize_query(query)
+        with self._lock:
+            self._local()[(data_source_id, revision, normalized)] = {"embedding": embedding, "answer": answer}
+
+        client = get_redis_client()
+        if client is not None:
+            try:
+                client.set(
+                    self._redis_key(data_source_id, revision, normalized),
+                    json.dumps({"query": normalized, "answer": answer}),
+                    ex=current_app.config.get('ANSWER_CACHE_TTL_SECONDS', 86400)
+                )
+            except Exception as e:
+                current_app.logger.warning(f"Answer cache: could not write to Redis: {e}")
+
+    def invalidate(self, data_source_id: str):
+        """Drops every cached answer for a data source, in this process and in Redis."""
+        with self._lock:
+            if self._entries is not None:
+                for key in [key for key in self._entries.keys() if key[0] == data_source_id]:
+                    self._entries.pop(key, None)
+
+        client = get_redis_client()
+        if client is not None:
+            try:
+                keys = list(client.scan_iter(match=f"{_REDIS_KEY_PREFIX}:{data_source_id}:*", count=500))
+                if keys:
+                    client.delete(*keys)
+            except Exception as e:
+                current_app.logger.warning(f"Answer cache: could not invalidate Redis entries: {e}")
+
+
+answer_cache = AnswerCache()
@@ -0,0 +1,17 @@
+# backend/app/utils/index_revision.py
+from ..models.models import db, DataSource
+
+
+def get_index_revision(data_source_id: str) -> str | None:
+    """
+    Identifies the data source's current knowledge graph / vector index contents, for keying
+    caches of anything derived from them. Every completed ingestion (full, incremental or a
+    re-run of the same commit) produces a new revision, so such caches never outlive a reindex.
+
+    Returns None while the index isn't in a complete, settled state (never indexed, being
+    reindexed or failed half-way); callers shouldn't cache anything then.
+    """
+    data_source = db.session.get(DataSource, data_source_id)
+    if data_source is None or data_source.status != 'indexed' or data_source.last_indexed_at is None:
+        return None
+    return f"{data_source.last_indexed_commit or 'unknown'}@{data_source.last_indexed_at.isoformat()}"
@@ -0,0 +1,118 @@
+# backend/app/utils/ingestion_metrics.py
+import threading
+import time
+from contextlib import contextmanager
+
+# The collector of the ingestion run executing in this process, if any. It's process-wide rather
+# than thread-local because an ingestion's work is spread over pipeline stage threads and the
+# embedding/upsert executors; ingestion workers run one task per process.
+_active = None
+_active_lock = threading.Lock()
+
+
+class IngestionMetrics:
+    """
+    Wall time and item counts per ingestion phase, plus count and latency of every external call
+    (Neo4j, Pinecone, Gemini) made while the run was active.
+
+    Phase times are summed busy time: a phase entered once per batch accumulates, and phases that
+    run concurrently (node writes and embeddings stream behind parsing) overlap, so their times
+    don't add up to the run's duration.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._phases = {} # name -> [seconds, items, runs]
+        self._calls = {} # service -> [count, failures, total_seconds, max_seconds]
+
+    def record_phase(self, name: str, seconds: float, items: int = 0):
+        with self._lock:
+            phase = self._phases.setdefault(name, [0.0, 0, 0])
+            phase[0] += seconds
+            phase[1] += items
+            phase[2] += 1
+
+    def record_call(self, service: str, seconds: float, failed: bool = False):
+        with self._lock:
+            call = self._calls.setdefault(service, [0, 0, 0.0, 0.0])
+            call[0] += 1
+            call[1] += int(failed)
+            call[2] += seconds
+            call[3] = max(call[3], seconds)
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "phases": {
+                    name: {
+                        "seconds": round(seconds, 3),
+                        "items": items,
+                        "items_per_second": round(items / seconds, 2) if seconds > 0 and items else None,
+                        "runs": runs,
+                    }
+                    for name, (seconds, items, runs) in self._phases.items()
+                },
+                "calls": {
+                    service: {
+                        "count": count,
+                        "failures": failures,
+                        "total_seconds": round(total_seconds, 3),
+                        "avg_ms": round(1000 * total_seconds / count, 1) if count else None,
+                        "max_ms": round(1000 * max_seconds, 1),
+                    }
+                    for service, (count, failures, total_seconds, max_seconds) in self._calls.items()
+                },
+            }
+
+
+class _PhaseTimer:
+    def __init__(self, items: int):
+        self.items = items
+
+    def add(self, items: int):
+        self.items += items
+
+
+def start_collecting(metrics: IngestionMetrics):
+    """Makes `metrics` the process's active collector, until stop_collecting() or the next start_collecting()."""
+    global _active
+    with _active_lock:
+        _active = metrics
+
+
+def stop_collecting(metrics: IngestionMetrics):
+    global _active
+    with _active_lock:
+        if _active is metrics:
+            _active = None
+
+
+@contextmanager
+def timed_phase(name: str, items: int = 0):
+    """
+    Times the block as (one more run of) phase `name`. Yields a timer whose `add(n)` counts the
+    items the block processed. Without an active collector this is a no-op.
+    """
+    timer = _PhaseTimer(items)
+    started = time.perf_counter()
+    try:
+        yield timer
+    finally:
+        collector = _active
+        if collector is not None:
+            collector.record_phase(name, time.perf_counter() - started, timer.items)
+
+
+@contextmanager
+def track_call(service: str):
+    """Records the latency of one call to an external service (and whether it raised) with the active collector."""
+    started = time.perf_counter()
+    failed = False
+    try:
+        yield
+    except BaseException:
+        failed = True
+        raise
+    finally:
+        collector = _active
+        if collector is not None:
+            collector.record_call(service, time.perf_counter() - started, failed)
@@ -0,0 +1,112 @@
+# backend/app/utils/llm_pool.py
+import hashlib
+import threading
+import time
+from flask import current_app, has_app_context
+from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings, HarmBlockThreshold, HarmCategory
+
+# The agent and the utility tasks run with these relaxed safety settings; other callers keep the API defaults.
+RELAXED_SAFETY_SETTINGS = {
+    HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
+    HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
+    HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
+    HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
+}
+
+
+class LLMClientPool:
+    """
+    A thread-safe, process-wide registry of LLM clients.
+
+    Building a ChatGoogleGenerativeAI / GoogleGenerativeAIEmbeddings sets up a new gRPC channel,
+    which costs hundreds of milliseconds. Clients are keyed on everything that affects their
+    behaviour (kind, model, a hash of the API key, temperature and extra options) and reused
+    across requests, so their warm connections are too. Clients unused for
+    LLM_CLIENT_IDLE_TTL_SECONDS are dropped, and at most LLM_CLIENT_POOL_MAX_SIZE are kept;
+    dropped clients have their channel closed.
+    """
+    def __init__(self):
+        self._clients = {} # key -> [client, last_used]
+        self._lock = threading.Lock()
+
+    def _settings(self) -> tuple[float, int]:
+        if has_app_context():
+            return (current_app.config.get('LLM_CLIENT_IDLE_TTL_SECONDS', 900),
+                    current_app.config.get('LLM_CLIENT_POOL_MAX_SIZE', 32))
+        return 900, 32
+
+    @staticmethod
+    def _close(clients):
+        """Closes the gRPC channels of clients that left the pool. Called outside the lock."""
+        for client in clients:
+            transport = getattr(getattr(client, "client", None), "transport", None)
+            if transport is None:
+                continue
+            try:
+                transport.close()
+            except Exception as e:
+                if has_app_context():
+                    current_app.logger.warning(f"LLM pool: Could not close an evicted client: {e}")
+
+    def get(self, key: tuple, factory):
+        """Returns the pooled client for `key`, building it with `factory()` on a miss."""
+        idle_ttl, max_size = self._settings()
+        now = time.monotonic()
+        with self._lock:
+            evicted = [self._clients.pop(k)[0] for k, (_, last_used) in list(self._clients.items()) if now - last_used > idle_ttl]
+            entry = self._clients.get(key)
+            if entry is not None:
+                entry[1] = now
+        self._close(evicted)
+        if entry is not None:
+            return entry[0]
+
+        # Build outside the lock so a slow construction doesn't stall every other caller.
+        client = factory()
+        with self._lock:
+            entry = self._clients.setdefault(key, [client, now])
+            # Another thread built the same client first: keep theirs and close ours.
+            evicted = [client] if entry[0] is not client else []
+            # Never the client about to be returned, even if others were used after `now`.
+            while len(self._clients) > max(max_size, 1):
+                oldest_key = min((k for k in self._clients if k != key), key=lambda k: self._clients[k][1])
+                evicted.append(self._clients.pop(oldest_key)[0])
+        self._close(evicted)
+        return entry[0]
+
+    def clear(self):
+        with self._lock:
+            evicted = [client for client, _ in self._clients.values()]
+            self._clients.clear()
+        self._close(evicted)
+
+
+llm_client_pool = LLMClientPool()
+
+
+def _api_key_hash(api_key: str) -> str:
+    # Never keep raw keys in the registry's keys.
+    return hashlib.sha256((api_key or "").encode('utf-8')).hexdigest()
+
+
+def get_chat_model(model_id: str, api_key: str, temperature: float = 0, safety_settings: dict | None = None, **options) -> ChatGoogleGenerativeAI:
+    """
+    Returns a pooled ChatGoogleGenerativeAI. `safety_settings` (e.g. RELAXED_SAFETY_SETTINGS) are
+    only set when given, leaving the API's defaults otherwise. `options` are passed to the constructor.
+    """
+    safety_key = frozenset(safety_settings.items()) if safety_settings else None
+    key = ("chat", model_id, _api_key_hash(api_key), temperature, safety_key, tuple(sorted(options.items())))
+    if safety_settings:
+        options = {**options, "safety_settings": safety_settings}
+    return llm_client_pool.get(key, lambda: ChatGoogleGenerativeAI(
+        model=model_id,
+        google_api_key=api_key,
+        temperature=temperature,
+        **options
+    ))
+
+
+def get_embedding_model(model_name: str, api_key: str) -> GoogleGenerativeAIEmbeddings:
+    """Returns a pooled GoogleGenerativeAIEmbeddings client."""
+    key = ("embeddings", model_name, _api_key_hash(api_key))
+    return llm_client_pool.get(key, lambda: GoogleGenerativeAIEmbeddings(model=model_name, google_api_key=api_key))
@@ -3,7 +3,6 @@
 import os
 import json
 from flask import current_app
-from langchain_google_genai import ChatGoogleGenerativeAI, HarmBlockThreshold, HarmCategory
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder 
 from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
 from sqlalchemy.orm.exc import NoResultFound
@@ -12,9 +11,10 @@ from ..schemas.user_schema import UserFactSchema, UserFactsList, RepoSummarySche
 
 from ..models.models import db, ConfiguredModel, APIKey, ChatHistory, RepoConversationSummary, UserFact
 from .auth import decrypt_value
+from .llm_pool import RELAXED_SAFETY_SETTINGS, get_chat_model
 def get_llm_for_graph(state: dict):
     """
-    Initializes a ChatGoogleGenerativeAI instance for use within the LangGraph agent.
+    Returns a (pooled) ChatGoogleGenerativeAI instance for use within the LangGraph agent.
     
     It retrieves the model_id and api_key from the graph's state, which were 
     originally passed in from chat_routes.py. This makes the graph self-contained
@@ -33,18 +33,14 @@ def get_llm_for_graph(state: dict):
     
     if not api_key:
         raise ValueError("Missing Gemini API Key. Provide it in the agent state or as GEMINI_API_KEY env var.")
-        
-    return ChatGoogleGenerativeAI(
-        model=model_id,
-        google_api_key=api_key,
+
+    # Pooled, so the planner, every Cypher attempt and the synthesizer share one warm client.
+    return get_chat_model(
+        model_id,
+        api_key,
         temperature=0, # We want deterministic outputs for planning/reasoning
+        safety_settings=RELAXED_SAFETY_SETTINGS,
         convert_system_message_to_human=True, # Important for some models
-        safety_settings={
-            HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
-            HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
-            HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
-            HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
-        },
     )
 def _get_llm_for_utility_tasks():
     # ... (keep this function exactly as it is from the previous full code block)
@@ -87,17 +83,7 @@ def _get_llm_for_utility_tasks():
         if not configured_model:
             current_app.logger.warning(f"Celery Task (Internal LLM Init): Default LLM '{llm_model_id}' not found or active in ConfiguredModels. Using it directly with provided key.")
 
-        llm = ChatGoogleGenerativeAI(
-            model=llm_model_id,
-            google_api_key=llm_api_key,
-            temperature=0.3, # Consistent temperature
-            safety_settings={
-                HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
-            },
-        )
+        llm = get_chat_model(llm_model_id, llm_api_key, temperature=0.3, safety_settings=RELAXED_SAFETY_SETTINGS) # Consistent temperature
         current_app.logger.info(f"Celery Task (Internal LLM Init): LLM initialized with model {llm_model_id}.")
         return llm
 
@@ -0,0 +1,96 @@
+# backend/app/utils/rate_limiter.py
+import hashlib
+import os
+import random
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket. Holds up to `capacity` tokens and refills continuously at
+    `refill_per_second`. `acquire` blocks until the requested amount is available.
+    """
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = float(capacity)
+        self.refill_per_second = float(refill_per_second)
+        self._tokens = self.capacity
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.refill_per_second)
+        self._last_refill = now
+
+    def acquire(self, amount: float = 1.0):
+        # A request bigger than the bucket could never be served; let it through once the bucket is full.
+        amount = min(float(amount), self.capacity)
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                wait = (amount - self._tokens) / self.refill_per_second
+            time.sleep(wait)
+
+
+class RateLimiter:
+    """
+    Combines a requests-per-minute and a tokens-per-minute bucket, the two quotas the
+    Gemini APIs enforce. Either limit can be disabled by passing 0.
+    """
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int = 0):
+        self._request_bucket = TokenBucket(requests_per_minute, requests_per_minute / 60.0) if requests_per_minute else None
+        self._token_bucket = TokenBucket(tokens_per_minute, tokens_per_minute / 60.0) if tokens_per_minute else None
+
+    def acquire(self, tokens: int = 0):
+        if self._request_bucket:
+            self._request_bucket.acquire(1)
+        if self._token_bucket and tokens:
+            self._token_bucket.acquire(tokens)
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+_limiters_pid = None
+
+
+def get_rate_limiter(service: str, api_key: str | None, requests_per_minute: int, tokens_per_minute: int = 0) -> RateLimiter:
+    """
+    The process-wide RateLimiter for one service and API key (and limits), so the quota is
+    shared by every batch, shard and task running in this process instead of each call
+    starting with a full bucket. The key is only kept as a hash.
+    """
+    global _limiters_pid
+    key_hash = hashlib.sha256((api_key or "").encode('utf-8')).hexdigest()
+    limiter_key = (service, key_hash, requests_per_minute, tokens_per_minute)
+    with _limiters_lock:
+        if _limiters_pid != os.getpid():
+            # A forked child doesn't inherit the parent's quota usage (or a lock held mid-acquire).
+            _limiters.clear()
+            _limiters_pid = os.getpid()
+        limiter = _limiters.get(limiter_key)
+        if limiter is None:
+            limiter = _limiters[limiter_key] = RateLimiter(requests_per_minute, tokens_per_minute)
+        return limiter
+
+
+def call_with_retries(func, max_retries: int, base_delay: float = 1.0, max_delay: float = 60.0, on_retry=None):
+    """
+    Calls `func()` and retries on any exception, with exponential backoff and full jitter.
+    `on_retry(attempt, error, delay)` is called before each sleep. Re-raises the last error.
+    """
+    attempt = 0
+    while True:
+        try:
+            return func()
+        except Exception as e:
+            attempt += 1
+            if attempt > max_retries:
+                raise
+            delay = random.uniform(0, min(max_delay, base_delay * (2 ** (attempt - 1))))
+            if on_retry:
+                on_retry(attempt, e, delay)
+            time.sleep(delay)
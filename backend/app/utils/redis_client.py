@@ -0,0 +1,27 @@
+# backend/app/utils/redis_client.py
+import threading
+from flask import current_app
+
+try:
+    import redis
+except ImportError: # Redis-backed caching is optional; callers fall back to per-process caches.
+    redis = None
+
+_clients = {}
+_lock = threading.Lock()
+
+
+def get_redis_client():
+    """
+    Returns a shared Redis client for CACHE_REDIS_URL, or None when no URL is configured or the
+    redis package isn't installed. Clients are pooled per URL, so this is cheap to call per request.
+    """
+    url = current_app.config.get('CACHE_REDIS_URL')
+    if not url or redis is None:
+        return None
+    with _lock:
+        client = _clients.get(url)
+        if client is None:
+            client = redis.Redis.from_url(url, socket_timeout=2, socket_connect_timeout=2)
+            _clients[url] = client
+        return client
@@ -0,0 +1,182 @@
+# backend/app/utils/repo_cache.py
+import os
+import fcntl
+import shutil
+from contextlib import contextmanager
+import git
+from flask import current_app
+
+
+class RepoMirrorCache:
+    """
+    A persistent cache of bare repository mirrors under REPO_CLONE_PATH, one per data source.
+
+    Ingestion and the file reader share it: the first use clones, later uses only `git fetch`,
+    and file contents are read straight from the object database without a checkout.
+    Every mirror is guarded by an flock() so concurrent Celery workers and web workers on the
+    same host never fetch into (or evict) the same mirror at once. When the cache grows past
+    REPO_CACHE_MAX_BYTES, the least recently used mirrors are evicted.
+    """
+    def __init__(self, root_path: str | None = None, max_bytes: int | None = None):
+        self.root_path = root_path or os.path.join(current_app.config['REPO_CLONE_PATH'], 'mirrors')
+        self.max_bytes = max_bytes if max_bytes is not None else current_app.config.get('REPO_CACHE_MAX_BYTES', 0)
+        os.makedirs(self.root_path, exist_ok=True)
+
+    def _mirror_path(self, data_source_id: str) -> str:
+        return os.path.join(self.root_path, f"{data_source_id}.git")
+
+    def _lock_path(self, data_source_id: str) -> str:
+        return os.path.join(self.root_path, f"{data_source_id}.lock")
+
+    def _size_path(self, data_source_id: str) -> str:
+        return os.path.join(self.root_path, f"{data_source_id}.size")
+
+    @contextmanager
+    def lock(self, data_source_id: str, blocking: bool = True, shared: bool = False):
+        """
+        Holds the per-repo lock. Yields False instead of waiting when `blocking=False` and the lock is taken.
+        Fetching and eviction take it exclusively; long readers take it shared (see `pinned`).
+        """
+        with open(self._lock_path(data_source_id), 'a') as lock_file:
+            mode = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+            try:
+                fcntl.flock(lock_file, mode | (0 if blocking else fcntl.LOCK_NB))
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @contextmanager
+    def pinned(self, data_source_id: str):
+        """
+        Keeps a mirror from being fetched into or evicted while the caller reads from it.
+        Call `ensure_mirror` before pinning: it needs the exclusive lock.
+        """
+        with self.lock(data_source_id, shared=True):
+            yield
+
+    def get_mirror(self, data_source_id: str) -> git.Repo | None:
+        """Returns the cached mirror without touching the network, or None if it isn't cached."""
+        mirror_path = self._mirror_path(data_source_id)
+        if not os.path.isdir(mirror_path):
+            return None
+        self._touch(data_source_id)
+        return git.Repo(mirror_path)
+
+    def ensure_mirror(self, data_source_id: str, clone_url: str, fetch: bool = True) -> git.Repo:
+        """
+        Returns an up-to-date mirror for the data source. Clones it on first use,
+        otherwise fetches new commits (unless `fetch=False`).
+        """
+        mirror_path = self._mirror_path(data_source_id)
+        with self.lock(data_source_id):
+            if os.path.isdir(mirror_path):
+                repo = git.Repo(mirror_path)
+                if fetch:
+                    # The URL embeds the PAT, which may have been rotated since the last fetch.
+                    repo.remote('origin').set_url(clone_url)
+                    current_app.logger.info(f"Repo Cache: Fetching updates for data source {data_source_id}...")
+                    repo.git.fetch('origin', '--prune', '--tags')
+            else:
+                # Clone next to the final path and rename, so a crash never leaves a half-cloned mirror behind.
+                temp_path = f"{mirror_path}.tmp"
+                if os.path.exists(temp_path):
+                    shutil.rmtree(temp_path)
+                current_app.logger.info(f"Repo Cache: Cloning bare mirror for data source {data_source_id}...")
+                repo = git.Repo.clone_from(clone_url, temp_path, bare=True)
+                # Only track branches. A plain --mirror would also pull every refs/pull/* ref from GitHub.
+                with repo.config_writer() as config:
+                    config.set_value('remote "origin"', 'fetch', '+refs/heads/*:refs/heads/*')
+                os.rename(temp_path, mirror_path)
+                repo = git.Repo(mirror_path)
+            self._record_size(data_source_id)
+            self._touch(data_source_id)
+
+        self.evict(keep=data_source_id)
+        return repo
+
+    def has_commit(self, repo: git.Repo, commit_sha: str) -> bool:
+        try:
+            repo.commit(commit_sha)
+            return True
+        except (ValueError, git.BadName):
+            return False
+
+    def read_file(self, repo: git.Repo, revision: str, file_path: str) -> str:
+        """Reads a file at `revision` directly from the object database. Raises KeyError if it doesn't exist."""
+        blob = repo.commit(revision).tree / file_path
+        if blob.type != 'blob':
+            raise KeyError(file_path)
+        return blob.data_stream.read().decode('utf-8', errors='ignore')
+
+    def remove(self, data_source_id: str):
+        """Deletes a data source's mirror, e.g. after the data source itself was deleted."""
+        with self.lock(data_source_id):
+            self._delete_mirror(data_source_id)
+
+    def _delete_mirror(self, data_source_id: str):
+        mirror_path = self._mirror_path(data_source_id)
+        if os.path.isdir(mirror_path):
+            shutil.rmtree(mirror_path)
+        if os.path.exists(self._size_path(data_source_id)):
+            os.remove(self._size_path(data_source_id))
+
+    def _touch(self, data_source_id: str):
+        """Marks the mirror as recently used. The mirror directory's mtime is the LRU clock."""
+        try:
+            os.utime(self._mirror_path(data_source_id))
+        except FileNotFoundError:
+            pass
+
+    def _record_size(self, data_source_id: str):
+        """Caches the mirror's on-disk size in a sidecar file so eviction doesn't re-walk every mirror."""
+        total = 0
+        for root, _, files in os.walk(self._mirror_path(data_source_id)):
+            for file_name in files:
+                try:
+                    total += os.path.getsize(os.path.join(root, file_name))
+                except OSError:
+                    pass
+        with open(self._size_path(data_source_id), 'w') as f:
+            f.write(str(total))
+
+    def _read_size(self, data_source_id: str) -> int:
+        try:
+            with open(self._size_path(data_source_id)) as f:
+                return int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def evict(self, keep: str | None = None):
+        """Evicts least recently used mirrors until the cache fits in `max_bytes`. Mirrors in use are skipped."""
+        if not self.max_bytes:
+            return
+
+        mirrors = []
+        for entry in os.listdir(self.root_path):
+            if not entry.endswith('.git'):
+                continue
+            data_source_id = entry[:-len('.git')]
+            last_used = os.path.getmtime(os.path.join(self.root_path, entry))
+            mirrors.append((last_used, data_source_id, self._read_size(data_source_id)))
+
+        total = sum(size for _, _, size in mirrors)
+        for _, data_source_id, size in sorted(mirrors):
+            if total <= self.max_bytes:
+                break
+            if data_source_id == keep:
+                continue
+            with self.lock(data_source_id, blocking=False) as acquired:
+                if not acquired:
+                    continue
+                self._delete_mirror(data_source_id)
+            total -= size
+            current_app.logger.info(f"Repo Cache: Evicted mirror for data source {data_source_id} ({size} bytes).")
+
+
+def build_clone_url(repo_full_name: str) -> str:
+    """Authenticated HTTPS clone URL for a GitHub repository."""
+    return f"https://{current_app.config.get('GITHUB_PAT')}@github.com/{repo_full_name}.git"
@@ -0,0 +1,78 @@
+# backend/app/utils/sqlite_cache.py
+import os
+import sqlite3
+import threading
+import time
+
+
+class SQLiteCache:
+    """
+    A small persistent key/value store on a local SQLite file, with optional LRU bounds.
+
+    Keys are strings, values are raw bytes. Every read bumps the entry's `last_used` timestamp;
+    once the table holds more than `max_entries` rows, the least recently used ones are deleted.
+    The connection is shared between threads behind a lock, and WAL mode lets several worker
+    processes on the same host use the same file.
+    """
+    def __init__(self, path: str, table: str, max_entries: int = 0):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.table = table
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, value BLOB NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_last_used ON {table} (last_used)")
+
+    def get_many(self, keys: list[str]) -> dict[str, bytes]:
+        """Returns {key: value} for the keys that are present."""
+        found = {}
+        unique_keys = list(dict.fromkeys(keys))
+        with self._lock, self._conn:
+            # Stay well below SQLite's bound-parameter limit.
+            for i in range(0, len(unique_keys), 500):
+                chunk = unique_keys[i : i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(f"SELECT key, value FROM {self.table} WHERE key IN ({placeholders})", chunk).fetchall()
+                found.update(rows)
+            if found:
+                now = time.time()
+                self._conn.executemany(f"UPDATE {self.table} SET last_used = ? WHERE key = ?", [(now, key) for key in found])
+        return found
+
+    def get(self, key: str) -> bytes | None:
+        return self.get_many([key]).get(key)
+
+    def set_many(self, items: dict[str, bytes]):
+        if not items:
+            return
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, last_used) VALUES (?, ?, ?)",
+                [(key, value, now) for key, value in items.items()]
+            )
+            self._evict()
+
+    def set(self, key: str, value: bytes):
+        self.set_many({key: value})
+
+    def _evict(self):
+        if not self.max_entries:
+            return
+        (count,) = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN (SELECT key FROM {self.table} ORDER BY last_used ASC LIMIT ?)",
+                (excess,)
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
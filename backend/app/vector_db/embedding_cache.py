@@ -0,0 +1,35 @@
+# backend/app/vector_db/embedding_cache.py
+import hashlib
+from array import array
+from flask import current_app
+from ..utils.sqlite_cache import SQLiteCache
+
+
+class EmbeddingCache:
+    """
+    Content-addressed cache of embedding vectors.
+
+    An entry is keyed by the SHA-256 of the embedding model name plus the exact chunk text, so a
+    chunk whose text is byte-identical to a previous ingestion is never sent to the embedding
+    API again, and switching models can't return stale vectors. Vectors are stored as packed
+    float32 in a local SQLite file (EMBEDDING_CACHE_PATH), bounded by EMBEDDING_CACHE_MAX_ENTRIES.
+    """
+    def __init__(self, model_name: str, path: str | None = None, max_entries: int | None = None):
+        self.model_name = model_name
+        self._store = SQLiteCache(
+            path or current_app.config['EMBEDDING_CACHE_PATH'],
+            table="embeddings",
+            max_entries=max_entries if max_entries is not None else current_app.config.get('EMBEDDING_CACHE_MAX_ENTRIES', 0)
+        )
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\x00{text}".encode('utf-8')).hexdigest()
+
+    def get_many(self, texts: list[str]) -> dict[int, list[float]]:
+        """Returns {position in `texts`: vector} for every cached text."""
+        keys = [self._key(text) for text in texts]
+        found = self._store.get_many(keys)
+        return {i: array('f', found[key]).tolist() for i, key in enumerate(keys) if key in found}
+
+    def set_many(self, texts: list[str], vectors: list[list[float]]):
+        self._store.set_many({self._key(text): array('f', vector).tobytes() for text, vector in zip(texts, vectors)})
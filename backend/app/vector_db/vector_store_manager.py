@@ -1,12 +1,15 @@
 # backend/app/vector_db/vector_store_manager.py
-import time
 import json
+from concurrent.futures import ThreadPoolExecutor
 from pinecone import Pinecone
 from flask import current_app
-from langchain_google_genai import GoogleGenerativeAIEmbeddings, ChatGoogleGenerativeAI
 # CHANGED: from app.models.models import ... to from ..models.models import ...
 # This import style uses relative pathing, which is generally more robust within a package.
 from ..models.models import db, ConfiguredModel, APIKey, AdminUser, RepoConversationSummary, UserFact, ChatHistory
+from .embedding_cache import EmbeddingCache
+from ..utils.rate_limiter import call_with_retries, get_rate_limiter
+from ..utils.llm_pool import get_chat_model, get_embedding_model
+from ..utils.ingestion_metrics import track_call
 
 class VectorStoreManager:
     """Manages all interactions with the Pinecone Vector Database and Gemini Embedding API."""
@@ -22,8 +25,10 @@ class VectorStoreManager:
         self.pinecone = Pinecone(api_key=pinecone_api_key)
         self.index_name = index_name
         
-        self.embedding_model = GoogleGenerativeAIEmbeddings(model="models/text-embedding-004", google_api_key=gemini_api_key)
-        self.chat_model = ChatGoogleGenerativeAI(model="gemini-1.5-flash", temperature=0, google_api_key=gemini_api_key)
+        self.embedding_model_name = "models/text-embedding-004"
+        self.embedding_model = get_embedding_model(self.embedding_model_name, gemini_api_key)
+        self.embedding_cache = EmbeddingCache(self.embedding_model_name) if current_app.config.get('EMBEDDING_CACHE_ENABLED', True) else None
+        self.chat_model = get_chat_model("gemini-1.5-flash", gemini_api_key, temperature=0)
 
     def get_index(self):
         """Connects to the specified Pinecone index."""
@@ -118,49 +123,121 @@ Now, generate docstrings for this list of functions:
     def generate_and_store_embeddings(self, text_chunks: list[str], metadatas: list[dict], data_source_id: str):
         """
         Generates embeddings for text chunks using Gemini and stores them in Pinecone.
-        This method implements batching and throttling to handle API rate limits.
+
+        Batches are embedded concurrently (EMBEDDING_MAX_CONCURRENCY requests in flight), throttled
+        by the process-wide token buckets for the Gemini key (EMBEDDING_REQUESTS_PER_MINUTE /
+        EMBEDDING_TOKENS_PER_MINUTE) and retried with jittered backoff; every attempt, retries
+        included, takes from the buckets. Upserts are likewise throttled by
+        PINECONE_UPSERT_REQUESTS_PER_MINUTE. Each finished batch is handed to a separate upsert
+        worker, so Pinecone writes overlap with the next embedding calls. Chunks found in the
+        embedding cache skip the API and go straight to upsert.
+        Raises RuntimeError if any batch still fails after its retries.
         """
         index = self.get_index()
-        batch_size = current_app.config.get('EMBEDDING_BATCH_SIZE', 100)
-        delay = current_app.config.get('EMBEDDING_REQUEST_DELAY', 1.5)
-
-        current_app.logger.info(f"Starting embedding generation for {len(text_chunks)} chunks...")
-
-        for i in range(0, len(text_chunks), batch_size):
-            batch_texts = text_chunks[i : i + batch_size]
-            batch_metadatas = metadatas[i : i + batch_size]
-
-            current_app.logger.info(f"Processing embedding batch {i // batch_size + 1} with {len(batch_texts)} items...")
-
-            try:
-                embeddings = self.embedding_model.embed_documents(batch_texts)
-            except Exception as e:
-                current_app.logger.error(f"Error calling Gemini Embedding API for batch {i // batch_size + 1}: {e}")
-                continue
-
+        config = current_app.config
+        logger = current_app.logger # Worker threads have no app context; capture what they need.
+        batch_size = config.get('EMBEDDING_BATCH_SIZE', 100)
+        max_retries = config.get('EMBEDDING_MAX_RETRIES', 5)
+        retry_base_delay = config.get('EMBEDDING_RETRY_BASE_DELAY', 1.0)
+        embedding_limiter = get_rate_limiter(
+            "gemini-embeddings", config.get('GEMINI_API_KEY'),
+            config.get('EMBEDDING_REQUESTS_PER_MINUTE', 0), config.get('EMBEDDING_TOKENS_PER_MINUTE', 0)
+        )
+        upsert_limiter = get_rate_limiter("pinecone-upserts", config.get('PINECONE_API_KEY'), config.get('PINECONE_UPSERT_REQUESTS_PER_MINUTE', 0))
+
+        logger.info(f"Starting embedding generation for {len(text_chunks)} chunks...")
+        cached_embeddings = self.embedding_cache.get_many(text_chunks) if self.embedding_cache else {}
+        logger.info(f"Embedding cache: {len(cached_embeddings)} hits, {len(text_chunks) - len(cached_embeddings)} misses.")
+
+        def _tracked_upsert(vectors: list[dict]):
+            upsert_limiter.acquire()
+            with track_call("pinecone"):
+                return index.upsert(vectors=vectors, namespace=data_source_id)
+
+        def _tracked_embed(texts: list[str]):
+            # Rough token estimate (~4 characters per token) for the tokens-per-minute bucket.
+            embedding_limiter.acquire(tokens=sum(len(text) for text in texts) // 4 + 1)
+            with track_call("gemini"):
+                return self.embedding_model.embed_documents(texts)
+
+        def _upsert(batch_number: int, batch_metadatas: list[dict], embeddings: list[list[float]]):
             vectors_to_upsert = []
-            for j, embedding in enumerate(embeddings):
-                metadata = batch_metadatas[j]
+            for metadata, embedding in zip(batch_metadatas, embeddings):
                 vector_id = f"{data_source_id}:{metadata['file_path']}:{metadata['function_name']}"
                 vectors_to_upsert.append({
                     "id": vector_id,
                     "values": embedding,
                     "metadata": metadata
                 })
-
             if vectors_to_upsert:
-                index.upsert(vectors=vectors_to_upsert, namespace=data_source_id)
-            
-            current_app.logger.info(f"Batch complete. Waiting for {delay} seconds...")
-            time.sleep(delay)
-
-        current_app.logger.info("✅ Finished generating and storing all embeddings.")
+                call_with_retries(
+                    lambda: _tracked_upsert(vectors_to_upsert),
+                    max_retries=max_retries, base_delay=retry_base_delay,
+                    on_retry=lambda attempt, e, wait: logger.warning(f"Pinecone upsert for batch {batch_number} failed ({e}). Retry {attempt} in {wait:.1f}s.")
+                )
+            logger.info(f"Batch {batch_number} stored ({len(vectors_to_upsert)} vectors).")
+
+        def _embed_then_upsert(batch_number: int, batch_texts: list[str], batch_metadatas: list[dict], embeddings: list):
+            miss_positions = [j for j, embedding in enumerate(embeddings) if embedding is None]
+            if miss_positions:
+                miss_texts = [batch_texts[j] for j in miss_positions]
+                new_embeddings = call_with_retries(
+                    lambda: _tracked_embed(miss_texts),
+                    max_retries=max_retries, base_delay=retry_base_delay,
+                    on_retry=lambda attempt, e, wait: logger.warning(f"Gemini Embedding API failed for batch {batch_number} ({e}). Retry {attempt} in {wait:.1f}s.")
+                )
+                for j, embedding in zip(miss_positions, new_embeddings):
+                    embeddings[j] = embedding
+                if self.embedding_cache:
+                    self.embedding_cache.set_many(miss_texts, new_embeddings)
+            return upsert_executor.submit(_upsert, batch_number, batch_metadatas, embeddings)
+
+        failed_batches = []
+        with ThreadPoolExecutor(max_workers=config.get('EMBEDDING_UPSERT_CONCURRENCY', 2)) as upsert_executor, \
+                ThreadPoolExecutor(max_workers=config.get('EMBEDDING_MAX_CONCURRENCY', 4)) as embed_executor:
+            embed_futures = []
+            for i in range(0, len(text_chunks), batch_size):
+                batch_number = i // batch_size + 1
+                batch_texts = text_chunks[i : i + batch_size]
+                embeddings = [cached_embeddings.get(i + j) for j in range(len(batch_texts))]
+                embed_futures.append((batch_number, embed_executor.submit(
+                    _embed_then_upsert, batch_number, batch_texts, metadatas[i : i + batch_size], embeddings
+                )))
+
+            for batch_number, embed_future in embed_futures:
+                try:
+                    embed_future.result().result() # Wait for the embedding, then for its upsert.
+                except Exception as e:
+                    logger.error(f"Embedding batch {batch_number} failed after retries: {e}")
+                    failed_batches.append(batch_number)
+
+        if failed_batches:
+            raise RuntimeError(f"{len(failed_batches)} embedding batches failed after retries: {failed_batches}")
+        logger.info("✅ Finished generating and storing all embeddings.")
 
     def clear_data_source_data(self, data_source_id: str):
         """Deletes all vectors associated with a specific data source from the index using namespaces."""
         try:
             index = self.get_index()
-            index.delete(delete_all=True, namespace=data_source_id)
+            with track_call("pinecone"):
+                index.delete(delete_all=True, namespace=data_source_id)
             current_app.logger.info(f"VectorDB: Cleared all vectors in namespace '{data_source_id}'.")
         except Exception as e:
-            current_app.logger.error(f"Failed to clear vector data for data source {data_source_id}: {e}")
\ No newline at end of file
+            current_app.logger.error(f"Failed to clear vector data for data source {data_source_id}: {e}")
+
+    def delete_file_vectors(self, data_source_id: str, file_paths: list[str]):
+        """
+        Deletes the vectors belonging to specific files. Vector IDs are built as
+        `{data_source_id}:{file_path}:{function_name}`, so each file is addressed by ID prefix.
+        """
+        if not file_paths:
+            return
+        index = self.get_index()
+        deleted = 0
+        for file_path in file_paths:
+            for id_batch in index.list(prefix=f"{data_source_id}:{file_path}:", namespace=data_source_id):
+                if id_batch:
+                    with track_call("pinecone"):
+                        index.delete(ids=id_batch, namespace=data_source_id)
+                    deleted += len(id_batch)
+        current_app.logger.info(f"VectorDB: Deleted {deleted} vectors for {len(file_paths)} files in namespace '{data_source_id}'.")
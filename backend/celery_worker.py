@@ -42,6 +42,15 @@ def configure_flask_app_for_worker(sender=None, **kwargs):
         # Note: The `celery_app` above is already fully configured at this point.
         # We are just creating the Flask app instance so tasks can use `current_app`, `db`, etc.
 
+@signals.worker_process_shutdown.connect
+def close_shared_connections_for_worker(sender=None, **kwargs):
+    """
+    Called when a Celery worker process exits. Closes the process-wide Neo4j driver
+    so its pooled connections are released cleanly.
+    """
+    from backend.app.knowledge_graph.neo4j_driver import close_driver
+    close_driver()
+
 @signals.task_prerun.connect
 def push_flask_app_context_for_task(sender=None, task=None, **kwargs):
     """
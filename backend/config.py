@@ -21,19 +21,68 @@ class Config:
     GOOGLE_CLIENT_SECRET = os.environ.get('GOOGLE_CLIENT_SECRET')
     GOOGLE_REDIRECT_URI = os.environ.get('GOOGLE_REDIRECT_URI', 'http://localhost:5001/api/connect/google/callback')
     GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY')
+    # Pooled LLM clients are dropped after this long unused; the pool never holds more than MAX_SIZE.
+    LLM_CLIENT_IDLE_TTL_SECONDS = int(os.environ.get('LLM_CLIENT_IDLE_TTL_SECONDS', 900))
+    LLM_CLIENT_POOL_MAX_SIZE = int(os.environ.get('LLM_CLIENT_POOL_MAX_SIZE', 32))
     GITHUB_PAT = os.environ.get('GITHUB_PAT')
     REPO_CLONE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'repos_cloned')
+    # Bare mirrors under REPO_CLONE_PATH are evicted least-recently-used first beyond this size (0 = unbounded).
+    REPO_CACHE_MAX_BYTES = int(os.environ.get('REPO_CACHE_MAX_BYTES', 5 * 1024 ** 3))
+
+    # --- Ingestion: AST parsing ---
+    # Processes used to parse Python files (1 = parse in the task process), and files handed to a process per task.
+    PARSER_MAX_WORKERS = int(os.environ.get('PARSER_MAX_WORKERS', os.cpu_count() or 1))
+    PARSER_CHUNK_SIZE = int(os.environ.get('PARSER_CHUNK_SIZE', 64))
+    # Parse results are cached by git blob SHA, so unchanged files are never parsed twice.
+    PARSE_CACHE_ENABLED = os.environ.get('PARSE_CACHE_ENABLED', 'true').lower() == 'true'
+    PARSE_CACHE_PATH = os.environ.get('PARSE_CACHE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'parse_results.sqlite3'))
+    PARSE_CACHE_MAX_ENTRIES = int(os.environ.get('PARSE_CACHE_MAX_ENTRIES', 500_000))
+
+    # --- Ingestion: streaming pipeline ---
+    # Parsed files are handed to the graph-node and embedding stages through queues of this size (backpressure).
+    INGESTION_QUEUE_SIZE = int(os.environ.get('INGESTION_QUEUE_SIZE', 256))
+    # Files are parsed, written and embedded in batches of this size; each finished batch is checkpointed.
+    INGESTION_CHECKPOINT_BATCH_FILES = int(os.environ.get('INGESTION_CHECKPOINT_BATCH_FILES', 200))
+    # A failed ingestion is retried (resuming from its checkpoint) this many times before the data source is marked failed.
+    INGESTION_MAX_RETRIES = int(os.environ.get('INGESTION_MAX_RETRIES', 2))
+    INGESTION_RETRY_DELAY_SECONDS = int(os.environ.get('INGESTION_RETRY_DELAY_SECONDS', 60))
+    # Runs with at least INGESTION_SHARD_MIN_FILES Python files (0 disables) are fanned out across workers,
+    # INGESTION_SHARD_FILES consecutive files per shard.
+    INGESTION_SHARD_MIN_FILES = int(os.environ.get('INGESTION_SHARD_MIN_FILES', 2000))
+    INGESTION_SHARD_FILES = int(os.environ.get('INGESTION_SHARD_FILES', 500))
+    # Ingestion tasks publish their progress (Celery state 'PROGRESS') at most this often.
+    INGESTION_PROGRESS_INTERVAL_SECONDS = float(os.environ.get('INGESTION_PROGRESS_INTERVAL_SECONDS', 2.0))
 
     # --- Neo4j AuraDB Configuration ---
     NEO4J_URI = os.environ.get('NEO4J_URI')
     NEO4J_USERNAME = os.environ.get('NEO4J_USERNAME')
     NEO4J_PASSWORD = os.environ.get('NEO4J_PASSWORD')
+    # Every process shares one driver; these size its connection pool.
+    NEO4J_MAX_CONNECTION_POOL_SIZE = int(os.environ.get('NEO4J_MAX_CONNECTION_POOL_SIZE', 50))
+    NEO4J_CONNECTION_ACQUISITION_TIMEOUT = float(os.environ.get('NEO4J_CONNECTION_ACQUISITION_TIMEOUT', 60))
+    # The graph schema is cached per process (and in Redis when CACHE_REDIS_URL is set) until ingestion invalidates it.
+    # Processes notice an invalidation within GRAPH_SCHEMA_REDIS_CHECK_SECONDS, through Redis or else the database.
+    GRAPH_SCHEMA_CACHE_TTL_SECONDS = int(os.environ.get('GRAPH_SCHEMA_CACHE_TTL_SECONDS', 3600))
+    GRAPH_SCHEMA_REDIS_CHECK_SECONDS = int(os.environ.get('GRAPH_SCHEMA_REDIS_CHECK_SECONDS', 30))
+    # Rows buffered per record kind before the graph writer flushes them with UNWIND.
+    GRAPH_WRITE_BATCH_SIZE = int(os.environ.get('GRAPH_WRITE_BATCH_SIZE', 1000))
     
     # --- Pinecone Configuration ---
     PINECONE_API_KEY = os.environ.get('PINECONE_API_KEY')
     
     EMBEDDING_BATCH_SIZE = 100
-    EMBEDDING_REQUEST_DELAY = 1.5
+    # Embedding throughput: concurrent requests in flight, Gemini and Pinecone quotas (shared by the whole process), and retries per failed batch.
+    EMBEDDING_MAX_CONCURRENCY = int(os.environ.get('EMBEDDING_MAX_CONCURRENCY', 4))
+    EMBEDDING_UPSERT_CONCURRENCY = int(os.environ.get('EMBEDDING_UPSERT_CONCURRENCY', 2))
+    EMBEDDING_REQUESTS_PER_MINUTE = int(os.environ.get('EMBEDDING_REQUESTS_PER_MINUTE', 150))
+    EMBEDDING_TOKENS_PER_MINUTE = int(os.environ.get('EMBEDDING_TOKENS_PER_MINUTE', 1_000_000))
+    PINECONE_UPSERT_REQUESTS_PER_MINUTE = int(os.environ.get('PINECONE_UPSERT_REQUESTS_PER_MINUTE', 600))
+    EMBEDDING_MAX_RETRIES = int(os.environ.get('EMBEDDING_MAX_RETRIES', 5))
+    EMBEDDING_RETRY_BASE_DELAY = float(os.environ.get('EMBEDDING_RETRY_BASE_DELAY', 1.0))
+    # Local cache of embedding vectors keyed by hash(model, chunk text). 0 entries = unbounded.
+    EMBEDDING_CACHE_ENABLED = os.environ.get('EMBEDDING_CACHE_ENABLED', 'true').lower() == 'true'
+    EMBEDDING_CACHE_PATH = os.environ.get('EMBEDDING_CACHE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'embeddings.sqlite3'))
+    EMBEDDING_CACHE_MAX_ENTRIES = int(os.environ.get('EMBEDDING_CACHE_MAX_ENTRIES', 1_000_000))
     ENABLE_AI_DOCSTRING_GENERATION = True
 
     # --- Project Name for Celery App ---
@@ -44,6 +93,53 @@ class Config:
     CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', 'redis://localhost:6379/0')
     CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND', 'redis://localhost:6379/0')
     
+    # Shared cache for web and worker processes. Leave unset to cache per process only.
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL')
+
+    # --- Chat: answer cache ---
+    # Final answers per (data source, index revision, decomposed query). A near-duplicate question is a hit when its
+    # embedding's cosine similarity to a cached one reaches the threshold; 1 (or 0) restricts hits to exact matches.
+    ANSWER_CACHE_ENABLED = os.environ.get('ANSWER_CACHE_ENABLED', 'true').lower() == 'true'
+    ANSWER_CACHE_TTL_SECONDS = int(os.environ.get('ANSWER_CACHE_TTL_SECONDS', 86400))
+    ANSWER_CACHE_MAX_ENTRIES = int(os.environ.get('ANSWER_CACHE_MAX_ENTRIES', 1024))
+    ANSWER_CACHE_SIMILARITY_THRESHOLD = float(os.environ.get('ANSWER_CACHE_SIMILARITY_THRESHOLD', 0.95))
+    # Records of generated Cypher queries per (data source, index revision, normalized query). Larger results aren't cached.
+    CYPHER_CACHE_ENABLED = os.environ.get('CYPHER_CACHE_ENABLED', 'true').lower() == 'true'
+    CYPHER_CACHE_TTL_SECONDS = int(os.environ.get('CYPHER_CACHE_TTL_SECONDS', 3600))
+    CYPHER_CACHE_MAX_ENTRIES = int(os.environ.get('CYPHER_CACHE_MAX_ENTRIES', 2048))
+    CYPHER_CACHE_MAX_ROWS = int(os.environ.get('CYPHER_CACHE_MAX_ROWS', 1000))
+
+    # --- Chat: knowledge graph gathering ---
+    # In parallel mode the agent asks the LLM once for up to CYPHER_PARALLEL_QUERIES complementary queries and runs them
+    # concurrently; otherwise it generates and runs them one after another. Queries still running when the time budget
+    # (counted from the start of gathering) runs out are abandoned and their results dropped.
+    CYPHER_PARALLEL_GATHERING = os.environ.get('CYPHER_PARALLEL_GATHERING', 'true').lower() == 'true'
+    CYPHER_PARALLEL_QUERIES = int(os.environ.get('CYPHER_PARALLEL_QUERIES', 3))
+    CYPHER_GATHERING_TIME_BUDGET_SECONDS = float(os.environ.get('CYPHER_GATHERING_TIME_BUDGET_SECONDS', 20))
+    # Generated queries pass a guard before they run: read-only clauses, variable-length paths of at most
+    # CYPHER_GUARD_MAX_PATH_LENGTH hops, a dataSourceId filter, no forbidden operator in the EXPLAIN plan and a LIMIT
+    # (CYPHER_GUARD_DEFAULT_LIMIT is added when missing). Neo4j aborts them after CYPHER_QUERY_TIMEOUT_SECONDS (0 = no timeout).
+    CYPHER_GUARD_ENABLED = os.environ.get('CYPHER_GUARD_ENABLED', 'true').lower() == 'true'
+    CYPHER_GUARD_MAX_PATH_LENGTH = int(os.environ.get('CYPHER_GUARD_MAX_PATH_LENGTH', 5))
+    CYPHER_GUARD_DEFAULT_LIMIT = int(os.environ.get('CYPHER_GUARD_DEFAULT_LIMIT', 200))
+    CYPHER_GUARD_FORBIDDEN_OPERATORS = tuple(
+        operator.strip() for operator in os.environ.get('CYPHER_GUARD_FORBIDDEN_OPERATORS', 'AllNodesScan,CartesianProduct').split(',') if operator.strip()
+    )
+    CYPHER_QUERY_TIMEOUT_SECONDS = float(os.environ.get('CYPHER_QUERY_TIMEOUT_SECONDS', 10))
+
+    # --- Chat: context budget ---
+    # The last CHAT_HISTORY_TURNS turns of a session are sent verbatim; older ones reach the agent through the repo
+    # conversation summary (turns it doesn't cover yet are folded in, CHAT_FOLDED_MESSAGE_TOKENS per message).
+    CHAT_HISTORY_TURNS = int(os.environ.get('CHAT_HISTORY_TURNS', 6))
+    CHAT_FOLDED_MESSAGE_TOKENS = int(os.environ.get('CHAT_FOLDED_MESSAGE_TOKENS', 100))
+    # Prompt budget per model: a fraction of its context window (the default one when the model has none configured),
+    # capped so per-turn cost stays flat, split between the chat history and the tool results.
+    CHAT_DEFAULT_CONTEXT_WINDOW = int(os.environ.get('CHAT_DEFAULT_CONTEXT_WINDOW', 32768))
+    CHAT_CONTEXT_WINDOW_FRACTION = float(os.environ.get('CHAT_CONTEXT_WINDOW_FRACTION', 0.5))
+    CHAT_MAX_PROMPT_TOKENS = int(os.environ.get('CHAT_MAX_PROMPT_TOKENS', 16000))
+    CHAT_HISTORY_BUDGET_FRACTION = float(os.environ.get('CHAT_HISTORY_BUDGET_FRACTION', 0.3))
+    CHAT_TOOL_CONTEXT_BUDGET_FRACTION = float(os.environ.get('CHAT_TOOL_CONTEXT_BUDGET_FRACTION', 0.5))
+
     # List of modules to import when the Celery worker starts.
     # These modules should contain your Celery tasks.
     CELERY_IMPORTS = (
@@ -0,0 +1,67 @@
+# backend/tests/test_answer_cache.py
+import os
+import sys
+
+import pytest
+from flask import Flask
+from langchain_core.messages import AIMessage, HumanMessage
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.ai_core import graph # noqa: F401 (answer_cache_nodes is imported through the graph)
+from app.ai_core import answer_cache_nodes
+from app.utils.answer_cache import AnswerCache
+
+DS, REVISION = "ds-1", "rev-1"
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    app = Flask(__name__)
+    app.config.update(GEMINI_API_KEY="key", ANSWER_CACHE_SIMILARITY_THRESHOLD=0.9)
+    cache = AnswerCache()
+    embedded = []
+
+    def embed(query):
+        embedded.append(query)
+        return [1.0, 0.0] if "parser" in query else [0.0, 1.0]
+
+    monkeypatch.setattr(cache, "embed", embed)
+    monkeypatch.setattr(answer_cache_nodes, "answer_cache", cache)
+    monkeypatch.setattr(answer_cache_nodes, "get_index_revision", lambda data_source_id: REVISION)
+    cache.embedded = embedded
+    with app.app_context():
+        yield cache
+
+
+def _lookup(query, chat_history=()):
+    return answer_cache_nodes.answer_cache_lookup_node({"repo_id": DS, "original_query": query, "chat_history": list(chat_history)})
+
+
+def test_miss_on_an_empty_cache_does_not_embed(cache):
+    assert _lookup("How does the parser work?") == {"answer_cache_hit": False, "index_revision": REVISION, "query_embedding": None}
+    assert cache.embedded == []
+
+
+def test_exact_hit_does_not_embed(cache):
+    cache.set(DS, REVISION, "how does the parser work", "It walks the AST.", [1.0, 0.0])
+
+    result = _lookup("  How does the PARSER work?")
+
+    assert result["answer_cache_hit"] and result["final_answer"][0].content == "It walks the AST."
+    assert cache.embedded == []
+
+
+def test_similar_question_hits_after_embedding(cache):
+    cache.set(DS, REVISION, "explain the parser", "It walks the AST.", [1.0, 0.0])
+
+    assert _lookup("What does the parser do?")["final_answer"][0].content == "It walks the AST."
+    assert _lookup("What does the scheduler do?")["answer_cache_hit"] is False
+    assert cache.embedded == ["What does the parser do?", "What does the scheduler do?"]
+
+
+def test_follow_up_questions_are_not_cached(cache):
+    cache.set(DS, REVISION, "and what calls it", "Something else entirely.", None)
+
+    history = [HumanMessage(content="What does run do?"), AIMessage(content="It runs."), HumanMessage(content="And what calls it?")]
+    assert _lookup("And what calls it?", history) == {"answer_cache_hit": False}
@@ -0,0 +1,52 @@
+# backend/tests/test_answer_stream.py
+import os
+import sys
+
+import pytest
+from flask import Flask
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langgraph.graph import END, StateGraph
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.ai_core.graph import AgentState
+from app.ai_core import synthesizer
+from app.ai_core.progress import stream_answer_events
+
+ANSWER = "The parser walks every file and builds the graph."
+
+
+@pytest.fixture(autouse=True)
+def app_context():
+    with Flask(__name__).app_context():
+        yield
+
+
+def _synthesizer_graph():
+    graph_builder = StateGraph(AgentState)
+    graph_builder.add_node("synthesizer", synthesizer.synthesizer_node)
+    graph_builder.set_entry_point("synthesizer")
+    graph_builder.add_edge("synthesizer", END)
+    return graph_builder.compile()
+
+
+def test_streams_the_answer_exactly_once(monkeypatch):
+    llm = GenericFakeChatModel(messages=iter([AIMessage(content=ANSWER)]))
+    monkeypatch.setattr(synthesizer, "get_llm_for_graph", lambda state: llm)
+    state = {"decomposed_query": "How is the graph built?", "intermediate_steps": [("knowledge_graph_search", "[]")], "final_answer": []}
+
+    events = list(stream_answer_events(_synthesizer_graph(), state))
+    chunks = [event["chunk"] for event in events if "chunk" in event]
+
+    assert len(chunks) > 1
+    assert "".join(chunks) == ANSWER
+    assert {"status": "progress", "node": "synthesizer", "message": "Writing the answer..."} in events
+
+
+def test_sends_an_unstreamed_answer_once():
+    state = {"decomposed_query": "How is the graph built?", "intermediate_steps": [], "final_answer": []}
+
+    chunks = [event["chunk"] for event in stream_answer_events(_synthesizer_graph(), state) if "chunk" in event]
+
+    assert chunks == ["I apologize, but I was unable to retrieve any context to answer your question."]
@@ -0,0 +1,74 @@
+# backend/tests/test_cypher_guard.py
+import os
+import sys
+
+import pytest
+from flask import Flask
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.knowledge_graph.cypher_guard import CypherRejected, check_cypher
+
+DS = "ds-1"
+
+
+@pytest.fixture(autouse=True)
+def app_context():
+    app = Flask(__name__)
+    app.config.update(CYPHER_GUARD_DEFAULT_LIMIT=50, CYPHER_GUARD_MAX_PATH_LENGTH=5)
+    with app.app_context():
+        yield
+
+
+@pytest.mark.parametrize("query", [
+    "MATCH (f:Function {name: 'main', dataSourceId: 'ds-1'}) RETURN f.summary",
+    "MATCH (c:Class {dataSourceId: 'ds-1'})-[:HAS_METHOD]->(m:Function) WHERE m.dataSourceId = 'ds-1' RETURN m.name",
+    "MATCH (f:Function {dataSourceId: 'ds-1'}) MATCH (f)-[:CALLS*1..3]->(g:Function {dataSourceId: 'ds-1'}) RETURN g.name",
+    "MATCH (f:Function {dataSourceId: 'ds-1'})-[:CALLS]->(:Function) RETURN count(*)",
+    "MATCH (f:Function) WHERE f.name STARTS WITH 'get' AND (f.dataSourceId = 'ds-1') RETURN f.name",
+    "MATCH (f:Function {dataSourceId: 'ds-1'}) WITH f ORDER BY f.name LIMIT 10 RETURN f.name",
+])
+def test_accepts_queries_filtering_every_node(query):
+    assert check_cypher(DS, query) == f"{query}\nLIMIT 50"
+
+
+@pytest.mark.parametrize("query", [
+    "MATCH (f:Function {dataSourceId: 'ds-1'})-[:CALLS]->(g:Function) RETURN g.name",
+    "MATCH (f:Function {dataSourceId: 'other'}) WHERE f.name = 'ds-1' RETURN f",
+    "MATCH (f:Function) WHERE f.dataSourceId <> 'ds-1' RETURN f",
+    "MATCH (:Function) RETURN count(*)",
+    "RETURN 'ds-1' AS dataSourceId",
+    "MATCH (f:Function) WHERE f.dataSourceId = 'ds-1' OR f.name = 'main' RETURN f",
+    "MATCH (f:Function) WHERE f.name = 'main' AND f.dataSourceId = 'ds-1' OR true RETURN f",
+    "MATCH (f:Function) WHERE NOT f.dataSourceId = 'ds-1' RETURN f",
+])
+def test_rejects_queries_reaching_other_data_sources(query):
+    with pytest.raises(CypherRejected):
+        check_cypher(DS, query)
+
+
+def test_rejects_writes():
+    with pytest.raises(CypherRejected, match="'DETACH' is not allowed"):
+        check_cypher(DS, "MATCH (f:Function {dataSourceId: 'ds-1'}) DETACH DELETE f")
+
+
+def test_limits_every_branch_of_a_union():
+    query = (
+        "MATCH (f:Function {dataSourceId: 'ds-1'}) RETURN f.name AS name\n"
+        "UNION\n"
+        "MATCH (c:Class {dataSourceId: 'ds-1'}) RETURN c.name AS name"
+    )
+    assert check_cypher(DS, query) == f"CALL {{\n{query}\n}}\nRETURN *\nLIMIT 50"
+
+
+@pytest.mark.parametrize("query", [
+    "MATCH (f:Function {dataSourceId: 'ds-1'}) RETURN f.name LIMIT 5",
+    "MATCH (f:Function {dataSourceId: 'ds-1'}) WITH f LIMIT 10 RETURN f.name ORDER BY f.name LIMIT 5",
+])
+def test_keeps_the_limit_of_the_final_return(query):
+    assert check_cypher(DS, query) == query
+
+
+def test_a_limit_in_a_subquery_is_not_the_final_limit():
+    query = "MATCH (f:Function {dataSourceId: 'ds-1'}) WHERE EXISTS { MATCH (f)-[:CALLS]->(g {dataSourceId: 'ds-1'}) RETURN g LIMIT 1 } RETURN f.name"
+    assert check_cypher(DS, query) == f"{query}\nLIMIT 50"
@@ -0,0 +1,111 @@
+# backend/tests/test_incremental_relink.py
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.app.code_parser.models import FileEdges
+from backend.app.code_parser.python_parser import parse_python_file
+from backend.app.code_parser.symbol_table import SymbolTable
+from backend.app.tasks import repo_ingestion_tasks
+from backend.app.tasks.ingestion_checkpoint import IngestionCheckpoint
+from backend.app.tasks.ingestion_progress import IngestionProgress
+
+DS = "ds-1"
+CALLER = "class Child(Base):\n    def run(self):\n        helper()\n"
+
+
+class FakeGraph:
+    """Just enough of KnowledgeGraphManager and GraphBatchWriter for the relationship pass."""
+    def __init__(self):
+        self.calls = set()
+        self.inheritance = set()
+        self.unresolved_names = {}
+        self.rows_written = 0
+
+    def batch_writer(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def flush(self):
+        pass
+
+    def add_import_relationship(self, data_source_id, file_path, module, name, asname):
+        pass
+
+    def add_resolved_call(self, data_source_id, caller_name, caller_file, callee_name, callee_file):
+        self.calls.add((caller_name, caller_file, callee_name, callee_file))
+
+    def add_resolved_inheritance(self, data_source_id, file_path, class_name, base_name, base_file):
+        self.inheritance.add((class_name, file_path, base_name, base_file))
+
+    def set_unresolved_names(self, data_source_id, file_path, names):
+        self.unresolved_names[file_path] = names
+
+    def find_files_with_unresolved_names(self, data_source_id, names):
+        return [path for path, unresolved in self.unresolved_names.items() if set(unresolved) & set(names)]
+
+
+class MemoryCheckpoint(IngestionCheckpoint):
+    def _save_locked(self):
+        pass
+
+
+class FakeParseSession:
+    def __init__(self, sources):
+        self.sources = sources
+
+    def iter_parsed_files(self, commit, relative_file_paths):
+        for path in relative_file_paths:
+            yield path, parse_python_file(self.sources[path])
+
+
+@pytest.fixture(autouse=True)
+def app_context():
+    with Flask(__name__).app_context():
+        yield
+
+
+def _link(graph, sources, changed, mode, symbol_table):
+    parsed = {path: parse_python_file(sources[path]) for path in changed}
+    defined_names = set()
+    for path, parsed_file in parsed.items():
+        symbol_table.add_parsed_file(path, parsed_file)
+        defined_names |= repo_ingestion_tasks._defined_names(parsed_file)
+    task = SimpleNamespace(request=SimpleNamespace(id="task"), update_state=lambda **kwargs: None)
+    repo_ingestion_tasks._write_relationship_batches(
+        graph, FakeParseSession(sources), DS, None, [sorted(changed)],
+        {path: FileEdges.from_parsed_file(parsed_file) for path, parsed_file in parsed.items()},
+        symbol_table, MemoryCheckpoint(DS, {"mode": mode}), IngestionProgress(task, DS), dependent_file_paths=(), defined_names=defined_names,
+    )
+
+
+def test_relinks_untouched_callers_of_a_new_definition():
+    before = {"a.py": "def other():\n    pass\n", "b.py": CALLER}
+    after = {"a.py": "class Base:\n    pass\n\ndef helper():\n    pass\n", "b.py": CALLER}
+
+    graph = FakeGraph()
+    _link(graph, before, ["a.py", "b.py"], "full", SymbolTable())
+    assert graph.unresolved_names["b.py"] == ["Base", "helper"]
+
+    # Only a.py changed; b.py's definitions come from the graph, as in an incremental sync.
+    symbol_table = SymbolTable()
+    symbol_table.add_file("b.py")
+    symbol_table.add_definition("class", "Child", "b.py")
+    symbol_table.add_definition("function", "run", "b.py")
+    _link(graph, after, ["a.py"], "incremental", symbol_table)
+
+    rebuilt = FakeGraph()
+    _link(rebuilt, after, ["a.py", "b.py"], "full", SymbolTable())
+    assert ("run", "b.py", "helper", "a.py") in graph.calls
+    assert ("Child", "b.py", "Base", "a.py") in graph.inheritance
+    assert (graph.calls, graph.inheritance, graph.unresolved_names) == (rebuilt.calls, rebuilt.inheritance, rebuilt.unresolved_names)
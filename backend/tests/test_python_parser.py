@@ -0,0 +1,69 @@
+# backend/tests/test_python_parser.py
+import multiprocessing
+import os
+import sys
+
+from flask import Flask
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.code_parser.models import FileEdges
+from app.code_parser.python_parser import ParserPool, parse_python_file, parse_python_files_in_parallel
+
+FILES = [
+    ("a.py", "def first():\n    second()\n"),
+    ("b.py", "class Thing:\n    def method(self):\n        pass\n"),
+    ("broken.py", "def broken(:\n"),
+]
+
+
+def _parse_in_daemon(results):
+    with Flask(__name__).app_context():
+        try:
+            parsed = parse_python_files_in_parallel(FILES, max_workers=4, chunk_size=1)
+            results.put([(path, parsed_file is not None, error is not None) for path, parsed_file, error in parsed])
+        except BaseException as e:
+            results.put(f"{type(e).__name__}: {e}")
+
+
+def test_parses_serially_inside_a_daemonic_process():
+    """Celery prefork children are daemonic and can't start a process pool of their own."""
+    results = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_parse_in_daemon, args=(results,), daemon=True)
+    process.start()
+    outcome = results.get(timeout=60)
+    process.join(timeout=60)
+
+    assert outcome == [("a.py", True, False), ("b.py", True, False), ("broken.py", False, True)]
+
+
+def test_parses_on_a_process_pool():
+    with Flask(__name__).app_context():
+        parsed = list(parse_python_files_in_parallel(FILES, max_workers=2, chunk_size=1))
+
+    assert [path for path, _, _ in parsed] == ["a.py", "b.py", "broken.py"]
+    assert parsed[0][1].functions[0].name == "first"
+    assert parsed[2][1] is None and parsed[2][2].startswith("SyntaxError")
+
+
+def test_parser_pool_is_reused_across_batches():
+    with Flask(__name__).app_context(), ParserPool(max_workers=2, chunk_size=1) as pool:
+        first = list(pool.parse(FILES[:1]))
+        second = list(pool.parse(FILES[1:]))
+
+    assert [path for path, _, _ in first + second] == ["a.py", "b.py", "broken.py"]
+    assert FileEdges.from_parsed_file(first[0][1]).function_calls == (("first", ("second",)),)
+
+
+def test_function_sources_with_cr_and_crlf_line_endings():
+    """ast ends a line at a lone '\\r' as well as at '\\n' and '\\r\\n'."""
+    for newline in ("\r", "\r\n"):
+        source = newline.join(["import os", "", "def first():", "    second()", "", "def second():", "    return 1", ""])
+        with Flask(__name__).app_context():
+            parsed = parse_python_file(source)
+
+        assert parsed is not None
+        assert [parsed.source_of(function) for function in parsed.functions] == [
+            f"def first():{newline}    second()",
+            f"def second():{newline}    return 1",
+        ]